@@ -0,0 +1,406 @@
+from MultiClassBoardAttributes import MultiClassBoardAttributes
+from BitBoard import BitBoard
+from Evaluation import Evaluation
+import time
+
+class SearchStoppedError(Exception):
+    pass
+
+class AlphaBetaSearch:
+
+    """Negamax search with alpha-beta pruning used by the Expert AI. The search is run with iterative deepening: the root
+    position is searched to depth 1, then depth 2 and so on until the time for the move has passed or stop_event is set.
+    The move from the deepest search that finished is returned, and each search uses the results of the previous ones
+    to order its moves so that alpha-beta pruning cuts off as many moves as possible.
+
+    Moves are ordered as follows: the best move stored in the transposition table for the position, then captures, then
+    the killer moves (normal moves that caused a cut-off at the same depth in another branch) and finally the remaining
+    normal moves ordered by the history heuristic (how often each move has caused a cut-off anywhere in the search).
+
+    Positions at the end of the search are scored with a quiescence search that only looks at captures, so a position in
+    the middle of a series of captures is not scored by the Evaluation before the series is over.
+
+    The search runs on a BitBoard copy of the root board using move codes, the same as GameTree.
+
+    ####################################################################
+    CLASS A SKILL: Minimax (negamax) search with alpha-beta pruning
+    CLASS A SKILL: Hash tables (transposition table)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    # score of a position where the player to move has lost (no pieces left). Wins found nearer the root score higher.
+    WIN_SCORE = 1000000
+
+    DEFAULT_MAX_DEPTH = 64
+
+    # maximum number of captures searched by the quiescence search after the depth of the main search is reached
+    QUIESCENCE_DEPTH = 4
+
+    # number of killer moves stored for each ply
+    NUM_KILLER_MOVES = 2
+
+    # number of positions searched between checks of the time and the stop event
+    NODES_PER_TIME_CHECK = 1024
+
+    # seconds between calls to the progress callback during a search
+    PROGRESS_INTERVAL = 0.5
+
+    # the transposition table is cleared when it holds this many positions
+    DEFAULT_MAX_TRANSPOSITIONS = 500000
+
+    # transposition table entry flags: the stored score is exact, a lower bound (the search failed high) or an upper bound
+    # (the search failed low)
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    def __init__(self, root_board, time_for_move, max_depth=DEFAULT_MAX_DEPTH, evaluation=None, root_colour=None, max_transpositions=DEFAULT_MAX_TRANSPOSITIONS, max_nodes=None):
+
+        # the root board is kept as a string so the working board can be reset if a search is stopped part way through
+        self.__root_game_state_string = root_board.get_game_state_string()
+        self.__board = BitBoard(self.__root_game_state_string)
+
+        self.__time_for_move = time_for_move
+        self.__max_depth = max_depth
+
+        # maximum number of positions searched (None for no limit), a fixed budget that does not depend on the machine's speed
+        self.__max_nodes = max_nodes
+
+        if evaluation == None:
+            evaluation = Evaluation()
+
+        self.__evaluation = evaluation
+
+        # colours indexed by side (0 is player 1, 1 is player 2). The AI (player 2) moves first unless root_colour is given.
+        self.__colours = (MultiClassBoardAttributes.player_1_colour, MultiClassBoardAttributes.player_2_colour)
+
+        if root_colour == None or root_colour == MultiClassBoardAttributes.player_2_colour:
+            self.__root_side = 1
+        else:
+            self.__root_side = 0
+
+        # maps (position hash, side to move) to a tuple (depth, score, flag, best move code)
+        self.__transpositions = {}
+        self.__max_transpositions = max_transpositions
+
+        # history_scores[side][move code] and killer_moves[ply]
+        self.__history_scores = [[0] * (1 << (2 * BitBoard.MOVE_CODE_SQUARE_BITS + 1)) for _ in range(2)]
+        self.__killer_moves = [[None] * AlphaBetaSearch.NUM_KILLER_MOVES for _ in range(max_depth + 1)]
+
+        # search state
+        self.__num_nodes = 0
+        self.__start_time = None
+        self.__last_progress_time = None
+        self.__stop_event = None
+        self.__progress_callback = None
+
+        # results of the deepest search that has finished
+        self.__best_move_code = None
+        self.__best_score = None
+        self.__completed_depth = 0
+
+    def get_num_nodes(self):
+        return self.__num_nodes
+
+    def get_completed_depth(self):
+        return self.__completed_depth
+
+    def get_best_score(self):
+        return self.__best_score
+
+    def __get_static_score(self, side):
+
+        """Returns the Evaluation score of the working board from the perspective of side"""
+
+        score = self.__evaluation.get_score(self.__board)
+
+        if side == 0:
+            return -score
+
+        return score
+
+    def __score_to_table(self, score, ply):
+
+        """Converts a win or loss score found at ply to a score relative to the current position so it can be stored in the
+        transposition table and reused when the position is reached at a different ply"""
+
+        if score > AlphaBetaSearch.WIN_SCORE - AlphaBetaSearch.DEFAULT_MAX_DEPTH * 2:
+            return score + ply
+
+        elif score < -AlphaBetaSearch.WIN_SCORE + AlphaBetaSearch.DEFAULT_MAX_DEPTH * 2:
+            return score - ply
+
+        return score
+
+    def __score_from_table(self, score, ply):
+
+        """The reverse of __score_to_table"""
+
+        if score > AlphaBetaSearch.WIN_SCORE - AlphaBetaSearch.DEFAULT_MAX_DEPTH * 2:
+            return score - ply
+
+        elif score < -AlphaBetaSearch.WIN_SCORE + AlphaBetaSearch.DEFAULT_MAX_DEPTH * 2:
+            return score + ply
+
+        return score
+
+    def __count_node(self):
+
+        """Counts a searched position. SearchStoppedError is raised if max_nodes positions have been searched. Every
+        NODES_PER_TIME_CHECK positions the progress callback is called (if it is due) and SearchStoppedError is raised if
+        the time for the move has passed or the stop event has been set."""
+
+        self.__num_nodes += 1
+
+        # the search to depth 1 always finishes so there is a move to return
+        if self.__max_nodes != None and self.__num_nodes >= self.__max_nodes and self.__completed_depth > 0:
+            raise SearchStoppedError()
+
+        if self.__num_nodes % AlphaBetaSearch.NODES_PER_TIME_CHECK != 0:
+            return
+
+        current_time = time.time()
+
+        if self.__progress_callback != None and current_time - self.__last_progress_time >= AlphaBetaSearch.PROGRESS_INTERVAL:
+            self.__last_progress_time = current_time
+            self.__progress_callback(self.__num_nodes, current_time - self.__start_time, self.get_best_move())
+
+        # the search to depth 1 always finishes so there is a move to return
+        if self.__completed_depth == 0:
+            return
+
+        if self.__time_for_move != None and current_time - self.__start_time >= self.__time_for_move:
+            raise SearchStoppedError()
+
+        if self.__stop_event != None and self.__stop_event.is_set():
+            raise SearchStoppedError()
+
+    def __order_moves(self, move_codes, side, ply, table_move):
+
+        """Returns the move codes in the order they are searched: the transposition table move, captures, killer moves and
+        then normal moves by history score"""
+
+        killer_moves = self.__killer_moves[ply]
+        history_scores = self.__history_scores[side]
+
+        def move_order_key(move_code):
+            if move_code == table_move:
+                return (0, 0)
+
+            if move_code & BitBoard.MOVE_CODE_CAPTURE_FLAG:
+                return (1, 0)
+
+            if move_code in killer_moves:
+                return (2, 0)
+
+            return (3, -history_scores[move_code])
+
+        return sorted(move_codes, key=move_order_key)
+
+    def __store_cut_off(self, move_code, side, ply, depth):
+
+        """Updates the killer moves and history scores after move_code caused a cut-off. Captures are already searched
+        early so only normal moves are stored."""
+
+        if move_code & BitBoard.MOVE_CODE_CAPTURE_FLAG:
+            return
+
+        killer_moves = self.__killer_moves[ply]
+
+        if move_code not in killer_moves:
+            killer_moves.pop()
+            killer_moves.insert(0, move_code)
+
+        self.__history_scores[side][move_code] += depth * depth
+
+    def __store_transposition(self, key, depth, score, flag, move_code):
+
+        if len(self.__transpositions) >= self.__max_transpositions:
+            self.__transpositions.clear()
+
+        self.__transpositions[key] = (depth, score, flag, move_code)
+
+    def __quiescence(self, alpha, beta, ply, side, depth):
+
+        """Searches only captures from the working board until no captures are left or depth captures have been made, and
+        returns the score of the position from the perspective of side"""
+
+        self.__count_node()
+
+        if self.__board.get_piece_count(side + 1) == 0:
+            return -AlphaBetaSearch.WIN_SCORE + ply
+
+        # the player to move does not have to capture, so the static score is a lower bound of the position's score
+        stand_pat_score = self.__get_static_score(side)
+
+        if depth == 0 or stand_pat_score >= beta:
+            return stand_pat_score
+
+        alpha = max(alpha, stand_pat_score)
+
+        for move_code in self.__board.get_player_capture_codes(self.__colours[side]):
+            self.__board.make_move_code(move_code)
+            score = -self.__quiescence(-beta, -alpha, ply + 1, 1 - side, depth - 1)
+            self.__board.unmake_move_code(move_code)
+
+            if score >= beta:
+                return score
+
+            alpha = max(alpha, score)
+
+        return alpha
+
+    def __negamax(self, depth, alpha, beta, ply, side):
+
+        """Returns the score of the working board from the perspective of side (the player to move) searched to depth"""
+
+        self.__count_node()
+
+        if self.__board.get_piece_count(side + 1) == 0:
+            return -AlphaBetaSearch.WIN_SCORE + ply
+
+        if depth == 0:
+            return self.__quiescence(alpha, beta, ply, side, AlphaBetaSearch.QUIESCENCE_DEPTH)
+
+        key = (self.__board.get_hash(), side)
+        table_move = None
+
+        entry = self.__transpositions.get(key)
+
+        if entry != None:
+            entry_depth, entry_score, entry_flag, table_move = entry
+            entry_score = self.__score_from_table(entry_score, ply)
+
+            if entry_depth >= depth:
+                if entry_flag == AlphaBetaSearch.EXACT:
+                    return entry_score
+
+                elif entry_flag == AlphaBetaSearch.LOWER_BOUND:
+                    alpha = max(alpha, entry_score)
+
+                else:
+                    beta = min(beta, entry_score)
+
+                if alpha >= beta:
+                    return entry_score
+
+        move_codes = self.__board.get_player_move_codes(self.__colours[side])
+
+        # a player whose pieces are all blocked cannot move so the position is scored as it is
+        if len(move_codes) == 0:
+            return self.__get_static_score(side)
+
+        original_alpha = alpha
+        best_score = None
+        best_move_code = None
+
+        for move_code in self.__order_moves(move_codes, side, ply, table_move):
+            self.__board.make_move_code(move_code)
+            score = -self.__negamax(depth - 1, -beta, -alpha, ply + 1, 1 - side)
+            self.__board.unmake_move_code(move_code)
+
+            if best_score == None or score > best_score:
+                best_score = score
+                best_move_code = move_code
+
+            alpha = max(alpha, score)
+
+            if alpha >= beta:
+                self.__store_cut_off(move_code, side, ply, depth)
+                break
+
+        if best_score <= original_alpha:
+            flag = AlphaBetaSearch.UPPER_BOUND
+        elif best_score >= beta:
+            flag = AlphaBetaSearch.LOWER_BOUND
+        else:
+            flag = AlphaBetaSearch.EXACT
+
+        self.__store_transposition(key, depth, self.__score_to_table(best_score, ply), flag, best_move_code)
+
+        return best_score
+
+    def __search_root(self, depth, root_move_codes):
+
+        """Searches every root move to depth and returns a tuple (best score, best move code)"""
+
+        alpha = -AlphaBetaSearch.WIN_SCORE - 1
+        beta = AlphaBetaSearch.WIN_SCORE + 1
+
+        best_score = None
+        best_move_code = None
+
+        for move_code in root_move_codes:
+            self.__board.make_move_code(move_code)
+            score = -self.__negamax(depth - 1, -beta, -alpha, 1, 1 - self.__root_side)
+            self.__board.unmake_move_code(move_code)
+
+            if best_score == None or score > best_score:
+                best_score = score
+                best_move_code = move_code
+
+            alpha = max(alpha, score)
+
+        return best_score, best_move_code
+
+    def run_search(self, stop_event=None, progress_callback=None):
+
+        """Runs the iterative deepening search until the time for the move has passed, the maximum depth or number of
+        positions has been searched, a forced win or loss has been found or stop_event (a threading.Event) is set. If
+        progress_callback is given it is called every PROGRESS_INTERVAL seconds and when the search ends with the number of
+        positions searched, the time elapsed and the best move so far."""
+
+        self.__start_time = time.time()
+        self.__last_progress_time = self.__start_time
+        self.__stop_event = stop_event
+        self.__progress_callback = progress_callback
+
+        root_colour = self.__colours[self.__root_side]
+        root_move_codes = self.__order_moves(self.__board.get_player_move_codes(root_colour), self.__root_side, 0, None)
+
+        for depth in range(1, self.__max_depth + 1):
+
+            if len(root_move_codes) == 0:
+                break
+
+            try:
+                best_score, best_move_code = self.__search_root(depth, root_move_codes)
+
+            except SearchStoppedError:
+                # moves made by the stopped search are still on the working board
+                self.__board = BitBoard(self.__root_game_state_string)
+                break
+
+            self.__best_score = best_score
+            self.__best_move_code = best_move_code
+            self.__completed_depth = depth
+
+            # the next search starts with the best move from this one
+            root_move_codes.remove(best_move_code)
+            root_move_codes.insert(0, best_move_code)
+
+            # searching deeper cannot change a forced win or loss
+            if abs(best_score) > AlphaBetaSearch.WIN_SCORE - AlphaBetaSearch.DEFAULT_MAX_DEPTH * 2:
+                break
+
+        if progress_callback != None:
+            progress_callback(self.__num_nodes, time.time() - self.__start_time, self.get_best_move())
+
+    def get_best_move(self):
+
+        """Returns the best move (Move object) found by the deepest search that has finished, or None if no search has finished"""
+
+        if self.__best_move_code == None:
+            return None
+
+        return self.__board.move_code_to_move(self.__best_move_code, self.__colours[self.__root_side])
+
+    def get_next_move(self, stop_event=None, progress_callback=None):
+
+        """Public method that runs the search and returns the best move to make"""
+
+        self.run_search(stop_event, progress_callback)
+
+        return self.get_best_move()
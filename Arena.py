@@ -0,0 +1,541 @@
+from MultiClassBoardAttributes import MultiClassBoardAttributes
+from Player import Player, AIPlayer, MCTSAIPlayer, HardAIPlayer, ExpertAIPlayer
+from Game import Game
+from Board import Board
+from BitBoard import BitBoard
+from DrawRule import DrawRule
+import multiprocessing
+import itertools
+import argparse
+import random
+import json
+import math
+import time
+import os
+
+class Arena:
+
+    """Plays AI players (engines) against each other without a user interface and reports how strong they are. Every pair
+    of engines plays games_per_pair games: each game starts from a random opening (a few random moves from the starting
+    position) and every opening is played twice with the engines swapping sides, so neither engine gets the better side
+    of an opening or the first move more often. Games are played in parallel, one game per worker process at a time, and
+    each result is written to a JSON lines file as soon as the game ends so a long run can be stopped at any time.
+
+    The report has a rating for each engine (Elo, fitted to every game with the Bradley-Terry model) and a table of the
+    results of each pair (wins, draws, losses, score and the Elo difference they show), both with 95% confidence intervals.
+
+    The AI players always play as player 2, so an engine playing as player 1 is shown the board rotated by 180 degrees with
+    the players' colours swapped (the board's loops are unchanged by the rotation, so this is the same position from
+    player 2's side) and its move is rotated back before it is made.
+
+    Engines search for a fixed time per move (--time) or with a fixed budget that does not depend on the machine's speed:
+    a number of MCTS iterations (--iterations) for the Medium and Hard AIs and a number of positions (--nodes) for the
+    Expert AI. Without --time every searching engine in the tournament must be given a fixed budget, so that the ratings
+    compare the engines rather than the time each one happens to be given.
+
+    A tournament is run by running this file:
+
+        python Arena.py --engines "Easy AI" "Medium AI" "Expert AI" --games 100 --iterations 2000 --nodes 200000
+
+    ####################################################################
+    CLASS A SKILL: Parallel computing (multiprocessing)
+    CLASS A SKILL: Writing to and reading from files (JSON)
+    CLASS A SKILL: Complex mathematical model (Bradley-Terry ratings)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_GAMES_PER_PAIR = 10
+    DEFAULT_OPENING_PLIES = 4
+    DEFAULT_OUTPUT_PATH = "ArenaResults.jsonl"
+
+    # a game longer than this is ended as a draw (the DrawRule normally ends games that are going nowhere much sooner)
+    MAX_GAME_PLIES = 1000
+
+    # z value of a 95% confidence interval
+    CONFIDENCE_Z = 1.96
+
+    # Elo points per factor of 10 in the odds of winning
+    ELO_SCALE = 400
+
+    # iterations of the Bradley-Terry rating fit and the change in every rating (Elo) below which it stops early
+    RATING_FIT_ITERATIONS = 10000
+    RATING_FIT_TOLERANCE = 1e-6
+
+    PLAYER_1_WIN_SCORE = 1
+    DRAW_SCORE = 0.5
+    PLAYER_2_WIN_SCORE = 0
+
+    def __init__(self, engine_names, games_per_pair=DEFAULT_GAMES_PER_PAIR, time_for_move=None, max_iterations=None, max_nodes=None,
+                 opening_plies=DEFAULT_OPENING_PLIES, num_workers=None, seed=0, output_path=DEFAULT_OUTPUT_PATH):
+
+        for engine_name in engine_names:
+            if engine_name not in Game.AI_NAME_TO_CLASS_MAP:
+                raise ValueError(f"Unknown engine {engine_name}, the engines are {', '.join(Game.AI_NAME_TO_CLASS_MAP)}")
+
+        if len(set(engine_names)) < 2:
+            raise ValueError("At least two different engines are needed")
+
+        # with a fixed budget and no time limit, an engine without a budget of its own would search for its own (much longer) time
+        if time_for_move == None and (max_iterations != None or max_nodes != None):
+            for engine_name in engine_names:
+                engine_class = Game.AI_NAME_TO_CLASS_MAP[engine_name]
+
+                if issubclass(engine_class, MCTSAIPlayer) and max_iterations == None:
+                    raise ValueError(f"{engine_name} needs a number of iterations (or a time) to match the other engines' budget")
+
+                if issubclass(engine_class, ExpertAIPlayer) and max_nodes == None:
+                    raise ValueError(f"{engine_name} needs a number of nodes (or a time) to match the other engines' budget")
+
+        self.__engine_names = list(dict.fromkeys(engine_names))
+        self.__games_per_pair = games_per_pair
+        self.__time_for_move = time_for_move
+        self.__max_iterations = max_iterations
+        self.__max_nodes = max_nodes
+        self.__opening_plies = opening_plies
+        self.__num_workers = num_workers if num_workers != None else (os.cpu_count() or 1)
+        self.__seed = seed
+        self.__output_path = output_path
+
+    def get_engine_names(self):
+        return self.__engine_names
+
+    @staticmethod
+    def flip_game_state_string(game_state_string):
+
+        """Returns the game state string of the board rotated by 180 degrees with the players' colours swapped"""
+
+        swapped_colours = {MultiClassBoardAttributes.player_1_colour: MultiClassBoardAttributes.player_2_colour,
+                           MultiClassBoardAttributes.player_2_colour: MultiClassBoardAttributes.player_1_colour}
+
+        game_state_lst = game_state_string.split(Board.SAVED_GAME_STATE_SEPARATOR)
+
+        return Board.SAVED_GAME_STATE_SEPARATOR.join(swapped_colours.get(square, square) for square in reversed(game_state_lst))
+
+    @staticmethod
+    def flip_cords(cords):
+
+        """Returns the coordinates of the square cords is moved to when the board is rotated by 180 degrees"""
+
+        return (MultiClassBoardAttributes.MAX_ROW_INDEX - cords[0], MultiClassBoardAttributes.MAX_ROW_INDEX - cords[1])
+
+    @staticmethod
+    def configure_engines(time_for_move, max_iterations, max_nodes):
+
+        """Sets the search budget of every engine (None keeps the engine's own setting). An engine given a number of
+        iterations or nodes without a time searches with no time limit. Called in each worker process before its first game.
+        Engines do not use the search cache, so every move of every game is searched, and the Hard AI searches on one
+        process because worker processes cannot start processes of their own."""
+
+        for engine_class in Game.AI_NAME_TO_CLASS_MAP.values():
+            if time_for_move != None:
+                engine_class.TIME_FOR_MOVE = time_for_move
+
+            if issubclass(engine_class, MCTSAIPlayer) and max_iterations != None:
+                engine_class.MAX_ITERATIONS = max_iterations
+
+                if time_for_move == None:
+                    engine_class.TIME_FOR_MOVE = None
+
+            if issubclass(engine_class, ExpertAIPlayer) and max_nodes != None:
+                engine_class.MAX_SEARCH_NODES = max_nodes
+
+                if time_for_move == None:
+                    engine_class.TIME_FOR_MOVE = None
+
+        AIPlayer.USE_SEARCH_CACHE = False
+        HardAIPlayer.NUM_SEARCH_WORKERS = 1
+
+    @staticmethod
+    def make_opening(opening_plies, opening_seed):
+
+        """Returns the game state string after opening_plies random moves from the starting position (player 1 moving
+        first) and the number of moves that were made. The opening ends early if a player cannot move or has no pieces."""
+
+        opening_random = random.Random(opening_seed)
+        bit_board = BitBoard()
+
+        # the random move generator uses the random module, so its state is kept aside while the opening is made
+        saved_random_state = random.getstate()
+        random.setstate(opening_random.getstate())
+
+        num_moves = 0
+
+        for ply in range(opening_plies):
+            player_number = 1 if ply % 2 == 0 else 2
+            colour = MultiClassBoardAttributes.player_1_colour if player_number == 1 else MultiClassBoardAttributes.player_2_colour
+
+            move_code = bit_board.get_single_random_move_code(colour)
+
+            if move_code == None:
+                break
+
+            bit_board.make_move_code(move_code)
+            num_moves += 1
+
+            if bit_board.get_piece_count(1) == 0 or bit_board.get_piece_count(2) == 0:
+                break
+
+        random.setstate(saved_random_state)
+
+        return bit_board.get_game_state_string(), num_moves
+
+    @staticmethod
+    def play_game(game_args):
+
+        """Plays one game and returns its result as a dictionary. Called in a worker process, so the search budget is
+        passed in with the game's arguments and set by configure_engines."""
+
+        (game_index, player_1_engine, player_2_engine, opening_seed, opening_plies, seed, player_1_colour, player_2_colour,
+         time_for_move, max_iterations, max_nodes) = game_args
+
+        MultiClassBoardAttributes.set_player_colours(player_1_colour, player_2_colour)
+
+        Arena.configure_engines(time_for_move, max_iterations, max_nodes)
+
+        game_state_string, num_opening_moves = Arena.make_opening(opening_plies, opening_seed)
+        board = BitBoard(game_state_string)
+
+        random.seed(seed)
+
+        game = Game(player_1_engine, player_2_engine, game_state_string=game_state_string, player2_starts=num_opening_moves % 2 == 1,
+                    player1_num_pieces=board.get_piece_count(1), player2_num_pieces=board.get_piece_count(2), draw_rule=DrawRule())
+
+        # both engines play as player 2 (see flip_game_state_string)
+        engines = {player_number: Game.AI_NAME_TO_CLASS_MAP[engine_name](player_2_colour, game.get_player_piece_count(player_number))
+                   for player_number, engine_name in ((1, player_1_engine), (2, player_2_engine))}
+
+        thinking_times = {1: 0.0, 2: 0.0}
+        num_plies = 0
+
+        # number of the player who could not move when it was their turn (None if the game ended normally)
+        blocked_player_number = None
+
+        game.set_game_status()
+
+        while not game.is_game_over() and num_plies < Arena.MAX_GAME_PLIES:
+            player_number = 1 if game.get_current_player_colour() == player_1_colour else 2
+            game_state_string = game.get_game_state_string()
+
+            # a player whose pieces are all blocked has no move to make, so the engine is not asked for one
+            if len(BitBoard(game_state_string).get_player_move_codes(game.get_current_player_colour())) == 0:
+                blocked_player_number = player_number
+                break
+
+            # the engine's own Player objects are used for its side of the board
+            if player_number == 1:
+                engine_board = Board(Player("", player_1_colour, game.get_player_piece_count(2)), Player("", player_2_colour, game.get_player_piece_count(1)),
+                                     Arena.flip_game_state_string(game_state_string))
+            else:
+                engine_board = Board(Player("", player_1_colour, game.get_player_piece_count(1)), Player("", player_2_colour, game.get_player_piece_count(2)),
+                                     game_state_string)
+
+            start_time = time.perf_counter()
+            move = engines[player_number].get_move(engine_board)
+            thinking_times[player_number] += time.perf_counter() - start_time
+
+            if move == None:
+                blocked_player_number = player_number
+                break
+
+            start_cords = move.get_start_cords()
+            end_cords = move.get_end_cords()
+
+            if player_number == 1:
+                start_cords = Arena.flip_cords(start_cords)
+                end_cords = Arena.flip_cords(end_cords)
+
+            board_state = game.get_board_state()
+            start_loc = board_state[start_cords[0]][start_cords[1]]
+            end_loc = board_state[end_cords[0]][end_cords[1]]
+
+            if not game.is_legal_move(start_loc, end_loc, move.get_move_type()):
+                raise ValueError(f"{game.get_player_name(player_number)} made an illegal move from {start_cords} to {end_cords} in game {game_index}")
+
+            game.make_and_return_move(start_loc, end_loc, move.get_move_type())
+            game.switch_current_player()
+            game.set_game_status()
+
+            num_plies += 1
+
+        # a game where a player cannot move is recorded as a draw, like other games that neither player can win
+        if blocked_player_number != None:
+            winner = None
+            draw_reason = f"{game.get_player_name(blocked_player_number)} (player {blocked_player_number}) had no legal moves"
+
+        elif game.is_game_over():
+            winner = game.get_winning_player()
+            draw_reason = game.get_draw_reason()
+
+        else:
+            winner = None
+            draw_reason = f"the game reached {Arena.MAX_GAME_PLIES} moves"
+
+        if winner == None:
+            score = Arena.DRAW_SCORE
+        elif winner.get_piece_colour() == player_1_colour:
+            score = Arena.PLAYER_1_WIN_SCORE
+        else:
+            score = Arena.PLAYER_2_WIN_SCORE
+
+        return {
+            "game_index": game_index,
+            "player_1": player_1_engine,
+            "player_2": player_2_engine,
+            "opening_seed": opening_seed,
+            "seed": seed,
+            "score": score,
+            "plies": num_opening_moves + num_plies,
+            "draw_reason": draw_reason,
+            "player_1_thinking_time": thinking_times[1],
+            "player_2_thinking_time": thinking_times[2],
+        }
+
+    def get_schedule(self):
+
+        """Returns the arguments of every game in the tournament. Each pair of engines plays each of its openings twice,
+        once with each engine as player 1. The games of different pairs are interleaved so a stopped run still covers
+        every pair."""
+
+        pair_games = []
+
+        for pair_index, (engine_a, engine_b) in enumerate(itertools.combinations(self.__engine_names, 2)):
+            games = []
+
+            for game_number in range(self.__games_per_pair):
+                opening_seed = self.__seed * 1000003 + pair_index * 10007 + game_number // 2
+
+                if game_number % 2 == 0:
+                    games.append((engine_a, engine_b, opening_seed))
+                else:
+                    games.append((engine_b, engine_a, opening_seed))
+
+            pair_games.append(games)
+
+        schedule = []
+
+        for round_games in itertools.zip_longest(*pair_games):
+            for game in round_games:
+                if game != None:
+                    player_1_engine, player_2_engine, opening_seed = game
+                    game_index = len(schedule)
+
+                    schedule.append((game_index, player_1_engine, player_2_engine, opening_seed, self.__opening_plies, self.__seed + game_index,
+                                     MultiClassBoardAttributes.player_1_colour, MultiClassBoardAttributes.player_2_colour,
+                                     self.__time_for_move, self.__max_iterations, self.__max_nodes))
+
+        return schedule
+
+    def run(self):
+
+        """Plays every game of the tournament, writing each result to the output file as it finishes and printing
+        progress. Returns the list of results."""
+
+        schedule = self.get_schedule()
+        results = []
+
+        with open(self.__output_path, "w") as file, multiprocessing.Pool(self.__num_workers) as pool:
+            for result in pool.imap_unordered(Arena.play_game, schedule):
+                file.write(json.dumps(result) + "\n")
+                file.flush()
+
+                results.append(result)
+
+                print(f"game {len(results)}/{len(schedule)}: {result['player_1']} vs {result['player_2']}: {Arena.format_result(result)} in {result['plies']} moves")
+
+        return results
+
+    @staticmethod
+    def format_result(result):
+        if result["score"] == Arena.PLAYER_1_WIN_SCORE:
+            return "1-0"
+
+        if result["score"] == Arena.PLAYER_2_WIN_SCORE:
+            return "0-1"
+
+        return "draw"
+
+    @staticmethod
+    def load_results(path):
+
+        """Returns the results stored in a results file written by run (a line cut short by a stopped run is skipped)"""
+
+        results = []
+
+        with open(path, "r") as file:
+            for line in file:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        return results
+
+    @staticmethod
+    def score_to_elo(score):
+
+        """Returns the Elo difference that gives an expected score of score (infinite for a score of 0 or 1)"""
+
+        if score <= 0:
+            return -math.inf
+
+        if score >= 1:
+            return math.inf
+
+        return -Arena.ELO_SCALE * math.log10(1 / score - 1)
+
+    @staticmethod
+    def get_score_interval(scores):
+
+        """Returns a tuple (mean score, lower bound, upper bound) of the 95% confidence interval of the mean of a list of
+        game scores (1, 0.5 or 0). The Wilson score interval is used so an engine that won or lost every game still gets a
+        useful interval (a draw is treated as half a win, which makes the interval slightly wider when there are draws)."""
+
+        num_games = len(scores)
+        mean = sum(scores) / num_games
+        z_squared = Arena.CONFIDENCE_Z ** 2
+
+        centre = (mean + z_squared / (2 * num_games)) / (1 + z_squared / num_games)
+        margin = Arena.CONFIDENCE_Z * math.sqrt(mean * (1 - mean) / num_games + z_squared / (4 * num_games ** 2)) / (1 + z_squared / num_games)
+
+        return mean, max(0, centre - margin), min(1, centre + margin)
+
+    @staticmethod
+    def get_engine_scores(results):
+
+        """Returns a dictionary mapping each (engine, opponent) pair to the list of the engine's scores against the opponent"""
+
+        engine_scores = {}
+
+        for result in results:
+            player_1_score = result["score"]
+
+            engine_scores.setdefault((result["player_1"], result["player_2"]), []).append(player_1_score)
+            engine_scores.setdefault((result["player_2"], result["player_1"]), []).append(1 - player_1_score)
+
+        return engine_scores
+
+    @staticmethod
+    def fit_ratings(results):
+
+        """Returns a dictionary mapping each engine to a tuple (Elo rating, margin of its 95% confidence interval). The
+        ratings are fitted with the Bradley-Terry model (a draw counts as half a win for each engine) by minorisation-
+        maximisation and shifted so their mean is 0. One extra draw is added between each pair of engines that played, so
+        an engine that won or lost every game still gets a finite rating."""
+
+        engine_scores = Arena.get_engine_scores(results)
+        engine_names = sorted({engine for engine, opponent in engine_scores})
+
+        # games and total score of each engine against each opponent, including the extra draw
+        num_games = {pair: len(scores) + 1 for pair, scores in engine_scores.items()}
+        total_scores = {pair: sum(scores) + Arena.DRAW_SCORE for pair, scores in engine_scores.items()}
+
+        strengths = {engine: 1.0 for engine in engine_names}
+
+        for iteration in range(Arena.RATING_FIT_ITERATIONS):
+            new_strengths = {}
+
+            for engine in engine_names:
+                wins = sum(total_scores[(engine, opponent)] for opponent in engine_names if (engine, opponent) in num_games)
+                denominator = sum(num_games[(engine, opponent)] / (strengths[engine] + strengths[opponent]) for opponent in engine_names if (engine, opponent) in num_games)
+                new_strengths[engine] = wins / denominator
+
+            # strengths are scaled so their geometric mean is 1 (a rating mean of 0)
+            log_mean = sum(math.log(strength) for strength in new_strengths.values()) / len(new_strengths)
+            new_strengths = {engine: strength / math.exp(log_mean) for engine, strength in new_strengths.items()}
+
+            change = max(abs(math.log(new_strengths[engine] / strengths[engine])) for engine in engine_names)
+            strengths = new_strengths
+
+            if change * Arena.ELO_SCALE / math.log(10) < Arena.RATING_FIT_TOLERANCE:
+                break
+
+        ratings = {}
+
+        for engine in engine_names:
+            # the variance of a rating is the inverse of the Fisher information of the engine's games
+            information = 0
+
+            for opponent in engine_names:
+                if (engine, opponent) in num_games:
+                    expected_score = strengths[engine] / (strengths[engine] + strengths[opponent])
+                    information += num_games[(engine, opponent)] * expected_score * (1 - expected_score)
+
+            elo = Arena.ELO_SCALE * math.log10(strengths[engine])
+            margin = Arena.CONFIDENCE_Z * Arena.ELO_SCALE / math.log(10) / math.sqrt(information)
+
+            ratings[engine] = (elo, margin)
+
+        return ratings
+
+    @staticmethod
+    def format_elo(elo):
+        if math.isinf(elo):
+            return "+inf" if elo > 0 else "-inf"
+
+        return f"{elo:+.0f}"
+
+    @staticmethod
+    def get_report(results):
+
+        """Returns the text of the ratings table and the pairwise results table of a list of results"""
+
+        if len(results) == 0:
+            return "No games have been played"
+
+        engine_scores = Arena.get_engine_scores(results)
+        ratings = Arena.fit_ratings(results)
+
+        lines = ["Ratings (Elo, mean 0, 95% confidence interval)", ""]
+        lines.append(f"{'Engine':<10} {'Elo':>6} {'95% CI':>8} {'Games':>6} {'Score':>7} {'Win %':>6} {'Draw %':>7}")
+
+        for engine, (elo, margin) in sorted(ratings.items(), key=lambda item: -item[1][0]):
+            scores = [score for (scored_engine, opponent), pair_scores in engine_scores.items() if scored_engine == engine for score in pair_scores]
+            win_rate = 100 * scores.count(1) / len(scores)
+            draw_rate = 100 * scores.count(Arena.DRAW_SCORE) / len(scores)
+
+            lines.append(f"{engine:<10} {Arena.format_elo(elo):>6} {'±' + format(margin, '.0f'):>8} {len(scores):>6} {sum(scores) / len(scores):>7.3f} {win_rate:>6.1f} {draw_rate:>7.1f}")
+
+        lines += ["", "Pairs (from the first engine's side)", ""]
+        lines.append(f"{'Engine':<10} {'Opponent':<10} {'Games':>6} {'W':>5} {'D':>5} {'L':>5} {'Score':>7} {'Elo diff':>9} {'95% CI':>14}")
+
+        for (engine, opponent), scores in sorted(engine_scores.items()):
+            if engine > opponent:
+                continue
+
+            mean, low, high = Arena.get_score_interval(scores)
+            interval = f"[{Arena.format_elo(Arena.score_to_elo(low))}, {Arena.format_elo(Arena.score_to_elo(high))}]"
+
+            lines.append(f"{engine:<10} {opponent:<10} {len(scores):>6} {scores.count(1):>5} {scores.count(Arena.DRAW_SCORE):>5} {scores.count(0):>5} "
+                         f"{mean:>7.3f} {Arena.format_elo(Arena.score_to_elo(mean)):>9} {interval:>14}")
+
+        player_1_scores = [result["score"] for result in results]
+        draws = [result for result in results if result["score"] == Arena.DRAW_SCORE]
+
+        lines += ["", f"{len(results)} games, player 1 score {sum(player_1_scores) / len(player_1_scores):.3f}, {len(draws)} draws, "
+                      f"{sum(result['plies'] for result in results) / len(results):.1f} moves per game on average"]
+
+        return "\n".join(lines)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Plays the AI players against each other and reports their ratings")
+    parser.add_argument("--engines", nargs="+", default=list(Game.AI_NAME_TO_CLASS_MAP), help="AI players to play against each other")
+    parser.add_argument("--games", type=int, default=Arena.DEFAULT_GAMES_PER_PAIR, help="number of games each pair of engines plays (half with each engine as player 1)")
+    parser.add_argument("--time", type=float, default=None, help="seconds each engine searches per move (default: each engine's own time)")
+    parser.add_argument("--iterations", type=int, default=None, help="MCTS iterations per move of the Medium and Hard AIs (default: no limit)")
+    parser.add_argument("--nodes", type=int, default=None, help="positions searched per move by the Expert AI (default: no limit)")
+    parser.add_argument("--opening-plies", type=int, default=Arena.DEFAULT_OPENING_PLIES, help="number of random moves each game starts with")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per CPU core)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the openings and the engines' random choices")
+    parser.add_argument("--output", default=Arena.DEFAULT_OUTPUT_PATH, help="file the results are written to (one JSON object per line)")
+    parser.add_argument("--report", default=None, help="print the report of an existing results file instead of playing games")
+    args = parser.parse_args()
+
+    if args.report != None:
+        print(Arena.get_report(Arena.load_results(args.report)))
+
+    else:
+        arena = Arena(args.engines, args.games, args.time, args.iterations, args.nodes, args.opening_plies, args.workers, args.seed, args.output)
+        print(Arena.get_report(arena.run()))
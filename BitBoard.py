@@ -0,0 +1,453 @@
+from Board import Board
+from BoardGeometry import BoardGeometry
+from Zobrist import Zobrist
+from Move import Move
+from MultiClassBoardAttributes import MultiClassBoardAttributes
+import random
+
+class BitBoard:
+
+    """An alternative representation of the board used by the AI. The pieces of each player are stored as a 36 bit integer
+    where bit (row * 6) + column is set if the player has a piece at (row, column). Making and unmaking a move only takes a
+    few bitwise operations instead of updating GridLocation objects on the board and on both LoopedTrack objects.
+
+    BitBoard exposes the same public methods that the Game class, the GameTree class and the AI players use on a Board object
+    (get_player_legal_moves, get_single_random_legal_move, move_piece, undo_move, get_piece_count and get_game_state_string).
+    Move objects made by a BitBoard are created with Move.from_cords so they only store coordinates and colours.
+
+    ####################################################################
+    CLASS A SKILL: Bitboard representation of the game state
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    BOARD_WIDTH = BoardGeometry.BOARD_WIDTH
+    NUM_SQUARES = BoardGeometry.NUM_SQUARES
+
+    # player 2 pieces start on rows 0 and 1 (squares 0-11), player 1 pieces start on rows 4 and 5 (squares 24-35)
+    PLAYER_2_START_MASK = (1 << (2 * BOARD_WIDTH)) - 1
+    PLAYER_1_START_MASK = PLAYER_2_START_MASK << (4 * BOARD_WIDTH)
+
+    # tables shared with the other board classes
+    SQUARE_CORDS = BoardGeometry.SQUARE_CORDS
+    NEIGHBOUR_SQUARES = BoardGeometry.NEIGHBOUR_SQUARES
+    NEIGHBOUR_MASKS = BoardGeometry.NEIGHBOUR_MASKS
+    CAPTURE_PATHS = BoardGeometry.CAPTURE_PATHS
+
+    # a move code is an integer storing a move in 13 bits: bits 0-5 are the start square, bits 6-11 are the end square and
+    # bit 12 is set if the move is a capture. The AI's search stores move codes instead of Move objects.
+    MOVE_CODE_SQUARE_BITS = 6
+    MOVE_CODE_SQUARE_MASK = (1 << MOVE_CODE_SQUARE_BITS) - 1
+    MOVE_CODE_CAPTURE_FLAG = 1 << (2 * MOVE_CODE_SQUARE_BITS)
+
+    def __init__(self, game_state_string=None):
+
+        # occupancy masks for player 1 and player 2 (index 0 is player 1, index 1 is player 2)
+        self.__masks = [self.PLAYER_1_START_MASK, self.PLAYER_2_START_MASK]
+
+        if game_state_string:
+            self.__load_game_state(game_state_string)
+
+        # Zobrist hash of the position, updated incrementally by make_move and unmake_move
+        self.__hash = Zobrist.hash_masks(self.__masks[0], self.__masks[1])
+
+    @staticmethod
+    def cords_to_square(cords):
+
+        """Returns the square index (0-35) of the coordinates (row, column)"""
+
+        return BoardGeometry.cords_to_square(cords)
+
+    @staticmethod
+    def from_masks(player1_mask, player2_mask):
+
+        """Returns a BitBoard with the occupancy masks of player 1 and player 2 passed in as arguments. Used to make positions
+        that are not loaded from a game state string (see Tablebase)."""
+
+        bit_board = BitBoard()
+        bit_board.__masks = [player1_mask, player2_mask]
+        bit_board.__hash = Zobrist.hash_masks(player1_mask, player2_mask)
+
+        return bit_board
+
+    def __load_game_state(self, game_state_string):
+
+        """Sets the occupancy masks to match the game_state_string passed in as an argument. The string is in the format
+        made by Board.get_game_state_string"""
+
+        self.__masks = [0, 0]
+
+        for square, colour in enumerate(game_state_string.split(Board.SAVED_GAME_STATE_SEPARATOR)):
+
+            if colour == Board.SAVED_GAME_STATE_EMPTY_CHAR:
+                continue
+
+            self.__masks[self.__get_side(colour)] |= 1 << square
+
+    @staticmethod
+    def __get_side(colour):
+
+        """Returns the index into the occupancy masks for the player with the colour passed in as an argument"""
+
+        if colour == MultiClassBoardAttributes.player_1_colour:
+            return 0
+
+        return 1
+
+    @staticmethod
+    def __get_colour(side):
+
+        """Returns the piece colour of the player with the occupancy mask index passed in as an argument"""
+
+        if side == 0:
+            return MultiClassBoardAttributes.player_1_colour
+
+        return MultiClassBoardAttributes.player_2_colour
+
+    @staticmethod
+    def __get_squares(mask):
+
+        """Returns a list of the square indexes of the set bits in mask in ascending order"""
+
+        squares = []
+
+        while mask:
+            lowest_bit = mask & -mask
+            squares.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+
+        return squares
+
+    def get_masks(self):
+
+        """Returns a tuple of the occupancy masks for player 1 and player 2"""
+
+        return tuple(self.__masks)
+
+    def get_hash(self):
+
+        """Returns the 64 bit Zobrist hash of the current position. BitBoard and Board give the same hash for the same position."""
+
+        return self.__hash
+
+    def get_square_colour(self, square):
+
+        """Returns the colour of the piece on square or None if the square is empty"""
+
+        bit = 1 << square
+
+        if self.__masks[0] & bit:
+            return MultiClassBoardAttributes.player_1_colour
+
+        elif self.__masks[1] & bit:
+            return MultiClassBoardAttributes.player_2_colour
+
+        return None
+
+    def get_capture_mask(self, square):
+
+        """Returns a mask of the squares holding opponent pieces that the piece on square can capture"""
+
+        if self.__masks[0] & (1 << square):
+            opponent_mask = self.__masks[1]
+        else:
+            opponent_mask = self.__masks[0]
+
+        occupied = self.__masks[0] | self.__masks[1]
+        capture_mask = 0
+
+        for path in self.CAPTURE_PATHS[square]:
+            for bit, loop_used in path:
+
+                # the first occupied square in a direction ends the walk. It can only be captured if it is an opponent's piece
+                # and a board loop has been traversed to reach it
+                if bit & occupied:
+                    if loop_used and bit & opponent_mask:
+                        capture_mask |= bit
+                    break
+
+        return capture_mask
+
+    def make_move(self, start_square, end_square, is_capture):
+
+        """Moves the piece on start_square to end_square, removing the opponent's piece on end_square if is_capture is True"""
+
+        start_bit = 1 << start_square
+        end_bit = 1 << end_square
+
+        side = 0 if self.__masks[0] & start_bit else 1
+
+        self.__masks[side] ^= start_bit | end_bit
+        self.__hash ^= Zobrist.PIECE_KEYS[side][start_square] ^ Zobrist.PIECE_KEYS[side][end_square]
+
+        if is_capture:
+            self.__masks[1 - side] ^= end_bit
+            self.__hash ^= Zobrist.PIECE_KEYS[1 - side][end_square]
+
+    def unmake_move(self, start_square, end_square, is_capture):
+
+        """Reverses make_move called with the same arguments"""
+
+        start_bit = 1 << start_square
+        end_bit = 1 << end_square
+
+        side = 0 if self.__masks[0] & end_bit else 1
+
+        self.__masks[side] ^= start_bit | end_bit
+        self.__hash ^= Zobrist.PIECE_KEYS[side][start_square] ^ Zobrist.PIECE_KEYS[side][end_square]
+
+        if is_capture:
+            self.__masks[1 - side] |= end_bit
+            self.__hash ^= Zobrist.PIECE_KEYS[1 - side][end_square]
+
+    @staticmethod
+    def encode_move(start_square, end_square, is_capture):
+
+        """Returns the move code of a move from start_square to end_square"""
+
+        move_code = start_square | (end_square << BitBoard.MOVE_CODE_SQUARE_BITS)
+
+        if is_capture:
+            move_code |= BitBoard.MOVE_CODE_CAPTURE_FLAG
+
+        return move_code
+
+    @staticmethod
+    def decode_move(move_code):
+
+        """Returns a tuple (start square, end square, is capture) of the move stored in move_code"""
+
+        return (move_code & BitBoard.MOVE_CODE_SQUARE_MASK, (move_code >> BitBoard.MOVE_CODE_SQUARE_BITS) & BitBoard.MOVE_CODE_SQUARE_MASK, bool(move_code & BitBoard.MOVE_CODE_CAPTURE_FLAG))
+
+    def make_move_code(self, move_code):
+
+        """Makes the move stored in move_code"""
+
+        self.make_move(*self.decode_move(move_code))
+
+    def unmake_move_code(self, move_code):
+
+        """Undoes the move stored in move_code"""
+
+        self.unmake_move(*self.decode_move(move_code))
+
+    def move_code_to_move(self, move_code, player_colour):
+
+        """Returns a Move object for the move stored in move_code made by the player specified by player_colour"""
+
+        start_square, end_square, is_capture = self.decode_move(move_code)
+
+        if is_capture:
+            return Move.from_cords(self.SQUARE_CORDS[start_square], self.SQUARE_CORDS[end_square], MultiClassBoardAttributes.CAPTURE_MOVE_TYPE,
+                                   player_colour, self.__get_colour(1 - self.__get_side(player_colour)))
+
+        return Move.from_cords(self.SQUARE_CORDS[start_square], self.SQUARE_CORDS[end_square], MultiClassBoardAttributes.NORMAL_MOVE_TYPE, player_colour, None)
+
+    def move_to_move_code(self, move_obj):
+
+        """Returns the move code of the move specified by move_obj"""
+
+        return self.encode_move(self.cords_to_square(move_obj.get_start_cords()), self.cords_to_square(move_obj.get_end_cords()),
+                                move_obj.get_move_type() == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE)
+
+    @staticmethod
+    def move_key_to_move_code(move_key):
+
+        """Returns the move code of the move identified by move_key, a tuple (start cords, end cords, move type) made by GameTree.get_move_key"""
+
+        start_cords, end_cords, move_type = move_key
+
+        return BitBoard.encode_move(BitBoard.cords_to_square(start_cords), BitBoard.cords_to_square(end_cords), move_type == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE)
+
+    def move_piece(self, move_obj):
+
+        """Makes the move specified by move_obj"""
+
+        self.make_move(self.cords_to_square(move_obj.get_start_cords()), self.cords_to_square(move_obj.get_end_cords()), move_obj.get_move_type() == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE)
+
+    def undo_move(self, move_obj):
+
+        """Undoes the move specified by move_obj"""
+
+        self.unmake_move(self.cords_to_square(move_obj.get_start_cords()), self.cords_to_square(move_obj.get_end_cords()), move_obj.get_move_type() == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE)
+
+    def is_legal_move(self, start_loc, end_loc, player, move_type):
+
+        """Returns True if a move from start_loc to end_loc is legal for the player provided as an argument otherwise returns False.
+        Only the coordinates of start_loc and end_loc are used."""
+
+        start_square = self.cords_to_square(start_loc.get_cords())
+        end_square = self.cords_to_square(end_loc.get_cords())
+
+        if self.get_square_colour(start_square) != player.get_piece_colour():
+            return False
+
+        if move_type == MultiClassBoardAttributes.NORMAL_MOVE_TYPE:
+            return end_square in self.NEIGHBOUR_SQUARES[start_square] and self.get_square_colour(end_square) == None
+
+        elif move_type == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
+            return bool(self.get_capture_mask(start_square) & (1 << end_square))
+
+        return False
+
+    def __get_square_legal_moves(self, square, colour, opponent_colour):
+
+        """Returns a list of legal moves (Move objects) that can be made with the piece on square"""
+
+        legal_moves = []
+        occupied = self.__masks[0] | self.__masks[1]
+        start_cords = self.SQUARE_CORDS[square]
+
+        # normal moves to empty adjacent squares
+        for end_square in self.NEIGHBOUR_SQUARES[square]:
+            if not occupied & (1 << end_square):
+                legal_moves.append(Move.from_cords(start_cords, self.SQUARE_CORDS[end_square], MultiClassBoardAttributes.NORMAL_MOVE_TYPE, colour, None))
+
+        # captures
+        for end_square in self.__get_squares(self.get_capture_mask(square)):
+            legal_moves.append(Move.from_cords(start_cords, self.SQUARE_CORDS[end_square], MultiClassBoardAttributes.CAPTURE_MOVE_TYPE, colour, opponent_colour))
+
+        return legal_moves
+
+    def get_player_legal_moves(self, player_colour):
+
+        """Returns a list of legal moves that can be made by the player specified by player_colour"""
+
+        side = self.__get_side(player_colour)
+        opponent_colour = self.__get_colour(1 - side)
+
+        legal_moves = []
+
+        for square in self.__get_squares(self.__masks[side]):
+            legal_moves += self.__get_square_legal_moves(square, player_colour, opponent_colour)
+
+        return legal_moves
+
+    def __get_square_move_codes(self, square):
+
+        """Returns a list of the move codes of the legal moves that can be made with the piece on square"""
+
+        move_codes = []
+        occupied = self.__masks[0] | self.__masks[1]
+
+        # normal moves to empty adjacent squares
+        for end_square in self.NEIGHBOUR_SQUARES[square]:
+            if not occupied & (1 << end_square):
+                move_codes.append(square | (end_square << self.MOVE_CODE_SQUARE_BITS))
+
+        # captures
+        for end_square in self.__get_squares(self.get_capture_mask(square)):
+            move_codes.append(square | (end_square << self.MOVE_CODE_SQUARE_BITS) | self.MOVE_CODE_CAPTURE_FLAG)
+
+        return move_codes
+
+    def get_player_move_codes(self, player_colour):
+
+        """Returns a list of the move codes of the legal moves that can be made by the player specified by player_colour.
+        The moves are in the same order as get_player_legal_moves."""
+
+        move_codes = []
+
+        for square in self.__get_squares(self.__masks[self.__get_side(player_colour)]):
+            move_codes += self.__get_square_move_codes(square)
+
+        return move_codes
+
+    def get_single_random_move_code(self, player_colour):
+
+        """Returns the move code of a single, random legal move that can be made by the player specified by player_colour.
+        A random piece that can move is chosen and then one of its moves is chosen at random (the same distribution as
+        get_single_random_legal_move). Pieces are drawn one at a time instead of shuffling every piece first."""
+
+        squares = self.__get_squares(self.__masks[self.__get_side(player_colour)])
+
+        while len(squares) > 0:
+            index = random.randrange(len(squares))
+            square_move_codes = self.__get_square_move_codes(squares[index])
+
+            if len(square_move_codes) > 0:
+                return random.choice(square_move_codes)
+
+            # the piece cannot move, remove it by swapping it with the last piece
+            squares[index] = squares[-1]
+            squares.pop()
+
+    def get_player_capture_codes(self, player_colour):
+
+        """Returns a list of the move codes of the captures that can be made by the player specified by player_colour"""
+
+        capture_codes = []
+
+        for square in self.__get_squares(self.__masks[self.__get_side(player_colour)]):
+            for end_square in self.__get_squares(self.get_capture_mask(square)):
+                capture_codes.append(square | (end_square << self.MOVE_CODE_SQUARE_BITS) | self.MOVE_CODE_CAPTURE_FLAG)
+
+        return capture_codes
+
+    def get_random_capture_move_code(self, player_colour):
+
+        """Returns the move code of a random capture (chosen uniformly from every capture the player can make) that can
+        be made by the player specified by player_colour, or None if the player cannot capture"""
+
+        capture_codes = self.get_player_capture_codes(player_colour)
+
+        if len(capture_codes) == 0:
+            return None
+
+        return random.choice(capture_codes)
+
+    def get_single_random_legal_move(self, player_colour):
+
+        """Returns a single, random legal move (Move object) that can be made by the player specified by player_colour"""
+
+        side = self.__get_side(player_colour)
+        opponent_colour = self.__get_colour(1 - side)
+
+        squares = self.__get_squares(self.__masks[side])
+        random.shuffle(squares)
+
+        for square in squares:
+            square_legal_moves = self.__get_square_legal_moves(square, player_colour, opponent_colour)
+
+            if len(square_legal_moves) > 0:
+                return random.choice(square_legal_moves)
+
+    def get_mobility_and_attacks(self, player_number):
+
+        """Returns a tuple (number of legal moves, mask of the opponent pieces that can be captured) for the player with the
+        number specified by player_number. Used by Evaluation without building a list of move codes."""
+
+        empty = ~(self.__masks[0] | self.__masks[1])
+        num_moves = 0
+        attack_mask = 0
+
+        for square in self.__get_squares(self.__masks[player_number - 1]):
+            capture_mask = self.get_capture_mask(square)
+
+            num_moves += bin(self.NEIGHBOUR_MASKS[square] & empty).count("1") + bin(capture_mask).count("1")
+            attack_mask |= capture_mask
+
+        return num_moves, attack_mask
+
+    def get_piece_count(self, player_number):
+
+        """Returns the number of pieces the player with the number specified by player_number has on the board"""
+
+        return bin(self.__masks[player_number - 1]).count("1")
+
+    def get_game_state_string(self):
+
+        """Returns a string representation of the current game state in the same format as Board.get_game_state_string"""
+
+        game_state_lst = []
+
+        for square in range(self.NUM_SQUARES):
+            colour = self.get_square_colour(square)
+
+            if colour == None:
+                game_state_lst.append(Board.SAVED_GAME_STATE_EMPTY_CHAR)
+            else:
+                game_state_lst.append(colour)
+
+        return Board.SAVED_GAME_STATE_SEPARATOR.join(game_state_lst)
@@ -1,4 +1,6 @@
 from LoopedTrack import LoopedTrack
+from BoardGeometry import BoardGeometry
+from Zobrist import Zobrist
 from GridLocation import GridLocation
 from MultiClassBoardAttributes import MultiClassBoardAttributes
 from UtilityFunctions import oneD_to_twoD_array, shuffle_2D_array, twoD_to_oneD_array
@@ -18,26 +20,15 @@ class Board:
     
     """
     
-    NUM_BOARD_LOOPS = 4
+    NUM_BOARD_LOOPS = BoardGeometry.NUM_BOARD_LOOPS
 
     # character used to separate pieces in the game state string
     SAVED_GAME_STATE_SEPARATOR = "$"
     SAVED_GAME_STATE_EMPTY_CHAR = "."
 
     # coordinates of locations on the outer and inner tracks
-    OUTER_TRACK_CORDS = [
-        (5,2), (4,2), (3,2), (2,2), (1,2), (0,2),
-        (2,0), (2,1), (2,2), (2,3), (2,4), (2,5),
-        (0,3), (1,3), (2,3), (3,3), (4,3), (5,3),
-        (3,5), (3,4), (3,3), (3,2), (3,1), (3,0),
-    ]
-
-    INNER_TRACK_CORDS = [
-        (4,0), (4,1), (4,2), (4,3), (4,4), (4,5),
-        (5,4), (4,4), (3,4), (2,4), (1,4), (0,4),
-        (1,5), (1,4), (1,3), (1,2), (1,1), (1,0),
-        (0,1), (1,1), (2,1), (3,1), (4,1), (5,1),
-    ]
+    OUTER_TRACK_CORDS = BoardGeometry.OUTER_TRACK_CORDS
+    INNER_TRACK_CORDS = BoardGeometry.INNER_TRACK_CORDS
 
 
     def __init__(self, player1, player2, game_state_string=None):
@@ -117,6 +108,57 @@ class Board:
                 if curr_cords in self.INNER_TRACK_CORDS:
                     self.__inner_track.update_piece(curr_cords, curr_piece_str)
 
+        # seed the Zobrist hash with the loaded position
+        self.__hash = self.__calculate_hash()
+
+    @staticmethod
+    def __get_zobrist_player_index(colour):
+
+        """Returns the index of the player with the piece colour passed in as an argument in Zobrist.PIECE_KEYS"""
+
+        if colour == MultiClassBoardAttributes.player_1_colour:
+            return 0
+
+        return 1
+
+    def __calculate_hash(self):
+
+        """Returns the Zobrist hash of the current board position calculated from every location on the board.
+        Only used when the board is set up, moves update the hash incrementally with __update_hash."""
+
+        position_hash = 0
+
+        for row in self.__board:
+            for loc in row:
+                if not loc.is_empty():
+                    player_index = self.__get_zobrist_player_index(loc.get_piece_colour())
+                    position_hash ^= Zobrist.PIECE_KEYS[player_index][BoardGeometry.cords_to_square(loc.get_cords())]
+
+        return position_hash
+
+    def __update_hash(self, move_obj):
+
+        """Updates the Zobrist hash for the move specified by move_obj. XOR is its own inverse, so the same update
+        is used when making and undoing a move."""
+
+        mover_keys = Zobrist.PIECE_KEYS[self.__get_zobrist_player_index(move_obj.get_start_colour())]
+        start_square = BoardGeometry.cords_to_square(move_obj.get_start_cords())
+        end_square = BoardGeometry.cords_to_square(move_obj.get_end_cords())
+
+        # the moving piece leaves the start location and arrives at the end location
+        self.__hash ^= mover_keys[start_square] ^ mover_keys[end_square]
+
+        # a captured piece is removed from the end location
+        if move_obj.get_move_type() == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
+            self.__hash ^= Zobrist.PIECE_KEYS[self.__get_zobrist_player_index(move_obj.get_end_colour())][end_square]
+
+    def get_hash(self):
+
+        """Returns the 64 bit Zobrist hash of the current board position. Positions with the same pieces on the same
+        locations have the same hash, so it can be used as a dictionary key for the position."""
+
+        return self.__hash
+
     def __get_common_tracks(self, text_track_1, text_track_2):
 
         """Returns a tuple in the form in the form (inner_track, outer_track) containing the common 
@@ -162,6 +204,9 @@ class Board:
         # convert the 1D array into a 6x6 2D array
         self.__board = oneD_to_twoD_array(board, MultiClassBoardAttributes.MAX_ROW_INDEX + 1)
 
+        # Zobrist hash of the starting position
+        self.__hash = self.__calculate_hash()
+
     def __is_valid_coordinate(self, coordinate):
 
         """Returns True if coordinate is a valid coordinate on the board otherwise returns False.
@@ -203,23 +248,8 @@ class Board:
 
         """Returns a list of the GridLocation objects on the board that are adjacent to the loc GridLocation object passed in as an argument"""
 
-        cords = loc.get_cords()
-        adjacent_lst = []
-        
-        # iterating over the 3x3 grid of locations surrounding the loc GridLocation object
-        for i in range(-1, 2):
-            for j in range(-1, 2):
-                
-                # adding (0,0) to the location's coordinates would just give the location itself so we skip it
-                if (i, j) == (0, 0):
-                    continue
-
-                # the coordinates of the adjacent location by adding the two points together
-                adjacent_cord = (cords[0] + i, cords[1] + j)
-                
-                
-                if self.__is_valid_coordinate(adjacent_cord):
-                    adjacent_lst.append(adjacent_cord)
+        # precomputed coordinates of the adjacent locations
+        adjacent_lst = BoardGeometry.ADJACENT_CORDS[loc.get_cords()]
 
         # converting the list of coordinates into a list of GridLocation objects
         return [self.__board[i[0]][i[1]] for i in adjacent_lst]
@@ -256,24 +286,10 @@ class Board:
     
     def __get_looped_track_loc_indexes(self, looped_track, loc):
 
-        """Returns a list of indexes where loc is found in looped_track. looped_track is a LoopedTrack object which
+        """Returns a tuple of indexes where loc is found in looped_track. looped_track is a LoopedTrack object which
         is an implementation of a circular list data structure."""
 
-        ind_lst = []
-    
-        cords = loc.get_cords()
-
-        # start at the beginning of the circular list
-        looped_track.set_pointer(0, "right")
-
-        for i in range(looped_track.get_length()):
-            
-            item = looped_track.get_next_right()
-
-            if item.get_cords() == cords:
-                ind_lst.append(i)
-
-        return ind_lst
+        return looped_track.get_occurrence_indexes(loc.get_cords())
 
     def __either_locations_vacant(self, start_location, end_location):
 
@@ -454,14 +470,8 @@ class Board:
 
         """Returns True if a loop has been used to get from prev_loc to curr_loc. Otherwise it returns False"""
 
-        prev_cords = prev_loc.get_cords()
-        curr_cords = curr_loc.get_cords()
-
-        # a change in x and y cords between adjacent elements in a LoopedTrack object mean a loop has been used
-        if prev_cords[0] != curr_cords[0] and prev_cords[1] != curr_cords[1]:
-            return True
-        
-        return False
+        # pairs of adjacent elements in a LoopedTrack object that are joined by a loop are precomputed
+        return (prev_loc.get_cords(), curr_loc.get_cords()) in BoardGeometry.LOOP_EDGES
         
     def __move_piece_with_undo_arg(self, move_obj, undo=False):
 
@@ -496,6 +506,7 @@ class Board:
             """
     
             self.__move_piece_with_undo_arg(move_obj, undo=False)
+            self.__update_hash(move_obj)
 
     def __update_tracks_after_move(self, move_obj, undo=False):
 
@@ -527,9 +538,20 @@ class Board:
         elif end_colour == MultiClassBoardAttributes.player_2_colour:
             self.__player_tuple[1].remove_piece()
 
+    def __increment_piece_count(self, end_colour):
+
+        """Increments the piece count of the player that has had a captured piece returned by undoing a capture"""
+
+        if end_colour == MultiClassBoardAttributes.player_1_colour:
+            self.__player_tuple[0].add_piece()
+
+        elif end_colour == MultiClassBoardAttributes.player_2_colour:
+            self.__player_tuple[1].add_piece()
+
     def undo_move(self, move_obj):
 
-        """Undoes the move specified by move_obj by making the move in reverse
+        """Undoes the move specified by move_obj by making the move in reverse. A captured piece is returned to its
+        player's piece count so that undo_move exactly reverses move_piece
         
         ####################################################################
         CLASS A SKILL: Undoing a move
@@ -546,9 +568,14 @@ class Board:
             self.__spawn_piece(move_obj.get_start_colour(), move_obj.get_start_loc())
             self.__spawn_piece(move_obj.get_end_colour(), move_obj.get_end_loc())
 
+            # return the captured piece to the piece count of the player it was captured from
+            self.__increment_piece_count(move_obj.get_end_colour())
+
         elif move_obj.get_move_type() == MultiClassBoardAttributes.NORMAL_MOVE_TYPE:
             self.__move_piece_with_undo_arg(move_obj, undo=True)
 
+        self.__update_hash(move_obj)
+
     def __spawn_piece(self, colour, loc):
 
         """spawn a piece on the board at loc with colour specified by colour. Only used by the undo_move method"""
@@ -569,11 +596,8 @@ class Board:
             if self.is_legal_move(loc, end_loc, player, MultiClassBoardAttributes.NORMAL_MOVE_TYPE):
                 legal_moves.append(Move(loc, end_loc, MultiClassBoardAttributes.NORMAL_MOVE_TYPE))
 
-        # get legal captures
-        for row in self.__board:
-            for end_loc in row:
-                if end_loc.get_piece_colour() != player.get_piece_colour() and self.is_legal_move(loc, end_loc, player, MultiClassBoardAttributes.CAPTURE_MOVE_TYPE):
-                    legal_moves.append(Move(loc, end_loc, MultiClassBoardAttributes.CAPTURE_MOVE_TYPE))
+        # get legal captures (only pieces of the player's colour are passed to this method so no colour check is needed)
+        legal_moves += self.__get_loc_captures(loc)
 
         return legal_moves
     
@@ -615,6 +639,29 @@ class Board:
         
         """returns a possible capture with the piece at start_loc if one is available otherwise returns None"""
 
+        captures = self.__get_loc_captures(start_loc, stop_at_first=True)
+
+        if len(captures) > 0:
+            return captures[0]
+
+        return None
+
+    def __get_loc_captures(self, start_loc, stop_at_first=False):
+
+        """Returns a list of every legal capture (Move objects) that can be made with the piece at start_loc.
+        Each occurrence of start_loc in the LoopedTrack objects is walked once in each direction and the capture found
+        at the end of each walk (if any) is added to the list, so no legality checks against specific end locations are needed.
+        If stop_at_first is True, the list contains at most the first capture found.
+        
+        ####################################################################
+        CLASS A SKILL: Circular list data structure traversal
+        ####################################################################
+        
+        """
+
+        # maps the cords of a captured location to the Move object, a location can be reached by more than one walk
+        captures = {}
+
         # get the LoopedTrack objects for the inner and outer tracks that start_loc is on
         track_tuple = self.__get_track_from_text(start_loc.get_track())
 
@@ -626,22 +673,24 @@ class Board:
             starting_indexes = self.__get_looped_track_loc_indexes(track, start_loc)
 
             for start_loc_index in starting_indexes:
+                for direction in ("right", "left"):
 
-                # Move object representing a legal capture if one is found iterating right through the LoopedTrack
-                right_move = self.__search_direction_for_capture(start_loc, start_loc_index, track, "right")
+                    # Move object representing a legal capture if one is found iterating through the LoopedTrack in this direction
+                    move = self.__search_direction_for_capture(start_loc, start_loc_index, track, direction)
 
-                # not checking for the legality of a specific capture
-                if right_move:
-                    return right_move
+                    if move:
+                        end_cords = move.get_end_cords()
 
-                # Move object representing a legal capture if one is found iterating left through the LoopedTrack
-                left_move = self.__search_direction_for_capture(start_loc, start_loc_index, track, "left")
+                        # the walk returns a location from the LoopedTrack so the move is remade with the location on the board
+                        move = Move(start_loc, self.__board[end_cords[0]][end_cords[1]], MultiClassBoardAttributes.CAPTURE_MOVE_TYPE)
 
-                # not checking for the legality of a specific capture
-                if left_move:
-                    return left_move
+                        if stop_at_first:
+                            return [move]
 
-        return None
+                        captures[end_cords] = move
+
+        # captures are returned in the order of their end locations on the board
+        return [captures[cords] for cords in sorted(captures)]
 
     def __get_edge_locations(self):
 
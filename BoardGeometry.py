@@ -0,0 +1,219 @@
+from MultiClassBoardAttributes import MultiClassBoardAttributes
+from types import MappingProxyType
+
+class BoardGeometry:
+
+    """Immutable lookup tables describing the shape of the Surakarta board. The tables never change during a game so
+    they are built once when this module is imported and read by Board, BitBoard, LoopedTrack and GridLocation
+    instead of being recalculated every time they are needed.
+
+    ####################################################################
+    CLASS A SKILL: Precomputed lookup tables (hash tables and tuples)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    BOARD_WIDTH = MultiClassBoardAttributes.MAX_ROW_INDEX + 1
+    NUM_SQUARES = BOARD_WIDTH * BOARD_WIDTH
+    NUM_BOARD_LOOPS = 4
+
+    # coordinates of locations on the outer and inner tracks
+    OUTER_TRACK_CORDS = (
+        (5,2), (4,2), (3,2), (2,2), (1,2), (0,2),
+        (2,0), (2,1), (2,2), (2,3), (2,4), (2,5),
+        (0,3), (1,3), (2,3), (3,3), (4,3), (5,3),
+        (3,5), (3,4), (3,3), (3,2), (3,1), (3,0),
+    )
+
+    INNER_TRACK_CORDS = (
+        (4,0), (4,1), (4,2), (4,3), (4,4), (4,5),
+        (5,4), (4,4), (3,4), (2,4), (1,4), (0,4),
+        (1,5), (1,4), (1,3), (1,2), (1,1), (1,0),
+        (0,1), (1,1), (2,1), (3,1), (4,1), (5,1),
+    )
+
+    """
+    ####################################################################
+    CLASS B SKILL: Dictionary
+    ####################################################################
+    """
+
+    # maps the text representation of each track to the coordinates on that track
+    TRACK_TEXT_TO_CORDS_MAP = MappingProxyType({
+        MultiClassBoardAttributes.INNER_TRACK_STRING: INNER_TRACK_CORDS,
+        MultiClassBoardAttributes.OUTER_TRACK_STRING: OUTER_TRACK_CORDS,
+    })
+
+    @staticmethod
+    def cords_to_square(cords):
+
+        """Returns the square index (0-35) of the coordinates (row, column). Square indexes are used by BitBoard."""
+
+        return cords[0] * BoardGeometry.BOARD_WIDTH + cords[1]
+
+    @staticmethod
+    def __build_square_cords(width):
+
+        """Returns a tuple containing the coordinates (row, column) of every square index"""
+
+        return tuple((square // width, square % width) for square in range(width * width))
+
+    @staticmethod
+    def __build_adjacent_cords(square_cords, width):
+
+        """Returns a read-only dictionary mapping every coordinate to a tuple of the coordinates adjacent to it.
+        Diagonal locations are considered adjacent. Adjacent coordinates are ordered row by row starting above and to the left."""
+
+        adjacent_map = {}
+
+        for row, col in square_cords:
+            adjacent_lst = []
+
+            # iterating over the 3x3 grid of locations surrounding the location
+            for i in range(-1, 2):
+                for j in range(-1, 2):
+
+                    # adding (0,0) to the location's coordinates would just give the location itself so we skip it
+                    if (i, j) == (0, 0):
+                        continue
+
+                    if 0 <= row + i < width and 0 <= col + j < width:
+                        adjacent_lst.append((row + i, col + j))
+
+            adjacent_map[(row, col)] = tuple(adjacent_lst)
+
+        return MappingProxyType(adjacent_map)
+
+    @staticmethod
+    def __build_track_occurrence_indexes(track_text_to_cords_map):
+
+        """Returns a read-only dictionary mapping each track's text representation to a read-only dictionary that maps
+        each coordinate on the track to a tuple of the indexes where it is found in the track"""
+
+        occurrence_map = {}
+
+        for track_text, track_cords in track_text_to_cords_map.items():
+            track_map = {}
+
+            for ind, cords in enumerate(track_cords):
+                track_map[cords] = track_map.get(cords, ()) + (ind,)
+
+            occurrence_map[track_text] = MappingProxyType(track_map)
+
+        return MappingProxyType(occurrence_map)
+
+    @staticmethod
+    def __build_loop_edges(track_text_to_cords_map):
+
+        """Returns a frozenset of (prev_cords, curr_cords) pairs of consecutive track locations that are joined by one of the
+        board loops. Both orders of each pair are included so the set can be used when iterating in either direction."""
+
+        loop_edges = set()
+
+        for track_cords in track_text_to_cords_map.values():
+            for ind, prev_cords in enumerate(track_cords):
+                curr_cords = track_cords[(ind + 1) % len(track_cords)]
+
+                # a change in x and y cords between adjacent elements in a LoopedTrack object mean a loop has been used
+                if prev_cords[0] != curr_cords[0] and prev_cords[1] != curr_cords[1]:
+                    loop_edges.add((prev_cords, curr_cords))
+                    loop_edges.add((curr_cords, prev_cords))
+
+        return frozenset(loop_edges)
+
+    @staticmethod
+    def __build_track_membership(square_cords, track_text_to_cords_map):
+
+        """Returns a read-only dictionary mapping every coordinate to the text representation of the track(s) it sits on
+        (None if the location is not on either track)"""
+
+        membership_map = {}
+
+        for cords in square_cords:
+            on_inner = cords in track_text_to_cords_map[MultiClassBoardAttributes.INNER_TRACK_STRING]
+            on_outer = cords in track_text_to_cords_map[MultiClassBoardAttributes.OUTER_TRACK_STRING]
+
+            if on_inner and on_outer:
+                membership_map[cords] = MultiClassBoardAttributes.BOTH_TRACK_STRING
+
+            elif on_inner:
+                membership_map[cords] = MultiClassBoardAttributes.INNER_TRACK_STRING
+
+            elif on_outer:
+                membership_map[cords] = MultiClassBoardAttributes.OUTER_TRACK_STRING
+
+            else:
+                membership_map[cords] = None
+
+        return MappingProxyType(membership_map)
+
+    @staticmethod
+    def __build_capture_paths(track_text_to_cords_map, loop_edges, width, num_board_loops):
+
+        """Returns a tuple containing, for every square index, a tuple of capture paths. A capture path is the sequence of
+        squares visited walking in one direction along a looped track from one occurrence of the square. Each element
+        of a path is a tuple (square bit, loop used) where loop used is True if at least one board loop has been
+        traversed to reach that square.
+
+        Paths stop before the walk returns to the starting square after traversing every board loop. Other visits to
+        the starting square are left out because the moving piece has vacated it."""
+
+        paths = [[] for _ in range(width * width)]
+
+        # inner track paths come before outer track paths (the same order that Board searches the tracks in)
+        for track_text in (MultiClassBoardAttributes.INNER_TRACK_STRING, MultiClassBoardAttributes.OUTER_TRACK_STRING):
+            track_cords = track_text_to_cords_map[track_text]
+            track_length = len(track_cords)
+
+            for start_index, start_cords in enumerate(track_cords):
+                start_square = start_cords[0] * width + start_cords[1]
+
+                for direction in (1, -1):
+
+                    path = []
+                    loop_count = 0
+                    prev_cords = start_cords
+
+                    for step in range(1, track_length + 1):
+                        cords = track_cords[(start_index + direction * step) % track_length]
+
+                        if (prev_cords, cords) in loop_edges:
+                            loop_count += 1
+
+                        prev_cords = cords
+
+                        if cords == start_cords:
+                            if loop_count == 0 or loop_count == num_board_loops:
+                                break
+                            continue
+
+                        path.append((1 << (cords[0] * width + cords[1]), loop_count > 0))
+
+                    paths[start_square].append(tuple(path))
+
+        return tuple(tuple(i) for i in paths)
+
+    @staticmethod
+    def __build_neighbour_squares(square_cords, adjacent_cords, width):
+
+        """Returns a tuple containing a tuple of adjacent square indexes for every square index"""
+
+        return tuple(tuple(i[0] * width + i[1] for i in adjacent_cords[cords]) for cords in square_cords)
+
+    @staticmethod
+    def __build_neighbour_masks(neighbour_squares):
+
+        """Returns a tuple containing a mask of the adjacent squares for every square index"""
+
+        return tuple(sum(1 << i for i in squares) for squares in neighbour_squares)
+
+    # tables built once when the module is imported
+    SQUARE_CORDS = __build_square_cords(BOARD_WIDTH)
+    ADJACENT_CORDS = __build_adjacent_cords(SQUARE_CORDS, BOARD_WIDTH)
+    TRACK_OCCURRENCE_INDEXES = __build_track_occurrence_indexes(TRACK_TEXT_TO_CORDS_MAP)
+    LOOP_EDGES = __build_loop_edges(TRACK_TEXT_TO_CORDS_MAP)
+    TRACK_MEMBERSHIP = __build_track_membership(SQUARE_CORDS, TRACK_TEXT_TO_CORDS_MAP)
+    NEIGHBOUR_SQUARES = __build_neighbour_squares(SQUARE_CORDS, ADJACENT_CORDS, BOARD_WIDTH)
+    NEIGHBOUR_MASKS = __build_neighbour_masks(NEIGHBOUR_SQUARES)
+    CAPTURE_PATHS = __build_capture_paths(TRACK_TEXT_TO_CORDS_MAP, LOOP_EDGES, BOARD_WIDTH, NUM_BOARD_LOOPS)
@@ -177,7 +177,7 @@ class Database:
         # add a record for each AI difficulty to the AIGameStats table for the new user
         AI_game_stat_id = self.__get_new_primary_key("AIGameStats", "AI_game_stat_id")
     
-        for difficulty in [MultiClassBoardAttributes.EASY_AI_NAME, MultiClassBoardAttributes.MEDIUM_AI_NAME, MultiClassBoardAttributes.HARD_AI_NAME]:
+        for difficulty in [MultiClassBoardAttributes.EASY_AI_NAME, MultiClassBoardAttributes.MEDIUM_AI_NAME, MultiClassBoardAttributes.HARD_AI_NAME, MultiClassBoardAttributes.EXPERT_AI_NAME]:
             self.__cursor.execute("INSERT INTO AIGameStats VALUES (?, ?, ?, ?, ?);", (AI_game_stat_id, user_id, difficulty, 0, 0))
             AI_game_stat_id += 1
 
@@ -263,10 +263,26 @@ class Database:
     
             self.__conn.commit()
     
+    def __add_missing_AI_game_stat(self, username, ai_difficulty):
+
+        """Adds a record to the AIGameStats table for a user and AI difficulty if the user does not have one. Users created
+        before an AI difficulty was added to the game do not have a record for it."""
+
+        user_id = self.__get_user_id_from_username(username)
+
+        self.__cursor.execute("SELECT AI_game_stat_id FROM AIGameStats WHERE AI_difficulty = ? AND user_id = ?;", (ai_difficulty, user_id))
+
+        if self.__cursor.fetchone() == None:
+            AI_game_stat_id = self.__get_new_primary_key("AIGameStats", "AI_game_stat_id")
+            self.__cursor.execute("INSERT INTO AIGameStats VALUES (?, ?, ?, ?, ?);", (AI_game_stat_id, user_id, ai_difficulty, 0, 0))
+            self.__conn.commit()
+
     def update_user_stats(self, username, human_won, ai_difficulty):
         
         """Updates a user's win_count and loss_count for a given AI difficulty depending on whether the user won or lost."""
 
+        self.__add_missing_AI_game_stat(username, ai_difficulty)
+
         if human_won:
             self.__increment_win_stat(username, ai_difficulty)
 
@@ -0,0 +1,41 @@
+class DrawRule:
+
+    """The rule used to end a game that neither player is making progress in as a draw. A game is drawn when the same
+    position (with the same player to move) occurs repetition_limit times, or when no_capture_move_limit moves in a row
+    are made without a capture. Either part of the rule is turned off by passing None.
+
+    Game uses the rule to end drawn games and GameTree uses it to end rollouts that are going nowhere early.
+
+    ####################################################################
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_REPETITION_LIMIT = 3
+    DEFAULT_NO_CAPTURE_MOVE_LIMIT = 100
+
+    def __init__(self, repetition_limit=DEFAULT_REPETITION_LIMIT, no_capture_move_limit=DEFAULT_NO_CAPTURE_MOVE_LIMIT):
+        self.__repetition_limit = repetition_limit
+        self.__no_capture_move_limit = no_capture_move_limit
+
+    def get_repetition_limit(self):
+        return self.__repetition_limit
+
+    def get_no_capture_move_limit(self):
+        return self.__no_capture_move_limit
+
+    def is_repetition_draw(self, repetition_count):
+
+        """Returns True if a position that has occurred repetition_count times is a draw"""
+
+        return self.__repetition_limit != None and repetition_count >= self.__repetition_limit
+
+    def is_no_capture_draw(self, moves_since_capture):
+
+        """Returns True if a game where moves_since_capture moves have been made since the last capture is a draw"""
+
+        return self.__no_capture_move_limit != None and moves_since_capture >= self.__no_capture_move_limit
+
+    def is_draw(self, repetition_count, moves_since_capture):
+        return self.is_repetition_draw(repetition_count) or self.is_no_capture_draw(moves_since_capture)
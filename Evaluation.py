@@ -0,0 +1,63 @@
+import math
+
+class Evaluation:
+
+    """A static evaluation function used by the Monte Carlo Tree Search algorithm to score a position at the end of a
+    rollout that has been cut off before the game is over. The score is a weighted sum of three features, each one the
+    difference between player 2 (the AI) and player 1:
+
+    - material: the number of pieces each player has
+    - mobility: the number of legal moves each player can make
+    - pieces under attack: the number of the player's pieces the opponent can capture (counted against the player)
+
+    evaluate scales the score into the range -1 to 1 (the same range as GameTree.LOSS to GameTree.WIN) so it can be
+    backpropagated in place of a win, loss or draw.
+
+    ####################################################################
+    CLASS A SKILL: Static evaluation function (weighted features)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_MATERIAL_WEIGHT = 1
+    DEFAULT_MOBILITY_WEIGHT = 0.05
+    DEFAULT_ATTACK_WEIGHT = 0.5
+
+    # (material, mobility, pieces under attack) weights
+    DEFAULT_WEIGHTS = (DEFAULT_MATERIAL_WEIGHT, DEFAULT_MOBILITY_WEIGHT, DEFAULT_ATTACK_WEIGHT)
+
+    # a score of SCORE_SCALE is scaled to tanh(1) (about 0.76), so being a few pieces ahead is close to a win
+    SCORE_SCALE = 3
+
+    def __init__(self, material_weight=DEFAULT_MATERIAL_WEIGHT, mobility_weight=DEFAULT_MOBILITY_WEIGHT, attack_weight=DEFAULT_ATTACK_WEIGHT):
+        self.__material_weight = material_weight
+        self.__mobility_weight = mobility_weight
+        self.__attack_weight = attack_weight
+
+    def get_weights(self):
+
+        """Returns a tuple of the (material, mobility, pieces under attack) weights"""
+
+        return (self.__material_weight, self.__mobility_weight, self.__attack_weight)
+
+    def get_score(self, board):
+
+        """Returns the unscaled score of board (a BitBoard) from player 2's perspective"""
+
+        player_1_mobility, player_1_attacks = board.get_mobility_and_attacks(1)
+        player_2_mobility, player_2_attacks = board.get_mobility_and_attacks(2)
+
+        material = board.get_piece_count(2) - board.get_piece_count(1)
+        mobility = player_2_mobility - player_1_mobility
+
+        # player_1_attacks is a mask of player 2's pieces that player 1 can capture
+        attacks = bin(player_2_attacks).count("1") - bin(player_1_attacks).count("1")
+
+        return self.__material_weight * material + self.__mobility_weight * mobility + self.__attack_weight * attacks
+
+    def evaluate(self, board):
+
+        """Returns the score of board (a BitBoard) from player 2's perspective scaled into the range -1 to 1"""
+
+        return math.tanh(self.get_score(board) / Evaluation.SCORE_SCALE)
@@ -1,8 +1,9 @@
-from Player import Player, EasyAIPlayer, MediumAIPlayer, HardAIPlayer
+from Player import Player, AIPlayer, EasyAIPlayer, MediumAIPlayer, HardAIPlayer, ExpertAIPlayer
 from Board import Board
 from MultiClassBoardAttributes import MultiClassBoardAttributes
 from Move import Move
 from Stack import Stack
+from DrawRule import DrawRule
 
 
 class GameNotOverError(Exception):
@@ -11,6 +12,10 @@ class GameNotOverError(Exception):
 class Game:
 
     """The Game class manages the game state. It contains the board, the players, and the move history stack.
+
+    The game also keeps a count of how many times each position has occurred and the number of moves since the last
+    capture, so a game that neither player is making progress in can be ended as a draw by its DrawRule. The counts start
+    from the position a game is created with (a loaded game's earlier positions are not saved).
     
     ####################################################################
     CLASS A SKILL: Stack data structure (see comments in make_and_return_move and undo_and_return_move methods)
@@ -24,9 +29,10 @@ class Game:
         MultiClassBoardAttributes.EASY_AI_NAME: EasyAIPlayer,
         MultiClassBoardAttributes.MEDIUM_AI_NAME: MediumAIPlayer,
         MultiClassBoardAttributes.HARD_AI_NAME: HardAIPlayer,
+        MultiClassBoardAttributes.EXPERT_AI_NAME: ExpertAIPlayer,
     }
 
-    def __init__(self, player1name, player2_name, ai_level=None, game_state_string=None, player2_starts=False, player1_num_pieces=MultiClassBoardAttributes.NUM_STARTING_PIECES_EACH, player2_num_pieces=MultiClassBoardAttributes.NUM_STARTING_PIECES_EACH):
+    def __init__(self, player1name, player2_name, ai_level=None, game_state_string=None, player2_starts=False, player1_num_pieces=MultiClassBoardAttributes.NUM_STARTING_PIECES_EACH, player2_num_pieces=MultiClassBoardAttributes.NUM_STARTING_PIECES_EACH, draw_rule=None):
 
         self.__player1 = Player(player1name, MultiClassBoardAttributes.player_1_colour, player1_num_pieces)
 
@@ -50,19 +56,63 @@ class Game:
         if player2_starts: # if a game is loaded from a save it might be player 2's turn first
             self.switch_current_player()
 
+        if draw_rule == None:
+            draw_rule = DrawRule()
+
+        self.__draw_rule = draw_rule
+
+        # (position hash, player number to move) of the current position and the number of times each position has occurred
+        self.__position_key = self.__get_position_key(self.__current_player)
+        self.__position_counts = {self.__position_key: 1}
+
+        self.__moves_since_capture = 0
+
+        # the position key and moves since capture before each move, so they can be restored when the move is undone
+        self.__draw_rule_history_stack = Stack()
+
+    def __get_position_key(self, player_to_move):
+
+        """Returns a tuple (position hash, player number) identifying the position on the board with player_to_move to move"""
+
+        if player_to_move == self.__player1:
+            return (self.__board.get_hash(), 1)
+
+        return (self.__board.get_hash(), 2)
+
     def __make_ai_player(self, ai_name, player2_num_pieces):
 
         """Returns an AI player object using the class specified by ai_name with a piece count of player2_num_pieces"""
 
         return self.AI_NAME_TO_CLASS_MAP[ai_name](MultiClassBoardAttributes.player_2_colour, player2_num_pieces)
 
-    def get_ai_move(self):
+    def get_ai_move(self, stop_event=None, progress_callback=None):
+
+        """Returns a Move object generated by the AI player. The AI searches on its own copy of the board, so the move
+        is remade with the GridLocation objects of the game's board before it is returned. stop_event and progress_callback
+        are passed to the AI player's get_move method so that the GUI can run the search in a worker thread."""
+
+        move = self.__current_player.get_move(self.__board, stop_event, progress_callback)
+
+        board_state = self.__board.get_board_state()
+        start_cords = move.get_start_cords()
+        end_cords = move.get_end_cords()
+
+        return Move(board_state[start_cords[0]][start_cords[1]], board_state[end_cords[0]][end_cords[1]], move.get_move_type())
+
+    def start_ai_pondering(self):
+
+        """Lets the AI player (player 2) search on the board while the human player is choosing their move"""
 
-        """Returns a Move object generated by the AI player."""
+        if isinstance(self.__player2, AIPlayer) and not self.is_game_over():
+            self.__player2.start_pondering(self.__board)
 
-        move = self.__current_player.get_move(self.__board)
+    def stop_ai_pondering(self):
 
-        return move
+        """Stops the AI player from searching on the human player's time. Called before the board is changed by anything
+        other than a move and when the game is left."""
+
+        if isinstance(self.__player2, AIPlayer):
+            self.__player2.stop_pondering()
 
     def is_legal_move(self, start_loc, end_loc, move_type):
         return self.__board.is_legal_move(start_loc, end_loc, self.__current_player, move_type)
@@ -72,12 +122,29 @@ class Game:
 
     def set_game_status(self):
 
-        """Sets self.__game_over to True if either player has no pieces left. A legal move can always
-        be played in Surakarta, so this is the only way the game can end."""
+        """Sets self.__game_over to True if either player has no pieces left or the game has been drawn by the DrawRule"""
 
         if (self.__player1.get_piece_count() == 0 or self.__player2.get_piece_count() == 0):
             self.__game_over = True
 
+        elif self.is_draw():
+            self.__game_over = True
+
+    def get_draw_reason(self):
+
+        """Returns a description of why the game has been drawn, or None if the game has not been drawn"""
+
+        if self.__draw_rule.is_repetition_draw(self.__position_counts[self.__position_key]):
+            return f"the same position occurred {self.__draw_rule.get_repetition_limit()} times"
+
+        if self.__draw_rule.is_no_capture_draw(self.__moves_since_capture):
+            return f"{self.__draw_rule.get_no_capture_move_limit()} moves were made without a capture"
+
+        return None
+
+    def is_draw(self):
+        return self.get_draw_reason() != None
+
     def get_board_state(self):
         return self.__board.get_board_state()
     
@@ -86,9 +153,12 @@ class Game:
 
     def get_winning_player(self):
 
-        """Returns the Player object of the winner. If the game is not over, an exception is raised."""
+        """Returns the Player object of the winner, or None if the game was drawn. If the game is not over, an exception is raised."""
 
         if self.is_game_over():
+            if self.__player1.get_piece_count() != 0 and self.__player2.get_piece_count() != 0:
+                return None
+
             if self.__player1.get_piece_count() > self.__player2.get_piece_count():
                 return self.__player1
             
@@ -116,6 +186,17 @@ class Game:
         # make the move on the board
         self.__board.move_piece(move_obj)
 
+        self.__draw_rule_history_stack.push((self.__position_key, self.__moves_since_capture))
+
+        if move_type == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
+            self.__moves_since_capture = 0
+        else:
+            self.__moves_since_capture += 1
+
+        # the current player is switched after the move is made, so the player to move next is the non current player
+        self.__position_key = self.__get_position_key(self.__non_current_player)
+        self.__position_counts[self.__position_key] = self.__position_counts.get(self.__position_key, 0) + 1
+
         return move_obj
 
     def undo_and_return_move(self):
@@ -136,13 +217,12 @@ class Game:
         # pop the last move off the move history stack
         move_obj = self.__move_history_stack.pop()
 
-        # add a piece back to the current player's piece count if the move was a capture
-        if move_obj.get_move_type() == "capture":
-            self.__current_player.add_piece()
-
-        # undo the move on the board
+        # undo the move on the board (this also adds a captured piece back to its player's piece count)
         self.__board.undo_move(move_obj)
 
+        self.__position_counts[self.__position_key] -= 1
+        self.__position_key, self.__moves_since_capture = self.__draw_rule_history_stack.pop()
+
         return move_obj
 
     def get_current_player_name(self):
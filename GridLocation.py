@@ -1,5 +1,6 @@
 from Piece import Piece
 from MultiClassBoardAttributes import MultiClassBoardAttributes
+from BoardGeometry import BoardGeometry
 
 class GridLocation:
 
@@ -13,12 +14,6 @@ class GridLocation:
 
     """
 
-    # outer track cordinates have row (2 or 3) and column (2 or 3)
-    OUTER_TRACK_NUMBERS = (2, 3)
-
-    # inner track cordinates have row (1 or 4) and column (1 or 4)
-    INNER_TRACK_NUMBERS = (1, 4)
-
     # player 1 pieces start on rows 4 and 5, player 2 pieces start on rows 0 and 1
     PLAYER_1_ROWS = (4, 5)
     PLAYER_2_ROWS = (0, 1)
@@ -32,19 +27,9 @@ class GridLocation:
 
     def __set_track(self):
 
-        """determines which track(s) a location sits on"""
+        """determines which track(s) a location sits on using the precomputed track membership table"""
 
-        if (self.__cords[0] in self.OUTER_TRACK_NUMBERS and self.__cords[1] in self.INNER_TRACK_NUMBERS) or (self.__cords[0] in self.INNER_TRACK_NUMBERS and self.__cords[1] in self.OUTER_TRACK_NUMBERS):
-            return MultiClassBoardAttributes.BOTH_TRACK_STRING
-
-        elif self.INNER_TRACK_NUMBERS[0] in self.__cords or self.INNER_TRACK_NUMBERS[1] in self.__cords:
-            return MultiClassBoardAttributes.INNER_TRACK_STRING
-        
-        elif self.OUTER_TRACK_NUMBERS[0] in self.__cords or self.OUTER_TRACK_NUMBERS[1] in self.__cords:
-            return MultiClassBoardAttributes.OUTER_TRACK_STRING
-        
-        else:
-            return None
+        return BoardGeometry.TRACK_MEMBERSHIP[self.__cords]
 
     def __set_initial_piece(self):
 
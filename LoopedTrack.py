@@ -1,4 +1,5 @@
 from Piece import Piece
+from BoardGeometry import BoardGeometry
 
 class LoopedTrack:
 
@@ -67,25 +68,20 @@ class LoopedTrack:
         self.__left_pointer = (self.__left_pointer - 1) % len(self.__lst)
         return item
     
-    def __get_all_occurence_indexes(self, cords):
+    def get_occurrence_indexes(self, cords):
 
-        """returns a list of all the indexes that a location with the specified cords is found in lst"""
+        """returns a tuple of all the indexes that a location with the specified cords is found in lst.
+        The indexes are looked up in the precomputed table for the track with this LoopedTrack's name."""
 
-        ind_lst = []
-
-        for ind, grid_loc in enumerate(self.__lst):
-            if grid_loc.get_cords() == cords:
-                ind_lst.append(ind)
-
-        return ind_lst
+        return BoardGeometry.TRACK_OCCURRENCE_INDEXES[self.__name].get(cords, ())
     
     def switch_piece_positions(self, loc1, loc2):
 
         """replaces all occurences of loc1's piece with loc2's piece and all occurences of loc2's piece with loc1's piece"""
 
         # get all the indexes of loc1 and loc2 in the LoopedTrack
-        loc1_ind_lst = self.__get_all_occurence_indexes(loc1.get_cords())
-        loc2_ind_lst = self.__get_all_occurence_indexes(loc2.get_cords())
+        loc1_ind_lst = self.get_occurrence_indexes(loc1.get_cords())
+        loc2_ind_lst = self.get_occurrence_indexes(loc2.get_cords())
 
         # replace all occurences of loc1's piece with loc2's piece and vice versa
         for i in loc1_ind_lst:
@@ -98,7 +94,7 @@ class LoopedTrack:
 
         """replaces all occurences of a piece at cords with None"""
 
-        ind_lst = self.__get_all_occurence_indexes(cords)
+        ind_lst = self.get_occurrence_indexes(cords)
 
         for i in ind_lst:
             self.__lst[i].set_piece(None)
@@ -107,7 +103,7 @@ class LoopedTrack:
 
         """replaces all occurences of the piece at the GridLocation specified by cords's piece with a piece of the specified colour"""
 
-        ind_lst = self.__get_all_occurence_indexes(cords)
+        ind_lst = self.get_occurrence_indexes(cords)
 
         for i in ind_lst:
             if piece_colour == None:
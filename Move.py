@@ -15,11 +15,31 @@ class Move:
         self.__start_loc = start_loc
         self.__end_loc = end_loc
         self.__move_type = move_type
+        self.__start_cords = self.__start_loc.get_cords()
+        self.__end_cords = self.__end_loc.get_cords()
         self.__start_colour = self.__start_loc.get_piece_colour()
         self.__end_colour = self.__end_loc.get_piece_colour()
 
+    @classmethod
+    def from_cords(cls, start_cords, end_cords, move_type, start_colour, end_colour):
+
+        """Returns a Move object that is not tied to any GridLocation objects. Used by boards that do not store
+        GridLocation objects (such as BitBoard). get_start_loc and get_end_loc return None for these moves."""
+
+        move_obj = cls.__new__(cls)
+
+        move_obj.__start_loc = None
+        move_obj.__end_loc = None
+        move_obj.__move_type = move_type
+        move_obj.__start_cords = start_cords
+        move_obj.__end_cords = end_cords
+        move_obj.__start_colour = start_colour
+        move_obj.__end_colour = end_colour
+
+        return move_obj
+
     def __str__(self):
-        return f"{self.__move_type} from {self.__start_loc.get_cords()} to {self.__end_loc.get_cords()}"
+        return f"{self.__move_type} from {self.__start_cords} to {self.__end_cords}"
     
     def get_start_loc(self):
         return self.__start_loc
@@ -28,10 +48,10 @@ class Move:
         return self.__end_loc
     
     def get_start_cords(self):
-        return self.__start_loc.get_cords()
+        return self.__start_cords
     
     def get_end_cords(self):
-        return self.__end_loc.get_cords()
+        return self.__end_cords
 
     def get_move_type(self):
         return self.__move_type
@@ -26,6 +26,7 @@ class MultiClassBoardAttributes:
     EASY_AI_NAME = "Easy AI"
     MEDIUM_AI_NAME = "Medium AI"
     HARD_AI_NAME = "Hard AI"
+    EXPERT_AI_NAME = "Expert AI"
 
     MIN_ROW_INDEX = 0
     MAX_ROW_INDEX = 5
@@ -40,4 +41,14 @@ class MultiClassBoardAttributes:
         if player_num == 1:
             MultiClassBoardAttributes.player_1_colour = colour
         elif player_num == 2:
-            MultiClassBoardAttributes.player_2_colour = colour
\ No newline at end of file
+            MultiClassBoardAttributes.player_2_colour = colour
+
+    @staticmethod
+    def set_player_colours(player_1_colour, player_2_colour):
+
+        """sets the colours of both players' pieces. Used at the start of work done in a worker process: a worker process
+        does not share the main process's class attributes (it may be started without a copy of them), so the colours
+        chosen in the GUI are passed to the worker with its arguments and set again here."""
+
+        MultiClassBoardAttributes.player_1_colour = player_1_colour
+        MultiClassBoardAttributes.player_2_colour = player_2_colour
\ No newline at end of file
@@ -0,0 +1,261 @@
+from MultiClassBoardAttributes import MultiClassBoardAttributes
+from BitBoard import BitBoard
+from TreeSearch import GameTree
+from Evaluation import Evaluation
+import multiprocessing
+import argparse
+import sqlite3
+import random
+import os
+
+class OpeningBook:
+
+    """An opening book mapping positions near the start of the game to the statistics of the moves that were searched from
+    them. The book is built offline by build, which searches every position the AI (player 2) can face in its first
+    few moves with a long MCTS search (one position per CPU core at a time), and is stored in an SQLite file next to
+    Database.db. AI players look up the position before searching so their opening moves are instant and are the same in
+    every game.
+
+    Positions are stored by their Zobrist hash and the number of the player to move, and moves by their BitBoard move code,
+    so the book does not depend on the players' piece colours. The book is read into a dictionary when it is loaded so
+    looking up a position does not use the database connection (AI players search in a worker thread). A book loaded only
+    to be read (see load) closes its connection once the entries have been read.
+
+    The book is built by running this file:
+
+        python OpeningBook.py --moves 2 --time 20
+
+    ####################################################################
+    CLASS A SKILL: Parallel computing (multiprocessing)
+    CLASS A SKILL: Hash tables (position hash to move statistics)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_PATH = "OpeningBook.db"
+
+    # default number of AI moves covered by the book and seconds searched for each position when it is built
+    DEFAULT_NUM_BOOK_MOVES = 2
+    DEFAULT_SEARCH_TIME = 20
+
+    # rollout settings of the searches used to build the book (the same as the Medium AI)
+    BUILD_ROLLOUT_HORIZON = 16
+
+    # a book move must have been visited at least this many times to be played
+    MIN_VISITED_COUNT = 100
+
+    # SQLite stores signed 64 bit integers so hashes of 2 ** 63 or more are stored as negative numbers
+    HASH_MODULUS = 1 << 64
+    MAX_SIGNED_HASH = (1 << 63) - 1
+
+    def __init__(self, path=DEFAULT_PATH, read_only=False):
+
+        self.__conn = sqlite3.connect(path)
+        self.__cursor = self.__conn.cursor()
+
+        self.create_book_table()
+
+        # maps (position hash, player number to move) to a list of (move code, visited count, value) tuples
+        self.__entries = {}
+        self.__load_entries()
+
+        # looking up positions only reads the entries, so a book that is not added to does not need its connection
+        if read_only:
+            self.close()
+
+    @staticmethod
+    def load(path=DEFAULT_PATH):
+
+        """Returns the OpeningBook stored at path for looking up positions (positions cannot be added to it), or None if
+        there is no book at path"""
+
+        if not os.path.exists(path):
+            return None
+
+        return OpeningBook(path, read_only=True)
+
+    def close(self):
+
+        """Closes the book's database connection. Positions can still be looked up but no more can be added."""
+
+        self.__conn.close()
+
+    def create_book_table(self):
+
+        """Creates the OpeningBook table if it doesn't already exist."""
+
+        self.__cursor.execute(
+
+            """
+
+            CREATE TABLE IF NOT EXISTS OpeningBook (
+                position_hash INTEGER NOT NULL,
+                player_number INTEGER NOT NULL,
+                move_code INTEGER NOT NULL,
+                visited_count INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (position_hash, player_number, move_code)
+            );
+
+            """
+        )
+
+        self.__conn.commit()
+
+    @staticmethod
+    def __to_signed_hash(position_hash):
+        if position_hash > OpeningBook.MAX_SIGNED_HASH:
+            return position_hash - OpeningBook.HASH_MODULUS
+
+        return position_hash
+
+    @staticmethod
+    def __to_unsigned_hash(stored_hash):
+        return stored_hash % OpeningBook.HASH_MODULUS
+
+    def __load_entries(self):
+
+        """Reads every row of the OpeningBook table into the entries dictionary"""
+
+        self.__entries = {}
+
+        self.__cursor.execute("SELECT position_hash, player_number, move_code, visited_count, value FROM OpeningBook;")
+
+        for stored_hash, player_number, move_code, visited_count, value in self.__cursor.fetchall():
+            key = (self.__to_unsigned_hash(stored_hash), player_number)
+            self.__entries.setdefault(key, []).append((move_code, visited_count, value))
+
+    def get_num_positions(self):
+        return len(self.__entries)
+
+    def add_position(self, position_hash, player_number, move_stats):
+
+        """Stores the statistics of the moves searched from a position, replacing any statistics already stored for it.
+        move_stats maps move codes to (visited count, value) tuples."""
+
+        stored_hash = self.__to_signed_hash(position_hash)
+
+        self.__cursor.execute("DELETE FROM OpeningBook WHERE position_hash = ? AND player_number = ?;", (stored_hash, player_number))
+
+        for move_code, (visited_count, value) in move_stats.items():
+            self.__cursor.execute("INSERT INTO OpeningBook VALUES (?, ?, ?, ?, ?);", (stored_hash, player_number, move_code, visited_count, value))
+
+        self.__conn.commit()
+
+        self.__entries[(position_hash, player_number)] = [(move_code, visited_count, value) for move_code, (visited_count, value) in move_stats.items()]
+
+    def get_book_move_code(self, board, player_colour):
+
+        """Returns the move code of the book move for the player with player_colour to make on board (a BitBoard), or None
+        if the position is not in the book. The book move is the legal move with the highest value (as chosen by
+        GameTree.get_best_move) out of the moves visited at least MIN_VISITED_COUNT times."""
+
+        player_number = 1 if player_colour == MultiClassBoardAttributes.player_1_colour else 2
+
+        entries = self.__entries.get((board.get_hash(), player_number))
+
+        if entries == None:
+            return None
+
+        # the legal moves are checked in case two positions have the same hash
+        legal_move_codes = set(board.get_player_move_codes(player_colour))
+        candidates = [entry for entry in entries if entry[0] in legal_move_codes and entry[1] >= OpeningBook.MIN_VISITED_COUNT]
+
+        if len(candidates) == 0:
+            return None
+
+        # moves are compared in move code order so ties are always broken the same way
+        candidates.sort()
+
+        return max(candidates, key=lambda entry: entry[2])[0]
+
+    @staticmethod
+    def search_position(search_args):
+
+        """Searches one position and returns a tuple (game state string, move statistics) where the move statistics map
+        each move code to a (visited count, value) tuple. Called in a worker process."""
+
+        game_state_string, player_1_colour, player_2_colour, search_time, seed = search_args
+
+        MultiClassBoardAttributes.set_player_colours(player_1_colour, player_2_colour)
+
+        random.seed(seed)
+
+        board = BitBoard(game_state_string)
+        game_tree = GameTree(board, search_time, rollout_horizon=OpeningBook.BUILD_ROLLOUT_HORIZON, evaluation=Evaluation())
+        game_tree.run_search()
+
+        move_stats = {}
+
+        for move_key, (visited_count, value, proven_result) in game_tree.get_root_child_stats().items():
+            move_stats[BitBoard.move_key_to_move_code(move_key)] = (visited_count, value)
+
+        return game_state_string, move_stats
+
+    @staticmethod
+    def __get_positions_after_replies(game_state_strings):
+
+        """Returns the game state strings (without repeats) of the positions after every move player 1 can make from each
+        position in game_state_strings"""
+
+        positions = {}
+
+        for game_state_string in game_state_strings:
+            board = BitBoard(game_state_string)
+
+            for move_code in board.get_player_move_codes(MultiClassBoardAttributes.player_1_colour):
+                board.make_move_code(move_code)
+                positions[board.get_hash()] = board.get_game_state_string()
+                board.unmake_move_code(move_code)
+
+        return [positions[position_hash] for position_hash in sorted(positions)]
+
+    def build(self, num_book_moves=DEFAULT_NUM_BOOK_MOVES, search_time=DEFAULT_SEARCH_TIME, num_workers=None, seed=0):
+
+        """Builds the book for the AI's first num_book_moves moves. The positions for each move are every position the AI
+        can face after its book moves so far and every reply player 1 can make (the starting position is also searched with
+        the AI to move, for games that the AI starts). Each position is searched for search_time seconds, with one position
+        searched on each of num_workers processes at a time (every CPU core if num_workers is None)."""
+
+        if num_workers == None:
+            num_workers = os.cpu_count() or 1
+
+        start_position = BitBoard().get_game_state_string()
+
+        # positions with player 2 to move for the next book move
+        positions = [start_position] + self.__get_positions_after_replies([start_position])
+
+        with multiprocessing.Pool(num_workers) as pool:
+            for book_move in range(num_book_moves):
+
+                search_args = [(game_state_string, MultiClassBoardAttributes.player_1_colour, MultiClassBoardAttributes.player_2_colour, search_time, seed + i)
+                               for i, game_state_string in enumerate(positions)]
+
+                positions_after_book_moves = []
+
+                for game_state_string, move_stats in pool.imap(OpeningBook.search_position, search_args):
+                    board = BitBoard(game_state_string)
+                    self.add_position(board.get_hash(), 2, move_stats)
+
+                    book_move_code = self.get_book_move_code(board, MultiClassBoardAttributes.player_2_colour)
+
+                    if book_move_code != None:
+                        board.make_move_code(book_move_code)
+                        positions_after_book_moves.append(board.get_game_state_string())
+
+                print(f"book move {book_move + 1}: searched {len(positions)} positions")
+
+                positions = self.__get_positions_after_replies(positions_after_book_moves)
+                seed += len(search_args)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Builds the opening book used by the AI players")
+    parser.add_argument("--moves", type=int, default=OpeningBook.DEFAULT_NUM_BOOK_MOVES, help="number of AI moves covered by the book")
+    parser.add_argument("--time", type=float, default=OpeningBook.DEFAULT_SEARCH_TIME, help="seconds searched for each position")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per CPU core)")
+    parser.add_argument("--path", default=OpeningBook.DEFAULT_PATH, help="file the book is stored in")
+    args = parser.parse_args()
+
+    OpeningBook(args.path).build(args.moves, args.time, args.workers)
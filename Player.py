@@ -1,7 +1,19 @@
 from MultiClassBoardAttributes import MultiClassBoardAttributes
 import random
 from UtilityFunctions import shuffle_2D_array
-from TreeSearch import GameTree
+from TreeSearch import GameTree, RootParallelSearch
+from RolloutPolicy import RolloutPolicy
+from Evaluation import Evaluation
+from AlphaBeta import AlphaBetaSearch
+from BitBoard import BitBoard
+from TimeManager import TimeManager
+from OpeningBook import OpeningBook
+from Tablebase import Tablebase
+from SearchCache import SearchCache
+from DrawRule import DrawRule
+import os
+import threading
+import time
 
 class Player:
 
@@ -43,23 +55,231 @@ class Player:
     
 class AIPlayer(Player):
 
-    """An abstract base class for AI opponents. AI opponent classes inherit from this class and implement the get_move method
+    """An abstract base class for AI opponents. AI opponent classes inherit from this class and implement the get_move method.
+
+    AI players that search for their move call get_instant_move first, which finds moves that do not need a search (see
+    get_instant_move), and call record_move with the move they make so the opponent's reply can be found on their next turn.
+    They then call get_cached_move, which returns the move the AI chose the last time it searched the position, and store
+    the result of each search they run with cache_move.
     
     ####################################################################
     CLASS A SKILL: Complex OOP model with encapsulation and inheritance
+    GOOD CODING STYLE: Use of constants
     ####################################################################
     
     """
+
+    # depth of the alpha-beta search used to check that a recapture is the best move
+    RECAPTURE_SEARCH_DEPTH = 2
+
+    TIME_FOR_MOVE = None # seconds, set by subclasses that search for their move
+
+    # seconds on the AI player's clock for the whole game (None for no clock) and seconds added to the clock after each move
+    TOTAL_GAME_TIME = None
+    TIME_INCREMENT = 0
+
+    # the opening book is used if it has been built (see OpeningBook)
+    OPENING_BOOK_PATH = OpeningBook.DEFAULT_PATH
+
+    # OpeningBook shared by every AI player, loaded when the first AI player is made after it has been built
+    opening_book = None
+
+    # the endgame tablebase is used if it has been built (see Tablebase)
+    TABLEBASE_PATH = Tablebase.DEFAULT_PATH
+
+    # Tablebase shared by every AI player, loaded when the first AI player is made after it has been built (so its file
+    # is only opened and memory-mapped once)
+    tablebase = None
+
+    # file the search cache is saved to when the program exits so it is kept when the program is restarted (None to only
+    # keep it in memory, set to SearchCache.DEFAULT_PATH to keep it)
+    SEARCH_CACHE_PATH = None
+
+    # SearchCache shared by every AI player, created when the first AI player is made. The cache is not used if
+    # USE_SEARCH_CACHE is False (for example when AI players are compared by Arena, where every search should be run).
+    search_cache = None
+    USE_SEARCH_CACHE = True
     
     def __init__(self, name, piece_colour, piece_count=MultiClassBoardAttributes.NUM_STARTING_PIECES_EACH):
         super().__init__(name, piece_colour, piece_count)
 
-    def get_move(self, board):
+        # decides how long each search runs for and keeps the AI player's clock
+        self.__time_manager = TimeManager(self.TIME_FOR_MOVE, self.TOTAL_GAME_TIME, self.TIME_INCREMENT)
+
+        # occupancy masks (see BitBoard.get_masks) of the position after the AI player's last move (None before its first move)
+        self.__masks_after_last_move = None
 
-        """Must be implemented by subclasses. Returns a Move object for the AI player to make"""
+        # the opening book and tablebase stay None if they have not been built
+        if AIPlayer.opening_book == None:
+            AIPlayer.opening_book = OpeningBook.load(self.OPENING_BOOK_PATH)
+
+        if AIPlayer.tablebase == None:
+            AIPlayer.tablebase = Tablebase.load(self.TABLEBASE_PATH)
+
+        if AIPlayer.search_cache == None:
+            AIPlayer.search_cache = SearchCache(path=self.SEARCH_CACHE_PATH)
+
+    def get_move(self, board, stop_event=None, progress_callback=None):
+
+        """Must be implemented by subclasses. Returns a Move object for the AI player to make. AI players that search for
+        their move end the search early if stop_event (a threading.Event) is set and report their progress through
+        progress_callback(num_iterations, elapsed_time, best_move)."""
 
         raise NotImplementedError("AI opponent classes must have a get_move method")
 
+    def get_time_manager(self):
+        return self.__time_manager
+
+    def get_tablebase(self):
+        return AIPlayer.tablebase
+
+    def record_move(self, board, move):
+
+        """Stores the position after move is made on board (the position the move was chosen for)"""
+
+        bit_board = BitBoard(board.get_game_state_string())
+        bit_board.make_move_code(bit_board.move_to_move_code(move))
+
+        self.__masks_after_last_move = bit_board.get_masks()
+
+    def __get_search_cache_key(self, bit_board):
+
+        """Returns a tuple (position hash, player number, difficulty) identifying the AI player's searches of the position on bit_board"""
+
+        player_number = 1 if self.get_piece_colour() == MultiClassBoardAttributes.player_1_colour else 2
+
+        return (bit_board.get_hash(), player_number, self.get_name())
+
+    def get_cached_move(self, board):
+
+        """Returns the move the AI player chose the last time it searched the position on board, or None if the position
+        is not in the search cache"""
+
+        if not self.USE_SEARCH_CACHE:
+            return None
+
+        colour = self.get_piece_colour()
+        bit_board = BitBoard(board.get_game_state_string())
+
+        entry = AIPlayer.search_cache.get_entry(*self.__get_search_cache_key(bit_board))
+
+        if entry == None:
+            return None
+
+        move_code, stats = entry
+
+        # the move is checked in case two positions have the same hash
+        if move_code not in bit_board.get_player_move_codes(colour):
+            return None
+
+        return bit_board.move_code_to_move(move_code, colour)
+
+    def cache_move(self, board, move, stats, stop_event=None):
+
+        """Stores the move the AI player chose by searching the position on board and the search's statistics (a
+        dictionary that can be written as JSON) in the search cache. A search ended early by stop_event is not stored."""
+
+        if not self.USE_SEARCH_CACHE or (stop_event != None and stop_event.is_set()):
+            return
+
+        bit_board = BitBoard(board.get_game_state_string())
+
+        AIPlayer.search_cache.add_entry(*self.__get_search_cache_key(bit_board), bit_board.move_to_move_code(move), stats)
+
+    def __get_recapture_square(self, bit_board):
+
+        """Returns the square where the opponent captured one of the AI player's pieces with their last move, or None if the
+        opponent's last move was not a capture or the position is not one move after the AI player's last move (for example
+        after a move has been undone)"""
+
+        if self.__masks_after_last_move == None:
+            return None
+
+        side = 1 if self.get_piece_colour() == MultiClassBoardAttributes.player_2_colour else 0
+
+        masks = bit_board.get_masks()
+        previous_masks = self.__masks_after_last_move
+
+        lost_mask = previous_masks[side] ^ masks[side]
+        opponent_moved_mask = previous_masks[1 - side] ^ masks[1 - side]
+
+        # exactly one of the AI player's pieces has gone and the opponent has moved one piece onto its square
+        if bin(lost_mask).count("1") != 1 or masks[side] & lost_mask or bin(opponent_moved_mask).count("1") != 2 or not masks[1 - side] & lost_mask:
+            return None
+
+        return lost_mask.bit_length() - 1
+
+    def get_instant_move(self, board):
+
+        """Returns a move that is made without searching, or None if the AI player needs to search for its move. A move is
+        made without searching if:
+
+        - it is the only legal move
+        - it captures the opponent's last piece (it wins the game)
+        - the position is in the opening book
+        - the position is in the endgame tablebase
+        - it recaptures on the square where the opponent has just captured and a shallow alpha-beta search agrees it is the best move"""
+
+        colour = self.get_piece_colour()
+        bit_board = BitBoard(board.get_game_state_string())
+        move_codes = bit_board.get_player_move_codes(colour)
+
+        if len(move_codes) == 1:
+            return bit_board.move_code_to_move(move_codes[0], colour)
+
+        capture_codes = [move_code for move_code in move_codes if move_code & BitBoard.MOVE_CODE_CAPTURE_FLAG]
+
+        opponent_number = 1 if colour == MultiClassBoardAttributes.player_2_colour else 2
+
+        if len(capture_codes) > 0 and bit_board.get_piece_count(opponent_number) == 1:
+            return bit_board.move_code_to_move(capture_codes[0], colour)
+
+        if AIPlayer.opening_book != None:
+            book_move_code = AIPlayer.opening_book.get_book_move_code(bit_board, colour)
+
+            if book_move_code != None:
+                return bit_board.move_code_to_move(book_move_code, colour)
+
+        if AIPlayer.tablebase != None:
+            tablebase_move_code = AIPlayer.tablebase.get_best_move_code(bit_board, colour)
+
+            if tablebase_move_code != None:
+                return bit_board.move_code_to_move(tablebase_move_code, colour)
+
+        if len(capture_codes) == 0:
+            return None
+
+        recapture_square = self.__get_recapture_square(bit_board)
+
+        if recapture_square == None:
+            return None
+
+        recapture_codes = [move_code for move_code in capture_codes if BitBoard.decode_move(move_code)[1] == recapture_square]
+
+        if len(recapture_codes) == 0:
+            return None
+
+        search = AlphaBetaSearch(bit_board, None, max_depth=self.RECAPTURE_SEARCH_DEPTH, root_colour=colour)
+        best_move = search.get_next_move()
+
+        if bit_board.move_to_move_code(best_move) in recapture_codes:
+            return best_move
+
+        return None
+
+    def start_pondering(self, board):
+
+        """Called when it becomes the opponent's turn. AI players that search on the opponent's time override this method."""
+
+        pass
+
+    def stop_pondering(self):
+
+        """Called when the board changes in a way that the AI player did not expect, for example when a move is undone or the game ends.
+        AI players that search on the opponent's time override this method."""
+
+        pass
+
 
 class EasyAIPlayer(AIPlayer):
 
@@ -74,7 +294,7 @@ class EasyAIPlayer(AIPlayer):
     def __init__(self, piece_colour, piece_count):
         super().__init__(MultiClassBoardAttributes.EASY_AI_NAME, piece_colour, piece_count)
     
-    def get_move(self, board):
+    def get_move(self, board, stop_event=None, progress_callback=None):
         
         """Uses a greedy algorithm to make moves. It will capture if possible and otherwise will move pieces
         towards the corner if possible. Else it will make a random move
@@ -107,10 +327,210 @@ class EasyAIPlayer(AIPlayer):
         return board.get_random_normal_move(self.get_piece_colour())
 
 
-class MediumAIPlayer(AIPlayer):
+class MCTSAIPlayer(AIPlayer):
+
+    """An abstract base class for AI opponents that use the Monte Carlo Tree Search algorithm. Subclasses set TIME_FOR_MOVE
+    and NUM_SEARCH_WORKERS, and can set the rollout horizon and Evaluation weights to trade iterations against accuracy.
 
-    """A Medium AI opponent that inherits from the AIPlayer class and implements the get_move method
-    with the Monte Carlo Tree Search algorithm running for 15 seconds per move.
+    With one search worker the GameTree is kept between moves: when the opponent's reply is a position the tree has already
+    searched, the tree is re-rooted at that position so the statistics from the previous search are reused. With more than
+    one worker each move is searched by a RootParallelSearch across that many processes.
+
+    With one search worker the AI also ponders: while the opponent is choosing a move, the tree is searched in a background
+    thread from the position after the AI's move. The share of the ponder time spent on the move the opponent actually played
+    is taken off the time for the AI's next move, and the AI moves instantly if that share is already more than TIME_FOR_MOVE.
+    
+    ####################################################################
+    CLASS A SKILL: Complex OOP model with encapsulation, inheritance, and polymorphism
+    ####################################################################
+    
+    """
+
+    NUM_SEARCH_WORKERS = 1
+
+    # maximum number of nodes in each search tree (the tree is pruned when it reaches this size)
+    MAX_TREE_NODES = GameTree.DEFAULT_MAX_NODES
+
+    # whether the search uses progressive widening (see GameTree)
+    PROGRESSIVE_WIDENING = False
+
+    # probability that a rollout plays an available capture (see RolloutPolicy)
+    ROLLOUT_CAPTURE_PROBABILITY = RolloutPolicy.DEFAULT_CAPTURE_PROBABILITY
+
+    # number of moves after which a rollout is stopped early and the (material, mobility, pieces under attack) weights of the
+    # Evaluation that scores the position it stopped at. If EVALUATION_WEIGHTS is None the position is scored by piece count.
+    ROLLOUT_HORIZON = GameTree.MOVES_PER_ROLLOUT
+    EVALUATION_WEIGHTS = None
+
+    # rollouts are ended as a draw by the same rule as games (see DrawRule)
+    DRAW_RULE = DrawRule()
+
+    # maximum number of MCTS iterations per move (None for no limit, the search is then only limited by time)
+    MAX_ITERATIONS = None
+
+    def __init__(self, name, piece_colour, piece_count):
+        super().__init__(name, piece_colour, piece_count)
+
+        # GameTree from the previous move (None before the first move)
+        self.__game_tree = None
+
+        # pondering variables (the thread is None when the AI is not pondering)
+        self.__ponder_thread = None
+        self.__ponder_stop_event = threading.Event()
+        self.__ponder_start_time = None
+
+        # seconds spent pondering since the AI's last move
+        self.__ponder_time = 0
+
+    def __create_game_tree(self, board, time_for_move, root_colour=None):
+
+        """Returns a new GameTree searching board with this AI's search settings"""
+
+        evaluation = None
+        if self.EVALUATION_WEIGHTS != None:
+            evaluation = Evaluation(*self.EVALUATION_WEIGHTS)
+
+        return GameTree(board, time_for_move, max_iterations=self.MAX_ITERATIONS, root_colour=root_colour, max_nodes=self.MAX_TREE_NODES, progressive_widening=self.PROGRESSIVE_WIDENING,
+                        rollout_policy=RolloutPolicy(self.ROLLOUT_CAPTURE_PROBABILITY), rollout_horizon=self.ROLLOUT_HORIZON, evaluation=evaluation,
+                        time_manager=self.get_time_manager(), tablebase=self.get_tablebase(), draw_rule=self.DRAW_RULE)
+
+    def start_pondering(self, board):
+
+        """Starts searching the position on board (the opponent to move) in a background thread"""
+
+        if self.NUM_SEARCH_WORKERS > 1:
+            return
+
+        self.stop_pondering()
+
+        if self.__game_tree == None or not self.__game_tree.set_root_position(board, MultiClassBoardAttributes.player_1_colour):
+            self.__game_tree = self.__create_game_tree(board, self.TIME_FOR_MOVE, MultiClassBoardAttributes.player_1_colour)
+
+        self.__ponder_time = 0
+        self.__ponder_stop_event.clear()
+        self.__ponder_start_time = time.time()
+
+        # daemon thread so pondering never stops the program from closing
+        self.__ponder_thread = threading.Thread(target=self.__game_tree.ponder, args=(self.__ponder_stop_event,), daemon=True)
+        self.__ponder_thread.start()
+
+    def stop_pondering(self):
+
+        """Stops the pondering thread (if it is running) and waits for the current MCTS iteration to finish"""
+
+        if self.__ponder_thread == None:
+            return
+
+        self.__ponder_stop_event.set()
+        self.__ponder_thread.join()
+
+        self.__ponder_thread = None
+        self.__ponder_time = time.time() - self.__ponder_start_time
+
+    def get_tree_stats(self):
+
+        """Returns the tree size statistics (see GameTree.get_tree_stats) of the tree kept between moves, or None if there is no tree"""
+
+        if self.__game_tree == None:
+            return None
+
+        return self.__game_tree.get_tree_stats()
+
+    def get_move(self, board, stop_event=None, progress_callback=None):
+
+        """Uses the Monte Carlo Tree Search algorithm to make moves. The algorithm is run for TIME_FOR_MOVE seconds per move
+        or until stop_event is set. The TimeManager can end the search early or extend it. Moves found by get_instant_move
+        or get_cached_move are made without a search."""
+
+        start_time = time.time()
+
+        move = self.get_instant_move(board)
+
+        if move == None:
+            move = self.get_cached_move(board)
+
+        if move == None:
+            move, root_child_stats = self.__search_for_move(board, stop_event, progress_callback)
+            self.cache_move(board, move, self.__get_cache_stats(root_child_stats), stop_event)
+
+        self.record_move(board, move)
+        self.get_time_manager().record_move_time(time.time() - start_time)
+
+        return move
+
+    @staticmethod
+    def __get_cache_stats(root_child_stats):
+
+        """Returns the statistics of the root node's children (see GameTree.get_root_child_stats) in a form that can be
+        written as JSON, with each move stored as a move code"""
+
+        return {"root_child_stats": [[BitBoard.move_key_to_move_code(move_key), visited_count, value, proven_result]
+                                     for move_key, (visited_count, value, proven_result) in sorted(root_child_stats.items())]}
+
+    def __get_tablebase_path(self):
+
+        """Returns the path of the tablebase for the workers of a RootParallelSearch to load, or None if there is no tablebase"""
+
+        if self.get_tablebase() == None:
+            return None
+
+        return self.TABLEBASE_PATH
+
+    def __search_for_move(self, board, stop_event, progress_callback):
+
+        """Returns a tuple (move, statistics of the root node's children) found by the Monte Carlo Tree Search algorithm.
+        A proven result at the root node (see GameTree) ends the search straight away."""
+
+        time_for_move = self.get_time_manager().get_time_for_move()
+
+        if self.NUM_SEARCH_WORKERS > 1:
+            search = RootParallelSearch(board, time_for_move, self.NUM_SEARCH_WORKERS, max_iterations=self.MAX_ITERATIONS, max_nodes=self.MAX_TREE_NODES, progressive_widening=self.PROGRESSIVE_WIDENING,
+                                        rollout_capture_probability=self.ROLLOUT_CAPTURE_PROBABILITY, rollout_horizon=self.ROLLOUT_HORIZON,
+                                        evaluation_weights=self.EVALUATION_WEIGHTS, tablebase_path=self.__get_tablebase_path(), draw_rule=self.DRAW_RULE)
+            move = search.get_next_move(stop_event, progress_callback)
+
+            return move, search.get_root_child_stats()
+
+        self.stop_pondering()
+
+        # start a new tree if there is no tree from the previous move or it did not search the current position
+        if self.__game_tree == None:
+            self.__game_tree = self.__create_game_tree(board, time_for_move)
+
+        else:
+            ponder_root_visited_count = self.__game_tree.get_root_visited_count()
+
+            if self.__game_tree.set_root_position(board):
+
+                # the ponder time is shared between the opponent's moves in proportion to how often each was visited
+                # (a search with no time limit, limited only by MAX_ITERATIONS, is not shortened)
+                if ponder_root_visited_count > 0 and time_for_move != None:
+                    time_for_move -= self.__ponder_time * self.__game_tree.get_root_visited_count() / ponder_root_visited_count
+
+            else:
+                self.__game_tree = self.__create_game_tree(board, time_for_move)
+
+        self.__ponder_time = 0
+
+        if time_for_move != None:
+
+            # the current position has already been searched for longer than the time for a move
+            if time_for_move <= 0 and self.__game_tree.get_best_move() != None:
+                return self.__game_tree.get_best_move(), self.__game_tree.get_root_child_stats()
+
+            time_for_move = max(time_for_move, 0)
+
+        self.__game_tree.set_time_for_move(time_for_move)
+
+        move = self.__game_tree.get_next_move(stop_event, progress_callback)
+
+        return move, self.__game_tree.get_root_child_stats()
+
+
+class MediumAIPlayer(MCTSAIPlayer):
+
+    """A Medium AI opponent that inherits from the MCTSAIPlayer class and uses
+    the Monte Carlo Tree Search algorithm running for 15 seconds per move.
     
     ####################################################################
     CLASS A SKILL: Complex OOP model with encapsulation, inheritance, and polymorphism
@@ -119,22 +539,19 @@ class MediumAIPlayer(AIPlayer):
     """
 
     TIME_FOR_MOVE = 15 # seconds
+
+    # rollouts are cut off after 16 moves and scored by the default Evaluation
+    ROLLOUT_HORIZON = 16
+    EVALUATION_WEIGHTS = Evaluation.DEFAULT_WEIGHTS
     
     def __init__(self, piece_colour, piece_count):
         super().__init__(MultiClassBoardAttributes.MEDIUM_AI_NAME, piece_colour, piece_count)
 
-    def get_move(self, board):
-
-        """Uses the Monte Carlo Tree Search algorithm to make moves. The algorithm is run for 15 seconds per move"""
-        
-        game_tree = GameTree(board, self.TIME_FOR_MOVE)
-        return game_tree.get_next_move()
-
     
-class HardAIPlayer(AIPlayer):
+class HardAIPlayer(MCTSAIPlayer):
 
-    """A Hard AI opponent that inherits from the AIPlayer class and implements the get_move method
-    with the Monte Carlo Tree Search algorithm running for 30 seconds per move.
+    """A Hard AI opponent that inherits from the MCTSAIPlayer class and uses
+    the Monte Carlo Tree Search algorithm running for 30 seconds per move in parallel on every CPU core.
     
     ####################################################################
     CLASS A SKILL: Complex OOP model with encapsulation, inheritance, and polymorphism
@@ -143,18 +560,63 @@ class HardAIPlayer(AIPlayer):
     """
 
     TIME_FOR_MOVE = 30 # seconds
+
+    # one search worker process per CPU core
+    NUM_SEARCH_WORKERS = os.cpu_count() or 1
+
+    # shorter rollouts than the Medium AI so more iterations are run (more of the result comes from the Evaluation)
+    ROLLOUT_HORIZON = 8
+    EVALUATION_WEIGHTS = Evaluation.DEFAULT_WEIGHTS
         
     def __init__(self, piece_colour, piece_count):
         super().__init__(MultiClassBoardAttributes.HARD_AI_NAME, piece_colour, piece_count)
 
-    def get_move(self, board):
 
-        """Uses the Monte Carlo Tree Search algorithm to make moves. The algorithm is run for 30 seconds per move"""
+class ExpertAIPlayer(AIPlayer):
+
+    """An Expert AI opponent that inherits from the AIPlayer class and implements the get_move method with a negamax
+    alpha-beta search with iterative deepening (see AlphaBetaSearch) running for 10 seconds per move.
+
+    ####################################################################
+    CLASS A SKILL: Complex OOP model with encapsulation, inheritance, and polymorphism
+    ####################################################################
+
+    """
+
+    TIME_FOR_MOVE = 10 # seconds
+
+    # maximum depth of the iterative deepening search and the (material, mobility, pieces under attack) weights of the
+    # Evaluation that scores positions at the end of the search
+    MAX_SEARCH_DEPTH = AlphaBetaSearch.DEFAULT_MAX_DEPTH
+    EVALUATION_WEIGHTS = Evaluation.DEFAULT_WEIGHTS
+
+    # maximum number of positions searched per move (None for no limit, the search is then only limited by time)
+    MAX_SEARCH_NODES = None
+
+    def __init__(self, piece_colour, piece_count):
+        super().__init__(MultiClassBoardAttributes.EXPERT_AI_NAME, piece_colour, piece_count)
+
+    def get_move(self, board, stop_event=None, progress_callback=None):
+
+        """Uses the alpha-beta search to make moves. The search is run for TIME_FOR_MOVE seconds per move or until
+        stop_event is set (or less if the AI's clock is running out). Moves found by get_instant_move or get_cached_move are
+        made without a search."""
+
+        start_time = time.time()
+
+        move = self.get_instant_move(board)
 
-        game_tree = GameTree(board, self.TIME_FOR_MOVE)
-        return game_tree.get_next_move()
+        if move == None:
+            move = self.get_cached_move(board)
 
+        if move == None:
+            search = AlphaBetaSearch(board, self.get_time_manager().get_time_for_move(), max_depth=self.MAX_SEARCH_DEPTH, evaluation=Evaluation(*self.EVALUATION_WEIGHTS),
+                                     root_colour=self.get_piece_colour(), max_nodes=self.MAX_SEARCH_NODES)
+            move = search.get_next_move(stop_event, progress_callback)
 
+            self.cache_move(board, move, {"completed_depth": search.get_completed_depth(), "best_score": search.get_best_score()}, stop_event)
 
+        self.record_move(board, move)
+        self.get_time_manager().record_move_time(time.time() - start_time)
 
-    
\ No newline at end of file
+        return move
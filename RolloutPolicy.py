@@ -0,0 +1,41 @@
+import random
+
+class RolloutPolicy:
+
+    """Chooses the moves played during the rollouts of the Monte Carlo Tree Search algorithm. A purely random rollout
+    often leaves pieces that could be captured, which makes its result a poor guide to who is winning. With probability
+    capture_probability the policy plays a random capture if one is available, otherwise it plays a random legal move
+    (a random piece that can move, then one of that piece's moves).
+
+    A capture probability of 0 gives the original random rollouts.
+
+    ####################################################################
+    CLASS A SKILL: Heuristic (capture biased) simulation policy
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_CAPTURE_PROBABILITY = 0.75
+
+    def __init__(self, capture_probability=DEFAULT_CAPTURE_PROBABILITY):
+
+        if not 0 <= capture_probability <= 1:
+            raise ValueError("capture_probability must be between 0 and 1")
+
+        self.__capture_probability = capture_probability
+
+    def get_capture_probability(self):
+        return self.__capture_probability
+
+    def choose_move_code(self, board, player_colour):
+
+        """Returns the move code of the move the player with player_colour plays on board (a BitBoard) during a rollout"""
+
+        if self.__capture_probability > 0 and random.random() < self.__capture_probability:
+            move_code = board.get_random_capture_move_code(player_colour)
+
+            if move_code != None:
+                return move_code
+
+        return board.get_single_random_move_code(player_colour)
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+import threading
+import atexit
+import json
+import os
+
+class SearchCache:
+
+    """A cache of the results of AI searches, keyed by the position's Zobrist hash, the number of the player to move and
+    the AI's difficulty (its name). Each entry stores the move code the AI chose and the statistics of the search (for
+    example the statistics of the root node's children), so an AI that reaches a position it has already searched (after
+    a move is undone or a saved game is loaded) makes the same move straight away instead of searching again.
+
+    The cache holds at most max_entries entries and the least recently used entry is evicted when it is full. If the
+    cache has a path it is loaded from that file when it is created and saved to it when the program exits (entries are
+    only kept in memory while the program runs, so a search never waits for the file to be written). The cache is shared
+    by every AI player and is used from the thread the AI searches in, so it is protected by a lock.
+
+    ####################################################################
+    CLASS A SKILL: Hash table with least recently used eviction
+    CLASS A SKILL: Writing to and reading from files (JSON)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_MAX_ENTRIES = 1000
+    DEFAULT_PATH = "SearchCache.json"
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+
+        # maps (position hash, player number, difficulty) to (move code, statistics), ordered from least recently used to most recently used
+        self.__table = OrderedDict()
+
+        self.__max_entries = max_entries
+
+        # file the cache is saved to (None if the cache is only kept in memory)
+        self.__path = path
+
+        self.__lock = threading.Lock()
+
+        # True if the entries have changed since they were loaded or saved
+        self.__changed = False
+
+        if path != None:
+            if os.path.exists(path):
+                self.__load()
+
+            atexit.register(self.save)
+
+    def __load(self):
+
+        """Reads the entries saved at the cache's path"""
+
+        # a cache file that cannot be read or does not hold a list of entries is ignored and replaced when the cache is saved
+        try:
+            with open(self.__path, "r") as file:
+                saved_entries = json.load(file)
+
+            for saved_entry in saved_entries[-self.__max_entries:]:
+                if not self.__is_valid_saved_entry(saved_entry):
+                    continue
+
+                position_hash, player_number, difficulty, move_code, stats = saved_entry
+                self.__table[(position_hash, player_number, difficulty)] = (move_code, stats)
+
+        except (OSError, TypeError, ValueError):
+            self.__table.clear()
+
+    @staticmethod
+    def __is_valid_saved_entry(saved_entry):
+
+        """Returns True if saved_entry is a list [position hash, player number, difficulty, move code, statistics] with
+        values of the right types"""
+
+        if not isinstance(saved_entry, list) or len(saved_entry) != 5:
+            return False
+
+        position_hash, player_number, difficulty, move_code, stats = saved_entry
+
+        return (isinstance(position_hash, int) and player_number in (1, 2) and isinstance(difficulty, str)
+                and isinstance(move_code, int) and isinstance(stats, dict))
+
+    def save(self):
+
+        """Writes the entries (least recently used first) to the cache's path if they have changed. The entries are written
+        to a temporary file which then replaces the saved cache, so the saved cache is never left half written."""
+
+        with self.__lock:
+            if self.__path == None or not self.__changed:
+                return
+
+            saved_entries = [[position_hash, player_number, difficulty, move_code, stats] for (position_hash, player_number, difficulty), (move_code, stats) in self.__table.items()]
+
+            temporary_path = self.__path + ".tmp"
+
+            with open(temporary_path, "w") as file:
+                json.dump(saved_entries, file)
+
+            os.replace(temporary_path, self.__path)
+
+            self.__changed = False
+
+    def get_entry(self, position_hash, player_number, difficulty):
+
+        """Returns a tuple (move code, statistics) stored for the position (marking it as recently used) or None if there is no entry"""
+
+        key = (position_hash, player_number, difficulty)
+
+        with self.__lock:
+            entry = self.__table.get(key)
+
+            if entry != None:
+                self.__table.move_to_end(key)
+
+        return entry
+
+    def add_entry(self, position_hash, player_number, difficulty, move_code, stats):
+
+        """Stores the move code and statistics of a search, evicting the least recently used entry if the cache is full.
+        stats must be a dictionary that can be written as JSON."""
+
+        key = (position_hash, player_number, difficulty)
+
+        with self.__lock:
+            self.__table[key] = (move_code, stats)
+            self.__table.move_to_end(key)
+
+            if len(self.__table) > self.__max_entries:
+                self.__table.popitem(last=False)
+
+            self.__changed = True
+
+    def get_size(self):
+        return len(self.__table)
+
+    def clear(self):
+        with self.__lock:
+            self.__table.clear()
+            self.__changed = True
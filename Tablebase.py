@@ -0,0 +1,487 @@
+from MultiClassBoardAttributes import MultiClassBoardAttributes
+from BoardGeometry import BoardGeometry
+from BitBoard import BitBoard
+from array import array
+import multiprocessing
+import itertools
+import argparse
+import struct
+import math
+import mmap
+import os
+
+class Tablebase:
+
+    """An endgame tablebase storing the result of every position where each player has at most MAX_PIECES_PER_SIDE
+    pieces. The result of a position is stored as the number of plies (moves by either player) until the game ends with
+    perfect play: an odd number of plies is a win for the player to move, an even number of plies is a loss and 0 is a draw
+    (neither player can force a win). Storing the number of plies means a player in a won position always makes progress
+    towards the win instead of moving back and forth between won positions.
+
+    The tablebase is built offline by build with retrograde analysis. The positions are split into material classes (the
+    number of pieces each player has) which are solved in order of the total number of pieces, so a capture always leads
+    to a class that has already been solved. The moves of every position in a class are generated by a pool of worker
+    processes, then the results are found by working backwards from the positions that are won by a capture: a position
+    is a win if any of its moves leads to a loss for the opponent, and a loss once every one of its moves has been found
+    to lead to a win for the opponent. Positions that are never found to be a win or a loss are draws.
+
+    The results are stored in a file (2 bytes for each position and player to move) that is memory-mapped when it is
+    loaded, so probing a position reads a single entry without loading the whole file. GameTree probes the positions of
+    the nodes it creates and AI players probe the position they are moving from (see AIPlayer.get_instant_move).
+
+    The tablebase is built by running this file:
+
+        python Tablebase.py --pieces 2
+
+    ####################################################################
+    CLASS A SKILL: Retrograde analysis (solving endgames backwards from the end of the game)
+    CLASS A SKILL: Parallel computing (multiprocessing)
+    CLASS A SKILL: Memory-mapped files
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    DEFAULT_PATH = "Tablebase.bin"
+
+    # default number of pieces each player can have in a position in the tablebase. Every extra piece makes the tablebase
+    # roughly 30 times larger (a tablebase for 3 pieces each has around 80 million positions).
+    DEFAULT_MAX_PIECES_PER_SIDE = 2
+
+    # the file starts with a header (magic bytes and the maximum number of pieces per side). The magic bytes are written
+    # once the tablebase has been built, so a file that has not finished building is not loaded.
+    HEADER = struct.Struct("<4sH2x")
+    MAGIC = b"SKTB"
+    UNFINISHED_MAGIC = b"\0\0\0\0"
+
+    # results are stored as unsigned 16 bit integers ("H" array type code)
+    ENTRY_TYPE_CODE = "H"
+
+    DRAW = 0
+
+    # BINOMIALS[n][k] is the number of ways of choosing k squares from n squares
+    BINOMIALS = tuple(tuple(math.comb(n, k) for k in range(BoardGeometry.NUM_SQUARES + 1)) for n in range(BoardGeometry.NUM_SQUARES + 1))
+
+    # number of chunks of positions given to each worker process for each material class
+    CHUNKS_PER_WORKER = 8
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.__file = open(path, "rb")
+        self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.__magic, self.__max_pieces_per_side = Tablebase.HEADER.unpack_from(self.__mmap)
+
+        # maps (player 1 piece count, player 2 piece count) to the index of the class's first entry
+        self.__class_offsets = Tablebase.get_class_offsets(self.__max_pieces_per_side)
+
+        self.__entries = memoryview(self.__mmap)[Tablebase.HEADER.size:].cast(Tablebase.ENTRY_TYPE_CODE)
+
+    @staticmethod
+    def load(path=DEFAULT_PATH):
+
+        """Returns the Tablebase stored at path, or None if there is no tablebase at path or it has not finished building"""
+
+        if not os.path.exists(path):
+            return None
+
+        tablebase = Tablebase(path)
+
+        if tablebase.__magic != Tablebase.MAGIC:
+            tablebase.close()
+            return None
+
+        return tablebase
+
+    def close(self):
+        self.__entries.release()
+        self.__mmap.close()
+        self.__file.close()
+
+    def get_max_pieces_per_side(self):
+        return self.__max_pieces_per_side
+
+    @staticmethod
+    def is_win(plies):
+
+        """Returns True if a result stored as plies is a win for the player to move"""
+
+        return plies % 2 == 1
+
+    @staticmethod
+    def get_class_size(player_1_count, player_2_count):
+
+        """Returns the number of positions in a material class (not counting the player to move)"""
+
+        return Tablebase.BINOMIALS[BoardGeometry.NUM_SQUARES][player_1_count] * Tablebase.BINOMIALS[BoardGeometry.NUM_SQUARES - player_1_count][player_2_count]
+
+    @staticmethod
+    def get_material_classes(max_pieces_per_side):
+
+        """Returns a list of the (player 1 piece count, player 2 piece count) material classes in the order they are solved"""
+
+        piece_counts = range(1, max_pieces_per_side + 1)
+
+        return sorted(itertools.product(piece_counts, piece_counts), key=lambda material_class: (sum(material_class), material_class))
+
+    @staticmethod
+    def get_class_offsets(max_pieces_per_side):
+
+        """Returns a dictionary mapping each material class to the index of its first entry. Each position in a class has
+        two entries (player 1 to move, then player 2 to move)."""
+
+        class_offsets = {}
+        num_entries = 0
+
+        for material_class in Tablebase.get_material_classes(max_pieces_per_side):
+            class_offsets[material_class] = num_entries
+            num_entries += 2 * Tablebase.get_class_size(*material_class)
+
+        return class_offsets
+
+    @staticmethod
+    def __get_squares(mask):
+        squares = []
+
+        while mask:
+            lowest_bit = mask & -mask
+            squares.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+
+        return squares
+
+    @staticmethod
+    def get_position_index(player_1_mask, player_2_mask):
+
+        """Returns the index of a position within its material class. Player 1's squares are ranked among the 36 squares
+        and player 2's squares are ranked among the squares player 1 does not occupy, using the combinatorial number system."""
+
+        binomials = Tablebase.BINOMIALS
+
+        player_1_rank = 0
+        for i, square in enumerate(Tablebase.__get_squares(player_1_mask)):
+            player_1_rank += binomials[square][i + 1]
+
+        player_2_rank = 0
+        for i, square in enumerate(Tablebase.__get_squares(player_2_mask)):
+
+            # number of squares before square that player 1 does not occupy
+            free_square = square - bin(player_1_mask & ((1 << square) - 1)).count("1")
+            player_2_rank += binomials[free_square][i + 1]
+
+        player_1_count = bin(player_1_mask).count("1")
+        player_2_count = bin(player_2_mask).count("1")
+
+        return player_1_rank * binomials[BoardGeometry.NUM_SQUARES - player_1_count][player_2_count] + player_2_rank
+
+    def get_entry(self, player_1_mask, player_2_mask, player_number):
+
+        """Returns the stored result of a position with the player specified by player_number to move, or None if the
+        position is not in the tablebase"""
+
+        material_class = (bin(player_1_mask).count("1"), bin(player_2_mask).count("1"))
+        class_offset = self.__class_offsets.get(material_class)
+
+        if class_offset == None:
+            return None
+
+        return self.__entries[class_offset + 2 * Tablebase.get_position_index(player_1_mask, player_2_mask) + player_number - 1]
+
+    def probe(self, board, player_colour):
+
+        """Returns the result of the position on board (a BitBoard) with the player specified by player_colour to move as
+        the number of plies until the game ends (see Tablebase), or None if the position is not in the tablebase"""
+
+        player_number = 1 if player_colour == MultiClassBoardAttributes.player_1_colour else 2
+
+        return self.get_entry(*board.get_masks(), player_number)
+
+    def __get_plies_after_move(self, board, move_code, opponent_colour):
+
+        """Returns the result of the position after move_code is made on board for the opponent (0 if the move captures the
+        opponent's last piece), or None if the position after the move is a draw"""
+
+        board.make_move_code(move_code)
+
+        if board.get_piece_count(1) == 0 or board.get_piece_count(2) == 0:
+            plies = 0
+        else:
+            plies = self.probe(board, opponent_colour)
+
+            if plies == Tablebase.DRAW:
+                plies = None
+
+        board.unmake_move_code(move_code)
+
+        return plies
+
+    def get_best_move_code(self, board, player_colour):
+
+        """Returns the move code of the best move for the player with player_colour to make on board (a BitBoard), or None
+        if the position is not in the tablebase. In a won position the move that wins fastest is chosen and in a lost
+        position the move that loses slowest. In a drawn position the drawing move that leaves the opponent with the fewest
+        moves that do not lose is chosen, so a mistake by the opponent is more likely."""
+
+        plies = self.probe(board, player_colour)
+
+        if plies == None:
+            return None
+
+        if player_colour == MultiClassBoardAttributes.player_1_colour:
+            opponent_colour = MultiClassBoardAttributes.player_2_colour
+        else:
+            opponent_colour = MultiClassBoardAttributes.player_1_colour
+
+        move_codes = sorted(board.get_player_move_codes(player_colour))
+
+        if len(move_codes) == 0:
+            return None
+
+        move_plies = {move_code: self.__get_plies_after_move(board, move_code, opponent_colour) for move_code in move_codes}
+
+        if plies == Tablebase.DRAW:
+            drawing_move_codes = [move_code for move_code in move_codes if move_plies[move_code] == None]
+
+            # a player who cannot move has a draw but has no drawing moves
+            if len(drawing_move_codes) == 0:
+                return move_codes[0]
+
+            return min(drawing_move_codes, key=lambda move_code: self.__get_num_non_losing_replies(board, move_code, opponent_colour, player_colour))
+
+        if Tablebase.is_win(plies):
+            winning_move_codes = [move_code for move_code in move_codes if move_plies[move_code] != None and not Tablebase.is_win(move_plies[move_code])]
+
+            return min(winning_move_codes, key=lambda move_code: move_plies[move_code])
+
+        return max(move_codes, key=lambda move_code: move_plies[move_code])
+
+    def __get_num_non_losing_replies(self, board, move_code, opponent_colour, player_colour):
+
+        """Returns the number of replies the opponent can make after move_code is made on board that do not lose"""
+
+        board.make_move_code(move_code)
+
+        num_non_losing_replies = 0
+
+        for reply_code in board.get_player_move_codes(opponent_colour):
+            plies = self.__get_plies_after_move(board, reply_code, player_colour)
+
+            if plies == None or not Tablebase.is_win(plies):
+                num_non_losing_replies += 1
+
+        board.unmake_move_code(move_code)
+
+        return num_non_losing_replies
+
+    @staticmethod
+    def generate_moves(chunk_args):
+
+        """Generates the moves of every position in a chunk of a material class, with both players to move. Called in a
+        worker process. Captures lead to a class that has already been solved, so their results are read from the
+        tablebase file. Returns a tuple of arrays with an element for each position:
+
+        - the position's entry index within the class
+        - the offset of the position's moves that stay in the class in the successors array (with a final offset at the end)
+        - the entry index of the position after each move that stays in the class (the successors array)
+        - the fewest plies to win with a capture (0 if no capture wins)
+        - the most plies the opponent needs to win after a capture (0 if no capture loses)
+        - 1 if the position has a capture that does not lose or the player to move cannot move (so it cannot be a loss), otherwise 0"""
+
+        path, player_1_colour, player_2_colour, material_class, player_1_masks = chunk_args
+
+        MultiClassBoardAttributes.set_player_colours(player_1_colour, player_2_colour)
+
+        tablebase = Tablebase(path)
+
+        player_1_count, player_2_count = material_class
+        piece_counts = (player_1_count, player_2_count)
+
+        indexes = array("i")
+        successor_offsets = array("i", [0])
+        successors = array("i")
+        capture_wins = array(Tablebase.ENTRY_TYPE_CODE)
+        capture_losses = array(Tablebase.ENTRY_TYPE_CODE)
+        cannot_lose = array("b")
+
+        for player_1_mask in player_1_masks:
+            free_squares = [square for square in range(BoardGeometry.NUM_SQUARES) if not player_1_mask & (1 << square)]
+
+            for player_2_squares in itertools.combinations(free_squares, player_2_count):
+                player_2_mask = sum(1 << square for square in player_2_squares)
+
+                board = BitBoard.from_masks(player_1_mask, player_2_mask)
+                position_index = Tablebase.get_position_index(player_1_mask, player_2_mask)
+
+                for player_number, colour in ((1, player_1_colour), (2, player_2_colour)):
+                    side = player_number - 1
+                    opponent_number = 3 - player_number
+
+                    capture_win = 0
+                    capture_loss = 0
+                    has_non_losing_capture = False
+
+                    move_codes = board.get_player_move_codes(colour)
+
+                    for move_code in move_codes:
+                        start_square, end_square, is_capture = BitBoard.decode_move(move_code)
+
+                        masks = [player_1_mask, player_2_mask]
+                        masks[side] ^= (1 << start_square) | (1 << end_square)
+
+                        if not is_capture:
+                            successors.append(2 * Tablebase.get_position_index(*masks) + opponent_number - 1)
+                            continue
+
+                        masks[1 - side] ^= 1 << end_square
+
+                        # capturing the opponent's last piece wins
+                        if piece_counts[1 - side] == 1:
+                            capture_win = 1
+                            has_non_losing_capture = True
+                            continue
+
+                        plies = tablebase.get_entry(masks[0], masks[1], opponent_number)
+
+                        if plies != Tablebase.DRAW and Tablebase.is_win(plies):
+                            capture_loss = max(capture_loss, plies)
+
+                        else:
+                            has_non_losing_capture = True
+
+                            if plies != Tablebase.DRAW and (capture_win == 0 or plies + 1 < capture_win):
+                                capture_win = plies + 1
+
+                    indexes.append(2 * position_index + side)
+                    successor_offsets.append(len(successors))
+                    capture_wins.append(capture_win)
+                    capture_losses.append(capture_loss)
+                    cannot_lose.append(1 if has_non_losing_capture or len(move_codes) == 0 else 0)
+
+        tablebase.close()
+
+        return indexes, successor_offsets, successors, capture_wins, capture_losses, cannot_lose
+
+    @staticmethod
+    def solve_class(num_entries, chunk_results):
+
+        """Returns an array of the result of every entry in a material class from the moves generated by generate_moves.
+
+        Each position counts its moves that have not yet been found to lead to a win for the opponent. Positions are
+        resolved in order of their number of plies: when a position is found to be a loss, every position with a move to
+        it is a win in one more ply, and when a position is found to be a win, the count of every position with a move to
+        it goes down by one. A position whose count reaches 0 is a loss in one more ply than its slowest loss."""
+
+        remaining_counts = array("i", [0]) * num_entries
+        slowest_losses = array(Tablebase.ENTRY_TYPE_CODE, [0]) * num_entries
+
+        # maps a number of plies to the entries that may be resolved with that number of plies
+        buckets = {}
+
+        # the predecessors of each entry are stored in one array, with the predecessors of entry i starting at predecessor_offsets[i]
+        predecessor_offsets = array("i", [0]) * (num_entries + 1)
+
+        for indexes, successor_offsets, successors, capture_wins, capture_losses, cannot_lose in chunk_results:
+            for i, entry in enumerate(indexes):
+                remaining_counts[entry] = successor_offsets[i + 1] - successor_offsets[i] + cannot_lose[i]
+                slowest_losses[entry] = capture_losses[i]
+
+                if capture_wins[i] != 0:
+                    buckets.setdefault(capture_wins[i], []).append(entry)
+
+                elif remaining_counts[entry] == 0:
+                    buckets.setdefault(capture_losses[i] + 1, []).append(entry)
+
+            for successor in successors:
+                predecessor_offsets[successor + 1] += 1
+
+        for entry in range(num_entries):
+            predecessor_offsets[entry + 1] += predecessor_offsets[entry]
+
+        predecessors = array("i", [0]) * predecessor_offsets[num_entries]
+        next_predecessor = array("i", predecessor_offsets)
+
+        for indexes, successor_offsets, successors, capture_wins, capture_losses, cannot_lose in chunk_results:
+            for i, entry in enumerate(indexes):
+                for successor in successors[successor_offsets[i]:successor_offsets[i + 1]]:
+                    predecessors[next_predecessor[successor]] = entry
+                    next_predecessor[successor] += 1
+
+        results = array(Tablebase.ENTRY_TYPE_CODE, [0]) * num_entries
+
+        while len(buckets) > 0:
+            plies = min(buckets)
+
+            for entry in buckets.pop(plies):
+
+                # an entry can be added to a bucket more than once, only the first (fewest plies) result is kept
+                if results[entry] != Tablebase.DRAW:
+                    continue
+
+                results[entry] = plies
+
+                for predecessor in predecessors[predecessor_offsets[entry]:predecessor_offsets[entry + 1]]:
+                    if results[predecessor] != Tablebase.DRAW:
+                        continue
+
+                    if not Tablebase.is_win(plies):
+                        buckets.setdefault(plies + 1, []).append(predecessor)
+                        continue
+
+                    remaining_counts[predecessor] -= 1
+
+                    if remaining_counts[predecessor] == 0:
+                        buckets.setdefault(max(plies, slowest_losses[predecessor]) + 1, []).append(predecessor)
+
+        return results
+
+    @staticmethod
+    def build(path=DEFAULT_PATH, max_pieces_per_side=DEFAULT_MAX_PIECES_PER_SIDE, num_workers=None):
+
+        """Builds a tablebase for positions where each player has at most max_pieces_per_side pieces and stores it at path.
+        The moves of each material class are generated on num_workers processes (every CPU core if num_workers is None)."""
+
+        if num_workers == None:
+            num_workers = os.cpu_count() or 1
+
+        class_offsets = Tablebase.get_class_offsets(max_pieces_per_side)
+        num_entries = sum(2 * Tablebase.get_class_size(*material_class) for material_class in class_offsets)
+        entry_size = array(Tablebase.ENTRY_TYPE_CODE).itemsize
+
+        with open(path, "wb") as file:
+            file.write(Tablebase.HEADER.pack(Tablebase.UNFINISHED_MAGIC, max_pieces_per_side))
+            file.truncate(Tablebase.HEADER.size + num_entries * entry_size)
+
+        with open(path, "r+b") as file, multiprocessing.Pool(num_workers) as pool:
+            file_mmap = mmap.mmap(file.fileno(), 0)
+            entries = memoryview(file_mmap)[Tablebase.HEADER.size:].cast(Tablebase.ENTRY_TYPE_CODE)
+
+            for material_class, class_offset in class_offsets.items():
+                player_1_masks = [sum(1 << square for square in squares) for squares in itertools.combinations(range(BoardGeometry.NUM_SQUARES), material_class[0])]
+                chunk_size = max(1, len(player_1_masks) // (num_workers * Tablebase.CHUNKS_PER_WORKER))
+
+                chunk_args = [(path, MultiClassBoardAttributes.player_1_colour, MultiClassBoardAttributes.player_2_colour, material_class, player_1_masks[i:i + chunk_size])
+                              for i in range(0, len(player_1_masks), chunk_size)]
+
+                chunk_results = pool.map(Tablebase.generate_moves, chunk_args)
+
+                class_num_entries = 2 * Tablebase.get_class_size(*material_class)
+                results = Tablebase.solve_class(class_num_entries, chunk_results)
+
+                entries[class_offset:class_offset + class_num_entries] = results
+                file_mmap.flush()
+
+                num_decided = class_num_entries - results.count(Tablebase.DRAW)
+                print(f"material {material_class}: {class_num_entries} entries, {num_decided} won or lost, longest {max(results)} plies")
+
+            entries.release()
+            Tablebase.HEADER.pack_into(file_mmap, 0, Tablebase.MAGIC, max_pieces_per_side)
+            file_mmap.close()
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Builds the endgame tablebase used by the AI players")
+    parser.add_argument("--pieces", type=int, default=Tablebase.DEFAULT_MAX_PIECES_PER_SIDE, help="maximum number of pieces each player has")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per CPU core)")
+    parser.add_argument("--path", default=Tablebase.DEFAULT_PATH, help="file the tablebase is stored in")
+    args = parser.parse_args()
+
+    Tablebase.build(args.path, args.pieces, args.workers)
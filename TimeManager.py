@@ -0,0 +1,103 @@
+class TimeManager:
+
+    """Decides how long an AI player searches for each move. The time for a move is the AI player's TIME_FOR_MOVE, limited
+    by a share of the time left on the AI player's clock if the game has a total time for each player (with an increment
+    added to the clock after every move).
+
+    A search can stop before the time for the move has passed if the best move can no longer change: the search's
+    iteration rate is used to estimate how many iterations are left and the search stops if that is less than the gap
+    between the values of the best and second best moves. A search can also carry on after the time for the move has
+    passed (up to MAX_EXTENSION_FACTOR times as long) while the best move is still changing.
+
+    ####################################################################
+    CLASS A SKILL: Adaptive time control
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    # the time left on the clock is shared out as if this many more moves will be made
+    MOVES_TO_GO = 30
+
+    # the most of the time left on the clock that can be spent on one move
+    MAX_CLOCK_FRACTION = 0.25
+
+    # the time for a move can be extended up to this multiple of itself while the best move keeps changing
+    MAX_EXTENSION_FACTOR = 1.5
+
+    # once the time for a move has passed, the search stops if the best move has not changed for this fraction of the search
+    STABLE_FRACTION = 0.2
+
+    # number of iterations needed before the iteration rate is trusted to stop a search early
+    MIN_ITERATIONS = 200
+
+    # fraction of the remaining iterations that the second best move is assumed to be able to win. With 1 a search is only
+    # stopped when its best move certainly cannot change, a smaller fraction stops searches sooner but may change the move.
+    OVERTAKE_FRACTION = 1
+
+    def __init__(self, time_for_move=None, total_time=None, increment=0):
+        self.__time_for_move = time_for_move
+
+        # seconds left on the clock (None if the game does not have a clock)
+        self.__remaining_time = total_time
+        self.__increment = increment
+
+    def get_remaining_time(self):
+        return self.__remaining_time
+
+    def get_time_for_move(self):
+
+        """Returns the number of seconds to search for the next move, or None if there is no time limit"""
+
+        if self.__remaining_time == None:
+            return self.__time_for_move
+
+        clock_time = max(0, min(self.__remaining_time / TimeManager.MOVES_TO_GO + self.__increment, self.__remaining_time * TimeManager.MAX_CLOCK_FRACTION))
+
+        if self.__time_for_move == None:
+            return clock_time
+
+        return min(self.__time_for_move, clock_time)
+
+    def get_max_time_for_move(self, time_for_move):
+
+        """Returns the number of seconds a search with time_for_move can be extended to if the best move keeps changing"""
+
+        max_time_for_move = time_for_move * TimeManager.MAX_EXTENSION_FACTOR
+
+        if self.__remaining_time != None:
+            max_time_for_move = max(time_for_move, min(max_time_for_move, self.__remaining_time * TimeManager.MAX_CLOCK_FRACTION))
+
+        return max_time_for_move
+
+    def should_stop(self, elapsed_time, time_for_move, num_iterations, value_gap, stable_time):
+
+        """Returns True if a search should stop. elapsed_time is the time the search has run for, time_for_move is the time
+        the search was given (None for no limit), value_gap is the gap between the values of the best and second best moves
+        and stable_time is the time since the best move last changed."""
+
+        if time_for_move == None:
+            return False
+
+        if elapsed_time >= self.get_max_time_for_move(time_for_move):
+            return True
+
+        # the time for the move has passed, the search carries on if the best move has changed recently
+        if elapsed_time >= time_for_move:
+            return stable_time >= elapsed_time * TimeManager.STABLE_FRACTION
+
+        if num_iterations < TimeManager.MIN_ITERATIONS or elapsed_time <= 0:
+            return False
+
+        # each iteration changes the value of a move by at most 1, so the best move cannot be overtaken if the gap between
+        # the values of the best and second best moves is more than the number of iterations left
+        remaining_iterations = num_iterations / elapsed_time * (time_for_move - elapsed_time)
+
+        return value_gap > remaining_iterations * TimeManager.OVERTAKE_FRACTION
+
+    def record_move_time(self, move_time):
+
+        """Takes the time spent on a move off the clock and adds the increment"""
+
+        if self.__remaining_time != None:
+            self.__remaining_time = self.__remaining_time - move_time + self.__increment
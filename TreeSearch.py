@@ -1,80 +1,353 @@
 import math
 from MultiClassBoardAttributes import MultiClassBoardAttributes
+from BitBoard import BitBoard
+from RolloutPolicy import RolloutPolicy
+from Evaluation import Evaluation
+from TimeManager import TimeManager
+from Tablebase import Tablebase
+from DrawRule import DrawRule
+from array import array
+from collections import OrderedDict
+import multiprocessing
+import random
 import time
-from copy import deepcopy
 
-class Node:
+try:
+    import numpy
+except ImportError:
+    # numpy is optional, without it NodeArena selects children with a Python loop
+    numpy = None
 
-    """Node class reprsenting a node in the game tree"""
+class NodeArena:
 
-    def __init__(self, board, depth, move_obj=None):
+    """Stores every node of a game tree in arrays (a struct of arrays) instead of one object per node. A node is an
+    integer index into the node arrays:
 
-        # the board object of the node
-        self.__board = board
+        visited_counts[node]    number of times the node has been visited
+        values[node]            total result of the rollouts through the node
+        position_hashes[node]   Zobrist hash of the position the node represents
+        first_edges[node]       index of the node's first edge in the edge arrays
+        num_edges[node]         number of children of the node
+        proven_results[node]    game theoretic result of the node if it has been proven (see GameTree), otherwise UNPROVEN
 
-        # the move that led to this node
-        self.__move_obj = move_obj
+    Nodes do not store a board, the board of a node is reached by making the moves on the path from the root node on
+    the GameTree's working board. The edges of a node are next to each other in the edge arrays (edge_children holds the
+    index of the child node and edge_moves the BitBoard move code of the move that leads to it) because all of a node's
+    moves are added when it is expanded. The child node of an edge is only created when the edge is first selected,
+    until then edge_children holds UNEXPANDED. Positions reached by different move orders share a single node (see
+    TranspositionTable), so a node can have more than one parent and the GameTree keeps the path from the root node
+    instead of nodes storing a parent index.
 
-        # UCB1 parameters
-        self.__value = 0
-        self.__visited_count = 0
+    If numpy is installed, the UCB1 values of a node's children are calculated on numpy views of the arrays and the best
+    child is found with a single argmax. Otherwise the arrays are read in a Python loop.
 
-        # the children of the node (list of Node objects)
-        self.__children = []
+    ####################################################################
+    CLASS A SKILL: Struct of arrays data structure
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    # numpy is only faster than a Python loop when a node has enough children to make up for the cost of making the views
+    NUMPY_MIN_CHILDREN = 48
+
+    # child index of an edge whose child node has not been created yet
+    UNEXPANDED = -1
+
+    # proven result of a node that has not been proven (proven results are GameTree.LOSS, GameTree.DRAW or GameTree.WIN)
+    UNPROVEN = 2
+
+    def __init__(self):
+
+        # node arrays
+        self.__visited_counts = array("q")
+        self.__values = array("d")
+        self.__position_hashes = array("Q")
+        self.__first_edges = array("q")
+        self.__num_edges = array("q")
+        self.__proven_results = array("b")
+
+        # edge arrays
+        self.__edge_children = array("q")
+        self.__edge_moves = array("H")
+
+    def add_node(self, position_hash):
+        """adds a node with no children and no visits for the position with position_hash and returns its index"""
+
+        self.__visited_counts.append(0)
+        self.__values.append(0)
+        self.__position_hashes.append(position_hash)
+        self.__first_edges.append(0)
+        self.__num_edges.append(0)
+        self.__proven_results.append(NodeArena.UNPROVEN)
+
+        return len(self.__visited_counts) - 1
+
+    def set_children(self, node, move_codes, child_nodes=None):
+        """sets the moves from node to its children. child_nodes[i] is the node that move_codes[i] leads to, if child_nodes
+        is None the child nodes are left UNEXPANDED."""
+
+        if child_nodes == None:
+            child_nodes = [NodeArena.UNEXPANDED] * len(move_codes)
+
+        self.__first_edges[node] = len(self.__edge_children)
+        self.__num_edges[node] = len(move_codes)
+
+        self.__edge_children.extend(child_nodes)
+        self.__edge_moves.extend(move_codes)
+
+    def set_child(self, node, child_offset, child):
+        """sets the child node that the node's edge at child_offset leads to"""
+
+        self.__edge_children[self.__first_edges[node] + child_offset] = child
+
+    def remove_children(self, node):
+        """removes all of the node's children so the node becomes a leaf node again. The node's statistics are kept.
+        The node's edges stay in the edge arrays until the arena is compacted."""
+
+        self.__num_edges[node] = 0
+
+    def get_num_nodes(self):
+        return len(self.__visited_counts)
+
+    def get_num_children(self, node):
+        return self.__num_edges[node]
+
+    def get_children(self, node):
+        """returns an array of the indexes of the node's children (UNEXPANDED for children that have not been created)"""
+
+        first_edge = self.__first_edges[node]
+
+        return self.__edge_children[first_edge:first_edge + self.__num_edges[node]]
+
+    def get_child_moves(self, node):
+        """returns an array of the move codes of the moves that lead to the node's children"""
+
+        first_edge = self.__first_edges[node]
+
+        return self.__edge_moves[first_edge:first_edge + self.__num_edges[node]]
+
+    def get_child(self, node, child_offset):
+        return self.__edge_children[self.__first_edges[node] + child_offset]
+
+    def get_child_move(self, node, child_offset):
+        return self.__edge_moves[self.__first_edges[node] + child_offset]
+
+    def get_visited_count(self, node):
+        return self.__visited_counts[node]
+
+    def get_value(self, node):
+        return self.__values[node]
+
+    def get_position_hash(self, node):
+        return self.__position_hashes[node]
+
+    def get_proven_result(self, node):
+        return self.__proven_results[node]
+
+    def set_proven_result(self, node, proven_result):
+        self.__proven_results[node] = proven_result
+
+    def add_result(self, node, result):
+        """increments the visited count of the node by 1 and adds result to its value. Called during backpropagation."""
+
+        self.__visited_counts[node] += 1
+        self.__values[node] += result
+
+    def select_child(self, node, exploration_constant, num_considered=None):
+
+        """returns the offset (position among the node's children) of the child with the highest UCB1 value. An unvisited
+        or UNEXPANDED child has an infinite UCB1 value, so the first one is returned if there is one. Only the first
+        num_considered children are considered (all of them if num_considered is None). Children with a proven result are
+        skipped because searching them cannot change their result. Returns None if every child considered is proven.
+
+        ####################################################################
+        CLASS A SKILL: Vectorised calculation of the UCB1 formula
+        ####################################################################
+
+        """
+
+        num_children = self.__num_edges[node]
+        first_edge = self.__first_edges[node]
+
+        if num_considered != None and num_considered < num_children:
+            num_children = num_considered
+
+        parent_visited_count = self.__visited_counts[node]
+
+        # a node can have visited children before it has been visited itself if they are shared with another node
+        if parent_visited_count > 0:
+            log_parent_visited_count = math.log(parent_visited_count)
+        else:
+            log_parent_visited_count = 0
+
+        if numpy != None and num_children >= NodeArena.NUMPY_MIN_CHILDREN:
+            children = numpy.frombuffer(self.__edge_children, dtype=numpy.int64, count=num_children, offset=first_edge * self.__edge_children.itemsize)
+            unexpanded = children == NodeArena.UNEXPANDED
+
+            # UNEXPANDED children read node 0's statistics, they are selected before their statistics are used
+            children = numpy.where(unexpanded, 0, children)
+            visited_counts = numpy.frombuffer(self.__visited_counts, dtype=numpy.int64)[children]
+            proven = ~unexpanded & (numpy.frombuffer(self.__proven_results, dtype=numpy.int8)[children] != NodeArena.UNPROVEN)
+
+            unvisited = numpy.flatnonzero(unexpanded | ((visited_counts == 0) & ~proven))
+
+            if len(unvisited) > 0:
+                return int(unvisited[0])
+
+            if proven.all():
+                return None
+
+            # proven children can be unvisited, so visited counts of 0 are replaced with 1 to avoid dividing by zero
+            visited_counts = numpy.maximum(visited_counts, 1)
+
+            values = numpy.frombuffer(self.__values, dtype=numpy.float64)[children]
+            ucb1_scores = values / visited_counts + exploration_constant * numpy.sqrt(log_parent_visited_count / visited_counts)
+
+            return int(numpy.argmax(numpy.where(proven, -numpy.inf, ucb1_scores)))
+
+        edge_children = self.__edge_children
+        visited_counts = self.__visited_counts
+        values = self.__values
+        proven_results = self.__proven_results
+
+        best_offset = None
+        best_score = -math.inf
+
+        for child_offset in range(num_children):
+            child = edge_children[first_edge + child_offset]
+
+            if child == NodeArena.UNEXPANDED:
+                return child_offset
+
+            if proven_results[child] != NodeArena.UNPROVEN:
+                continue
+
+            visited_count = visited_counts[child]
+
+            if visited_count == 0:
+                return child_offset
+
+            # using the UCB1 formula
+            score = values[child] / visited_count + exploration_constant * math.sqrt(log_parent_visited_count / visited_count)
+
+            if score > best_score:
+                best_offset = child_offset
+                best_score = score
+
+        return best_offset
+
+    def compacted(self, root):
+
+        """returns a new NodeArena containing only the nodes that can be reached from root, with root as node 0.
+        Used to free the memory of nodes that have been removed from the tree."""
+
+        new_arena = NodeArena()
+
+        # maps the index of a node in this arena to its index in the new arena
+        new_indexes = {root: new_arena.add_node(self.__position_hashes[root])}
+        queue = [root]
+        queue_index = 0
+
+        # breadth first traversal so every node is added to the new arena before its children are set
+        while queue_index < len(queue):
+            node = queue[queue_index]
+            queue_index += 1
+
+            child_nodes = []
 
-        # the parent of the node (Node object)
-        self.__parent = None
+            for child in self.get_children(node):
+                if child == NodeArena.UNEXPANDED:
+                    child_nodes.append(child)
+                    continue
 
-        # the depth of the node in the tree (root node has depth 0)
-        self.__depth = depth
+                if child not in new_indexes:
+                    new_indexes[child] = new_arena.add_node(self.__position_hashes[child])
+                    queue.append(child)
 
-    def get_board(self):
-        return self.__board
+                child_nodes.append(new_indexes[child])
 
-    def add_child(self, child):
-        """adds a child to the node. child is a Node object."""
+            new_node = new_indexes[node]
+            new_arena.__visited_counts[new_node] = self.__visited_counts[node]
+            new_arena.__values[new_node] = self.__values[node]
+            new_arena.__proven_results[new_node] = self.__proven_results[node]
+            new_arena.set_children(new_node, self.get_child_moves(node), child_nodes)
 
-        self.__children.append(child)
-        child.set_parent(self)
+        return new_arena
 
-    def set_parent(self, parent):
-        self.__parent = parent
+class TranspositionTable:
 
-    def get_parent(self):
-        return self.__parent
-    
-    def get_depth(self):
-        """returns the depth of the node in the tree"""
+    """A bounded table mapping a position key (Zobrist hash, colour of the player to move) to the index of the node
+    representing that position in a NodeArena. When the table is full, the least recently used entry is evicted. An
+    evicted node stays in the tree, it just can no longer be shared by new paths.
 
-        return self.__depth
-    
-    def get_move_obj(self):
-        return self.__move_obj
-    
-    def get_visited_count(self):
-        return self.__visited_count
-    
-    def increment_visited_count(self):
-        """increments the visited count of the node by 1. This is called when the node is visited during an MCTS simulation."""
+    ####################################################################
+    CLASS A SKILL: Hash table with least recently used eviction
+    ####################################################################
+
+    """
+
+    DEFAULT_MAX_ENTRIES = 200000
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+
+        # ordered from least recently used to most recently used
+        self.__table = OrderedDict()
+
+        self.__max_entries = max_entries
+
+        # number of lookups that found an existing node
+        self.__num_hits = 0
+
+    def get_node(self, key):
+
+        """returns the node index stored for key (marking it as recently used) or None if there is no entry"""
+
+        node = self.__table.get(key)
+
+        if node != None:
+            self.__table.move_to_end(key)
+            self.__num_hits += 1
 
-        self.__visited_count += 1
-    
-    def get_children(self):
-        return self.__children
-    
-    def get_value(self):
-        return self.__value
-    
-    def add_to_value(self, value):
-        """updates the value of the node by adding the value passed in to the current value.
-        This is called when the node is visited during an MCTS simulation."""
+        return node
 
-        self.__value += value
+    def add_node(self, key, node):
+
+        """stores node for key, evicting the least recently used entry if the table is full"""
+
+        self.__table[key] = node
+        self.__table.move_to_end(key)
+
+        if len(self.__table) > self.__max_entries:
+            self.__table.popitem(last=False)
+
+    def get_size(self):
+        return len(self.__table)
+
+    def clear(self):
+        self.__table.clear()
+
+    def get_num_hits(self):
+        return self.__num_hits
 
 class GameTree:
 
-    """GameTree class representing the game tree created by the MCTS algorithm
-    
+    """GameTree class representing the game tree created by the MCTS algorithm. The search uses a single working
+    board: moves are made with make_move_code while walking down the tree and during rollouts and are reversed with
+    unmake_move_code afterwards, so the working board is the only copy of the root board that is made. Moves are stored
+    as BitBoard move codes and a Move object is only made for a move returned from the root node.
+
+    Nodes are stored in a NodeArena and are looked up in a transposition table when they are created, so the tree is a
+    directed acyclic graph in which the statistics of a position are shared by every path that reaches it.
+
+    The search is an MCTS-Solver: a node whose player to move has no pieces left is proven (a win or loss for the AI)
+    when it is created, and proven results are propagated up the tree with the minimax rules. A node is a proven win for
+    the player to move if one of its children is, a proven loss if all of its children are proven wins for the opponent
+    and a proven draw if all of its children are proven and none of them win. If the tree has a Tablebase, a node whose
+    position is in the tablebase is proven when it is created and its rollouts return the proven result. Proven children
+    are skipped during selection, the best move is a proven win if there is one and the search ends as soon as the root
+    node is proven.
+
     ####################################################################
     CLASS A SKILL: Monte Carlo Tree Search (MCTS)
     CLASS A SKILL: Tree data structure and tree traversal
@@ -88,61 +361,162 @@ class GameTree:
     LOSS = -1
     DRAW = 0
     WIN = 1
-    
-    # moves before early stop 
+
+    # default number of moves before a rollout is stopped early
     MOVES_PER_ROLLOUT = 500
 
+    # fewest moves before a position can occur again with the same player to move (each player moves away and back)
+    PLIES_PER_REPETITION = 4
+
     # exploration constant for the UCB1 formula
     EXPLORATION_CONSTANT = 2
 
-    def __init__(self, root_board, time_for_move):
+    # seconds between calls to the progress callback during a search
+    PROGRESS_INTERVAL = 0.5
+
+    # number of iterations between checks of the best move when the search has a TimeManager
+    BEST_MOVE_CHECK_INTERVAL = 16
 
-        self.__root = Node(root_board, depth=0)
+    # maximum number of nodes in the tree (roughly 300 bytes each) and the fraction of that number the tree is pruned down to
+    DEFAULT_MAX_NODES = 250000
+    PRUNE_TARGET_FRACTION = 0.75
+
+    # with progressive widening a node visited n times only selects from its first
+    # PROGRESSIVE_WIDENING_CONSTANT * n ** PROGRESSIVE_WIDENING_EXPONENT moves (rounded up)
+    PROGRESSIVE_WIDENING_CONSTANT = 2
+    PROGRESSIVE_WIDENING_EXPONENT = 0.5
+
+    def __init__(self, root_board, time_for_move, max_transpositions=TranspositionTable.DEFAULT_MAX_ENTRIES, max_iterations=None, root_colour=None, max_nodes=DEFAULT_MAX_NODES, progressive_widening=False, rollout_policy=None,
+                 rollout_horizon=MOVES_PER_ROLLOUT, evaluation=None, time_manager=None, tablebase=None, draw_rule=None):
+
+        # snapshot of the root board that the search makes and unmakes moves on
+        self.__board = BitBoard(root_board.get_game_state_string())
+
+        # 0 if the AI (player 2) moves at the root node, 1 if player 1 moves at the root node (used when pondering)
+        self.__root_depth_offset = self.__get_root_depth_offset(root_colour)
+
+        # arrays storing the nodes of the tree (nodes are indexes into the arena)
+        self.__arena = NodeArena()
+
+        # table of nodes shared between paths that reach the same position
+        self.__transpositions = TranspositionTable(max_transpositions)
+
+        # number of nodes in the tree and the number of nodes the tree can grow to before it is pruned
+        self.__num_nodes = 0
+        self.__max_nodes = max_nodes
+
+        # tree size statistics
+        self.__num_prunes = 0
+        self.__num_nodes_pruned = 0
+
+        # if True, the number of moves a node selects from grows with its visited count (moves are ordered by __order_moves)
+        self.__progressive_widening = progressive_widening
+
+        # chooses the moves played in rollouts
+        if rollout_policy == None:
+            rollout_policy = RolloutPolicy()
+
+        self.__rollout_policy = rollout_policy
+
+        # number of moves after which a rollout is stopped early and the Evaluation used to score the position it stopped at
+        # (if evaluation is None the position is scored as a win, loss or draw by comparing piece counts)
+        self.__rollout_horizon = rollout_horizon
+        self.__evaluation = evaluation
+
+        # endgame Tablebase used to prove nodes with few pieces left (None if there is no tablebase)
+        self.__tablebase = tablebase
+
+        # DrawRule that ends rollouts as a draw (None if rollouts only end at a terminal position or the rollout horizon)
+        self.__draw_rule = draw_rule
+
+        self.__root = self.__get_or_create_node(0)
 
         # the maximum depth of a node in the tree
         self.__current_tree_depth = 0
 
-        # time allowed for the MCTS algorithm to run
+        # time allowed for the MCTS algorithm to run (None for no time limit)
         self.__time_for_move = time_for_move
 
+        # if a TimeManager is given it decides when the search stops, so the search can stop early when the best move cannot
+        # change or carry on while it is still changing (otherwise the search always runs for time_for_move)
+        self.__time_manager = time_manager
+
+        # maximum number of MCTS iterations per search (None for no limit). A search with a fixed number of iterations
+        # and a seeded random module always gives the same result.
+        self.__max_iterations = max_iterations
+
+        # nodes and move codes on the path from the root node to the current node (path_moves[i] leads to path[i + 1])
+        self.__path = [self.__root]
+        self.__path_moves = []
+
         self.__current_node = self.__root
 
+    @staticmethod
+    def __get_root_depth_offset(root_colour):
+        """returns the number added to a depth in the tree so that even depths are player 2's turn. root_colour is the colour
+        of the player to move at the root node (None for player 2)."""
+
+        if root_colour == MultiClassBoardAttributes.player_1_colour:
+            return 1
+
+        return 0
+
     def __get_current_player_colour(self, depth):
         """returns the colour of the current player based on a depth in the tree"""
 
+        depth += self.__root_depth_offset
+
         # if the depth is even, it's player 2's (the AI) turn
         if depth % 2 == 0:
             return MultiClassBoardAttributes.player_2_colour
-        
+
         # if the depth is odd, it's player 1's turn
         elif depth % 2 == 1:
             return MultiClassBoardAttributes.player_1_colour
 
-    def __add_node(self, child_board, move_obj):
-        """adds a node to the tree. child_board is the board state of the new node, and move_obj is the move that led to the node."""
+    def __get_current_depth(self):
+        """returns the depth of the current node on the path from the root node (root node has depth 0)"""
 
-        new_depth = self.__current_node.get_depth() + 1
-        child = Node(child_board, new_depth, move_obj)
+        return len(self.__path) - 1
 
-        self.__current_node.add_child(child)
+    def __get_or_create_node(self, depth):
 
-    def __calc_UCB1(self, node):
-        
-        """returns the UCB1 value of a node used to determine which node to select next in the MCTS algorithm
-        
-        ####################################################################
-        EXCELLENT CODING STYLE: Good exception handling
-        ####################################################################
-        
-        """
-        
-        # using the UCB1 formula
-        try:
-            return (node.get_value() / node.get_visited_count()) + (GameTree.EXPLORATION_CONSTANT * math.sqrt(math.log(node.get_parent().get_visited_count()) / node.get_visited_count()))
+        """returns the node for the position on the working board with the player to move at depth. An existing node
+        is returned if the position is in the transposition table, otherwise a new node is created and stored."""
+
+        key = (self.__board.get_hash(), self.__get_current_player_colour(depth))
+
+        node = self.__transpositions.get_node(key)
+
+        if node == None:
+            node = self.__arena.add_node(self.__board.get_hash())
+            self.__transpositions.add_node(key, node)
+            self.__num_nodes += 1
+
+            # a position where a player has no pieces left is a proven result
+            terminal_board_result = self.__check_terminal_board(self.__board)
+            if terminal_board_result:
+                self.__arena.set_proven_result(node, terminal_board_result)
+
+            # the root node is not probed so its moves are still searched (AI players make tablebase moves without searching)
+            elif self.__tablebase != None and depth > 0:
+                plies = self.__tablebase.probe(self.__board, self.__get_current_player_colour(depth))
+
+                if plies != None:
+                    self.__arena.set_proven_result(node, self.__get_tablebase_result(plies, depth))
+
+        return node
+
+    def __get_tablebase_result(self, plies, depth):
+        """returns the result (from the AI's perspective) of a tablebase result for the player to move at depth"""
+
+        if plies == Tablebase.DRAW:
+            return GameTree.DRAW
+
+        if Tablebase.is_win(plies):
+            return self.__get_win_result(depth)
 
-        # if the node has not been visited yet (visited_count is 0), it's value is infinity
-        except ZeroDivisionError:
-            return math.inf
+        return -self.__get_win_result(depth)
 
     def __check_terminal_board(self, board):
 
@@ -150,111 +524,292 @@ class GameTree:
 
         if board.get_piece_count(1) == 0:
             return GameTree.WIN
-        
+
         elif board.get_piece_count(2) == 0:
             return GameTree.LOSS
-        
+
         return False
 
     def __get_early_stop_rollout_result(self, board):
 
         """returns the result of the board (1 for AI win, -1 for AI loss, 0 if neither player is winning according to the evaluation function)
-        if the rollout ends early because the maximum number of moves per rollout has been reached."""
+        if the rollout ends early because the maximum number of moves per rollout has been reached. If the tree has an Evaluation
+        the scaled evaluation of the board (between -1 and 1) is returned instead."""
+
+        if self.__evaluation != None:
+            return self.__evaluation.evaluate(board)
 
         if board.get_piece_count(1) > board.get_piece_count(2):
             return GameTree.LOSS
-        
+
         elif board.get_piece_count(1) < board.get_piece_count(2):
             return GameTree.WIN
-        
+
         else:
             return GameTree.DRAW
-        
-    def __get_current_legal_moves(self):
-        """returns the legal moves for the current node"""
 
-        # board object of the current node
-        board = self.__current_node.get_board()
+    def __get_win_result(self, depth):
+        """returns the result (WIN or LOSS, from the AI's perspective) of a win for the player to move at depth"""
 
-        curr_depth = self.__current_node.get_depth()
-        current_player_colour = self.__get_current_player_colour(curr_depth)
+        if self.__get_current_player_colour(depth) == MultiClassBoardAttributes.player_2_colour:
+            return GameTree.WIN
+
+        return GameTree.LOSS
+
+    def __get_child_proven_result(self, child):
+        """returns the proven result of a child node (UNPROVEN if the child is UNEXPANDED)"""
+
+        if child == NodeArena.UNEXPANDED:
+            return NodeArena.UNPROVEN
+
+        return self.__arena.get_proven_result(child)
+
+    def __get_current_legal_moves(self):
+        """returns the move codes of the legal moves for the current node. The working board must be at the current node's position."""
+
+        current_player_colour = self.__get_current_player_colour(self.__get_current_depth())
 
         # get the legal moves for the current player
-        return board.get_player_legal_moves(current_player_colour)
+        return self.__board.get_player_move_codes(current_player_colour)
+
+    @staticmethod
+    def __order_moves(move_codes):
+        """returns the move codes ordered by a cheap prior so the most promising moves are expanded first: captures come
+        before normal moves (the sort is stable so moves of the same type keep their order)"""
+
+        return sorted(move_codes, key=lambda move_code: not move_code & BitBoard.MOVE_CODE_CAPTURE_FLAG)
+
+    def __get_num_considered_children(self):
+        """returns the number of the current node's moves that selection chooses from, or None to choose from all of them"""
+
+        if not self.__progressive_widening:
+            return None
+
+        visited_count = self.__arena.get_visited_count(self.__current_node)
+
+        return max(1, math.ceil(GameTree.PROGRESSIVE_WIDENING_CONSTANT * visited_count ** GameTree.PROGRESSIVE_WIDENING_EXPONENT))
+
+    def __get_child(self, child_offset):
+        """returns the current node's child at child_offset. If the child has not been created yet (the move leading to it
+        is UNEXPANDED), the child node is found in the transposition table or created."""
+
+        child = self.__arena.get_child(self.__current_node, child_offset)
+
+        if child == NodeArena.UNEXPANDED:
+            move_code = self.__arena.get_child_move(self.__current_node, child_offset)
+
+            # the move is made on the working board to find the hash of the child's position
+            self.__board.make_move_code(move_code)
+            child = self.__get_or_create_node(self.__get_current_depth() + 1)
+            self.__board.unmake_move_code(move_code)
+
+            self.__arena.set_child(self.__current_node, child_offset, child)
+
+        return child
 
     def __current_is_leaf(self):
         """returns True if the current node is a leaf node in the tree, otherwise returns False"""
 
-        return len(self.__current_node.get_children()) == 0
-    
-    def __select_new_current(self):
+        return self.__arena.get_num_children(self.__current_node) == 0
+
+    def __move_to_child(self, child_offset):
 
-        """selects a new current node to be the node with the highest UCB1 value among the current node's children"""
+        """sets the current node to the current node's child at child_offset and makes the move leading to it on the working board"""
 
-        # list of tuples of the form (node, UCB1 value) for each child of the current node
-        ucb1_scores = [(node, self.__calc_UCB1(node)) for node in self.__current_node.get_children()]
+        move_code = self.__arena.get_child_move(self.__current_node, child_offset)
 
-        # set the current node to the child with the highest UCB1 value
-        self.__current_node = max(ucb1_scores, key=lambda x: x[1])[0]
+        self.__current_node = self.__get_child(child_offset)
+        self.__board.make_move_code(move_code)
+
+        self.__path.append(self.__current_node)
+        self.__path_moves.append(move_code)
 
         # update the maximum depth of the tree if the current node's depth is greater than the current maximum depth
-        if self.__current_tree_depth < self.__current_node.get_depth():
-            self.__current_tree_depth = self.__current_node.get_depth()
+        if self.__current_tree_depth < self.__get_current_depth():
+            self.__current_tree_depth = self.__get_current_depth()
+
+    def __return_to_root(self):
+
+        """undoes the moves on the path from the root node to the current node on the working board and resets the current node to the root node"""
+
+        for move_code in reversed(self.__path_moves):
+            self.__board.unmake_move_code(move_code)
+
+        self.__path = [self.__root]
+        self.__path_moves = []
+        self.__current_node = self.__root
+
+    def __select_new_current(self):
+
+        """selects a new current node to be the node with the highest UCB1 value among the current node's children.
+        Returns False without selecting if that child is already on the path (the position has been repeated), otherwise returns True."""
+
+        # offset of the child with the highest UCB1 value
+        best_offset = self.__arena.select_child(self.__current_node, GameTree.EXPLORATION_CONSTANT, self.__get_num_considered_children())
+
+        # with progressive widening every move considered may be proven, so all of the node's moves are considered instead
+        if best_offset == None:
+            best_offset = self.__arena.select_child(self.__current_node, GameTree.EXPLORATION_CONSTANT)
+
+        if best_offset == None:
+            return False
+
+        # following a repeated position would loop forever, so the selection stops at the current node
+        if self.__get_child(best_offset) in self.__path:
+            return False
+
+        self.__move_to_child(best_offset)
+
+        return True
 
     def __node_expansion(self):
 
-        """expands the current node by adding all of its legal moves as children"""
+        """expands the current node by adding all of its legal moves. The child nodes are created lazily, when a move
+        is first selected (see __get_child)."""
 
         # list of legal moves for the current node
-        legal_moves = self.__get_current_legal_moves()
+        legal_moves = self.__order_moves(self.__get_current_legal_moves())
 
-        for move_obj in legal_moves:
+        self.__arena.set_children(self.__current_node, legal_moves)
 
-            # make a deep copy of the current node's board and make the move on the copy (so that the original board is not modified)
-            board = deepcopy(self.__current_node.get_board())
-            board.move_piece(move_obj)
-
-            self.__add_node(board, move_obj)
-    
     def __rollout(self):
 
-        """performs a rollout from the current node to a terminal node or to the rollout depth and returns the result of the rollout"""
-        
-        # deepcopy the current node's board so that the original board is not modified
-        rollout_board = deepcopy(self.__current_node.get_board())
+        """performs a rollout from the current node to a terminal node or to the rollout depth and returns the result of the rollout.
+        The rollout moves are made on the working board and undone before the result is returned."""
+
+        # the result of a proven node is known, so it does not need a rollout
+        proven_result = self.__arena.get_proven_result(self.__current_node)
+        if proven_result != NodeArena.UNPROVEN:
+            return proven_result
+
+        # moves made during the rollout so they can be undone in reverse order
+        rollout_moves = []
 
-        num_moves = 0
+        # hashes of the positions since the last capture (a capture cannot be undone, so earlier positions cannot repeat),
+        # used to end the rollout when the DrawRule draws it
+        positions_since_capture = [self.__board.get_hash()]
 
-        while num_moves < GameTree.MOVES_PER_ROLLOUT:
+        result = None
 
-            # check if the board is terminal and if so return the result of the rollout
-            terminal_board_result = self.__check_terminal_board(rollout_board)
+        while len(rollout_moves) < self.__rollout_horizon:
+
+            # check if the board is terminal and if so stop the rollout
+            terminal_board_result = self.__check_terminal_board(self.__board)
             if terminal_board_result:
-                return terminal_board_result
-            
+                result = terminal_board_result
+                break
+
             # get the colour of the current player based on the depth of the current node
-            current_depth = self.__current_node.get_depth() + num_moves
+            current_depth = self.__get_current_depth() + len(rollout_moves)
             rollout_colour = self.__get_current_player_colour(current_depth)
 
-            simulated_move = rollout_board.get_single_random_legal_move(rollout_colour)
-            rollout_board.move_piece(simulated_move)
-            
-            num_moves += 1
+            simulated_move = self.__rollout_policy.choose_move_code(self.__board, rollout_colour)
+
+            # a player whose pieces are all blocked has no legal moves so the rollout ends and is evaluated as an early stop
+            if simulated_move == None:
+                break
+
+            self.__board.make_move_code(simulated_move)
+            rollout_moves.append(simulated_move)
+
+            if self.__draw_rule != None and self.__is_rollout_draw(simulated_move, positions_since_capture):
+                result = GameTree.DRAW
+                break
+
+        # max rollout depth reached. The last move of the rollout may have captured the last piece, so the board is
+        # checked for a win before it is evaluated (the Evaluation does not score a finished game as a win or loss)
+        if result == None:
+            result = self.__check_terminal_board(self.__board) or self.__get_early_stop_rollout_result(self.__board)
+
+        # return the working board to the current node's position
+        for move_code in reversed(rollout_moves):
+            self.__board.unmake_move_code(move_code)
+
+        return result
+
+    def __is_rollout_draw(self, move_code, positions_since_capture):
+
+        """adds the position on the working board (reached by move_code) to positions_since_capture and returns True if the
+        DrawRule draws the rollout"""
+
+        if move_code & BitBoard.MOVE_CODE_CAPTURE_FLAG:
+            positions_since_capture.clear()
+
+        position_hash = self.__board.get_hash()
+        positions_since_capture.append(position_hash)
+
+        moves_since_capture = len(positions_since_capture) - 1
+
+        if self.__draw_rule.is_no_capture_draw(moves_since_capture):
+            return True
+
+        # a position can only occur again with the same player to move after at least PLIES_PER_REPETITION moves, so the
+        # positions are only counted once there have been enough moves for the repetition limit to be reached
+        repetition_limit = self.__draw_rule.get_repetition_limit()
+
+        if repetition_limit == None or moves_since_capture < GameTree.PLIES_PER_REPETITION * (repetition_limit - 1):
+            return False
+
+        # positions with the same player to move are every other entry, counting back from the current position
+        return self.__draw_rule.is_repetition_draw(positions_since_capture[::-2].count(position_hash))
 
-        # max rollout depth reached
-        return self.__get_early_stop_rollout_result(rollout_board)
-        
     def __backpropagate(self, result):
 
-        """backpropagates the result of a rollout up the tree"""
+        """backpropagates the result of a rollout along the path from the current node to the root node"""
+
+        for node in self.__path:
+            self.__arena.add_result(node, result)
+
+        self.__update_proven_results()
+
+    def __get_proven_result_from_children(self, node, depth):
+        """returns the proven result of a node at depth using the minimax rules on the proven results of its children,
+        or UNPROVEN if the node cannot be proven yet"""
+
+        win_result = self.__get_win_result(depth)
+        all_children_lost = self.__arena.get_num_children(node) > 0
+        all_children_proven = all_children_lost
+
+        for child in self.__arena.get_children(node):
+            child_proven_result = self.__get_child_proven_result(child)
+
+            # the player to move can make a move that wins
+            if child_proven_result == win_result:
+                return win_result
+
+            if child_proven_result != -win_result:
+                all_children_lost = False
+
+            if child_proven_result == NodeArena.UNPROVEN:
+                all_children_proven = False
+
+        # every move the player to move can make loses
+        if all_children_lost:
+            return -win_result
+
+        # no move wins and at least one move draws
+        if all_children_proven:
+            return GameTree.DRAW
 
-        node = self.__current_node
+        return NodeArena.UNPROVEN
 
-        # terminate the loop when the root node has had its value and visited count updated
-        while node != None:
-            node.increment_visited_count()
-            node.add_to_value(result)
-            node = node.get_parent()
+    def __update_proven_results(self):
+
+        """proves the nodes on the path from the current node to the root node that can now be proven. A node can only
+        become proven if its child on the path has been proven, so the update stops at the first node that is not proven."""
+
+        for depth in range(self.__get_current_depth(), -1, -1):
+            node = self.__path[depth]
+
+            if self.__arena.get_proven_result(node) != NodeArena.UNPROVEN:
+                continue
+
+            proven_result = self.__get_proven_result_from_children(node, depth)
+
+            if proven_result == NodeArena.UNPROVEN:
+                break
+
+            self.__arena.set_proven_result(node, proven_result)
 
     def __run_MCTS_iteration(self):
 
@@ -262,14 +817,19 @@ class GameTree:
 
         # 1. Selection
         while not self.__current_is_leaf():
-            self.__select_new_current()
+            if not self.__select_new_current():
+                break
 
-        if self.__current_node.get_visited_count() != 0:
+        if self.__current_is_leaf() and self.__arena.get_visited_count(self.__current_node) != 0:
 
             # 2. Expansion
             self.__node_expansion()
-            if not self.__current_is_leaf(): # terminal nodes will not have children
-                self.__current_node = self.__current_node.get_children()[0]
+
+            # move to the first child that is not a repeat of a position on the path (terminal nodes will not have children)
+            for child_offset in range(self.__arena.get_num_children(self.__current_node)):
+                if self.__get_child(child_offset) not in self.__path:
+                    self.__move_to_child(child_offset)
+                    break
 
         # 3. Rollout/Simulation
         result = self.__rollout()
@@ -277,26 +837,537 @@ class GameTree:
         # 4. Backpropagation
         self.__backpropagate(result)
 
-        # reset the current node to the root node for the next iteration
+        # reset the current node and the working board to the root node for the next iteration
+        self.__return_to_root()
+
+    def __compact_tree(self):
+
+        """replaces the arena with one containing only the nodes that can be reached from the root node and rebuilds the
+        transposition table from those nodes, so that nodes which can no longer be reached are not kept in memory. Also
+        recounts the nodes in the tree. The working board must be at the root node."""
+
+        self.__arena = self.__arena.compacted(self.__root)
+        self.__root = 0
+        self.__path = [self.__root]
         self.__current_node = self.__root
 
-    def get_next_move(self):
+        self.__transpositions.clear()
+
+        # depth first traversal from the root node with a stack of (node, depth) pairs
+        stack = [(self.__root, 0)]
+        visited = set()
+
+        while len(stack) > 0:
+            node, depth = stack.pop()
+
+            if node in visited:
+                continue
+
+            visited.add(node)
+            self.__transpositions.add_node((self.__arena.get_position_hash(node), self.__get_current_player_colour(depth)), node)
+
+            for child in self.__arena.get_children(node):
+                if child != NodeArena.UNEXPANDED:
+                    stack.append((child, depth + 1))
+
+        self.__num_nodes = self.__arena.get_num_nodes()
+
+    def __get_internal_nodes(self):
+
+        """returns a list of the nodes that can be reached from the root node and have children, not including the root node"""
+
+        internal_nodes = []
+        stack = list(self.__arena.get_children(self.__root))
+        visited = set()
+
+        while len(stack) > 0:
+            node = stack.pop()
+
+            if node == NodeArena.UNEXPANDED or node in visited or self.__arena.get_num_children(node) == 0:
+                continue
+
+            visited.add(node)
+            internal_nodes.append(node)
+            stack += self.__arena.get_children(node)
+
+        return internal_nodes
+
+    def __prune_tree(self):
+
+        """Reduces the tree to PRUNE_TARGET_FRACTION of the maximum number of nodes. The internal nodes with the lowest
+        visited counts have their children removed (least visited first) until enough nodes have been removed. A pruned
+        node keeps its statistics and is expanded again if the search selects it. The working board must be at the root node.
+
+        ####################################################################
+        CLASS A SKILL: Tree traversal and sorting
+        ####################################################################
+
+        """
+
+        num_nodes_before = self.__num_nodes
+        target_num_nodes = int(self.__max_nodes * GameTree.PRUNE_TARGET_FRACTION)
+
+        internal_nodes = self.__get_internal_nodes()
+        internal_nodes.sort(key=self.__arena.get_visited_count)
+
+        # the number of nodes removed is estimated from the number of created children removed (the exact number is counted below,
+        # shared and deeper nodes can make it larger)
+        estimated_num_nodes = self.__num_nodes
+
+        for node in internal_nodes:
+            if estimated_num_nodes <= target_num_nodes:
+                break
+
+            estimated_num_nodes -= len([child for child in self.__arena.get_children(node) if child != NodeArena.UNEXPANDED])
+            self.__arena.remove_children(node)
+
+        # the arena and the table would otherwise keep the removed nodes in memory
+        self.__compact_tree()
+
+        self.__num_prunes += 1
+        self.__num_nodes_pruned += num_nodes_before - self.__num_nodes
 
-        """Public method that runs the MCTS algorithm for a set amount of time and returns the best move to make"""
+    def __prune_tree_if_full(self):
+
+        """prunes the tree if it has reached the maximum number of nodes. Called at the root node between MCTS iterations."""
+
+        if self.__max_nodes != None and self.__num_nodes >= self.__max_nodes:
+            self.__prune_tree()
+
+    def get_tree_stats(self):
+
+        """returns a dictionary of statistics about the size of the tree"""
+
+        return {
+            "num_nodes": self.__num_nodes,
+            "max_nodes": self.__max_nodes,
+            "max_depth": self.__current_tree_depth,
+            "root_visited_count": self.__arena.get_visited_count(self.__root),
+            "num_prunes": self.__num_prunes,
+            "num_nodes_pruned": self.__num_nodes_pruned,
+            "transposition_hits": self.__transpositions.get_num_hits(),
+            "root_proven_result": self.get_root_proven_result(),
+        }
+
+    def set_root_position(self, board, root_colour=None):
+
+        """Re-roots the tree at the node representing the position on board with the player with root_colour to move
+        (None for player 2). The position must be the root node, one of its children or one of its grandchildren (for example
+        the position after the AI's move and the opponent's reply). The statistics of the new root's subtree are kept for the
+        next search. Returns True if the tree was re-rooted, otherwise returns False and the tree is unchanged."""
+
+        position_hash = board.get_hash()
+
+        if root_colour == None:
+            root_colour = MultiClassBoardAttributes.player_2_colour
+
+        new_root = None
+        new_root_depth = None
+
+        # nodes at depths 0, 1 and 2 from the current root node
+        depth_nodes = [self.__root]
+
+        for depth in range(3):
+            for node in depth_nodes:
+                if new_root == None and self.__arena.get_position_hash(node) == position_hash and self.__get_current_player_colour(depth) == root_colour:
+                    new_root = node
+                    new_root_depth = depth
+
+            depth_nodes = [child for node in depth_nodes for child in self.__arena.get_children(node) if child != NodeArena.UNEXPANDED]
+
+        if new_root == None:
+            return False
+
+        # new snapshot of the root board for the working board
+        self.__board = BitBoard(board.get_game_state_string())
+
+        self.__root_depth_offset = (self.__root_depth_offset + new_root_depth) % 2
+        self.__root = new_root
+        self.__current_tree_depth = 0
+        self.__return_to_root()
+        self.__compact_tree()
+
+        return True
+
+    def get_root_visited_count(self):
+        return self.__arena.get_visited_count(self.__root)
+
+    def get_root_proven_result(self):
+        """returns the proven result of the root node (WIN, LOSS or DRAW from the AI's perspective) or NodeArena.UNPROVEN"""
+
+        return self.__arena.get_proven_result(self.__root)
+
+    def set_time_for_move(self, time_for_move):
+        self.__time_for_move = time_for_move
+
+    def get_transposition_count(self):
+        """returns the number of times a node was shared through the transposition table instead of being created"""
+
+        return self.__transpositions.get_num_hits()
+
+    def get_root_child_stats(self):
+
+        """returns a dictionary mapping the key of each move from the root node (see GameTree.get_move_key) to a tuple
+        (visited count, value, proven result) of the child it leads to"""
+
+        root_child_stats = {}
+
+        for child, move_code in zip(self.__arena.get_children(self.__root), self.__arena.get_child_moves(self.__root)):
+            root_child_stats[GameTree.get_move_key(self.__get_root_move(move_code))] = (self.__get_child_visited_count(child), self.__get_child_value(child),
+                                                                                       self.__get_child_proven_result(child))
+
+        return root_child_stats
+
+    @staticmethod
+    def get_move_key(move_obj):
+
+        """returns a tuple (start cords, end cords, move type) identifying a move. Used to match moves made by different
+        boards, for example the same root move searched in different processes."""
+
+        return (move_obj.get_start_cords(), move_obj.get_end_cords(), move_obj.get_move_type())
+
+    def run_search(self, stop_event=None, progress_callback=None):
+
+        """runs MCTS iterations until the time for the move has passed (or the TimeManager stops the search), the maximum
+        number of iterations has been run, the root node has been proven or stop_event (a threading.Event) is set. If
+        progress_callback is given it is called every PROGRESS_INTERVAL seconds and when the search ends with the number of
+        iterations run, the time elapsed and the best move so far."""
 
         start_time = time.time()
+        last_progress_time = start_time
 
-        # initial node expansion before the MCTS iterations begin
-        self.__node_expansion() 
+        # initial node expansion before the MCTS iterations begin (a re-rooted tree may already be expanded)
+        if self.__current_is_leaf():
+            self.__node_expansion()
 
         num_iterations = 0
 
-        while time.time() - start_time < self.__time_for_move:
+        # best move so far, the gap between its value and the second best move's value and when it last changed
+        best_offset = None
+        value_gap = 0
+        best_move_change_time = start_time
+
+        while self.__max_iterations == None or num_iterations < self.__max_iterations:
+
+            current_time = time.time()
+
+            if self.__time_manager == None:
+                if self.__time_for_move != None and current_time - start_time >= self.__time_for_move:
+                    break
+
+            else:
+                if num_iterations % GameTree.BEST_MOVE_CHECK_INTERVAL == 0:
+                    new_best_offset, value_gap = self.__get_best_root_offset_and_gap()
+
+                    if new_best_offset != best_offset:
+                        best_offset = new_best_offset
+                        best_move_change_time = current_time
+
+                if self.__time_manager.should_stop(current_time - start_time, self.__time_for_move, num_iterations, value_gap, current_time - best_move_change_time):
+                    break
+
+            if stop_event != None and stop_event.is_set():
+                break
+
+            # searching a proven root node cannot change the best move
+            if self.get_root_proven_result() != NodeArena.UNPROVEN:
+                break
+
+            self.__prune_tree_if_full()
+
             self.__run_MCTS_iteration()
             num_iterations += 1
 
-        # best node/move to make is the child of the root node with the highest UCB1 value
-        best_node = max(self.__root.get_children(), key=lambda node: node.get_value())
-        
-        return best_node.get_move_obj()
+            if progress_callback != None and time.time() - last_progress_time >= GameTree.PROGRESS_INTERVAL:
+                last_progress_time = time.time()
+                progress_callback(num_iterations, last_progress_time - start_time, self.get_best_move())
+
+        if progress_callback != None:
+            progress_callback(num_iterations, time.time() - start_time, self.get_best_move())
+
+    def ponder(self, stop_event):
+
+        """runs MCTS iterations until stop_event (a threading.Event) is set. Used to search in a background thread while
+        the opponent is choosing their move. The tree must not be used by another thread until this method returns."""
+
+        if self.__current_is_leaf():
+            self.__node_expansion()
+
+        while not stop_event.is_set():
+
+            # searching a proven root node cannot change the best move, so the thread waits to be stopped
+            if self.get_root_proven_result() != NodeArena.UNPROVEN:
+                stop_event.wait()
+                break
+
+            self.__prune_tree_if_full()
+            self.__run_MCTS_iteration()
+
+    def __get_child_visited_count(self, child):
+        """returns the visited count of a child node (0 if the child is UNEXPANDED)"""
+
+        if child == NodeArena.UNEXPANDED:
+            return 0
+
+        return self.__arena.get_visited_count(child)
+
+    def __get_child_value(self, child):
+        """returns the value of a child node (0 if the child is UNEXPANDED)"""
+
+        if child == NodeArena.UNEXPANDED:
+            return 0
+
+        return self.__arena.get_value(child)
+
+    def __get_root_move(self, move_code):
+        """returns a Move object for a move code of a move made from the root node. Move objects are only made for moves
+        that leave the GameTree."""
+
+        return self.__board.move_code_to_move(move_code, self.__get_current_player_colour(0))
+
+    def __get_best_root_offset_and_gap(self):
+
+        """returns a tuple (offset of the best move from the root node, gap between the values of the best and second best
+        moves). The gap is infinite if the best move is proven to win or is the only move not proven to lose."""
+
+        children = self.__arena.get_children(self.__root)
+        win_result = self.__get_win_result(0)
+
+        if len(children) == 0:
+            return None, 0
+
+        for child_offset, child in enumerate(children):
+            if self.__get_child_proven_result(child) == win_result:
+                return child_offset, math.inf
+
+        candidate_offsets = [i for i in range(len(children)) if self.__get_child_proven_result(children[i]) != -win_result]
+
+        if len(candidate_offsets) == 0:
+            candidate_offsets = list(range(len(children)))
+
+        # best move to make is the move leading to the child of the root node with the highest value
+        candidate_offsets.sort(key=lambda i: self.__get_child_value(children[i]), reverse=True)
+
+        if len(candidate_offsets) == 1:
+            return candidate_offsets[0], math.inf
+
+        return candidate_offsets[0], self.__get_child_value(children[candidate_offsets[0]]) - self.__get_child_value(children[candidate_offsets[1]])
+
+    def get_best_move(self):
+
+        """returns the move from the root node that has been searched the best so far without running any more iterations,
+        or None if the root node has not been expanded. A move proven to win is returned if there is one and moves proven
+        to lose are only returned if every move loses."""
+
+        if self.__current_is_leaf():
+            return None
+
+        best_offset = self.__get_best_root_offset_and_gap()[0]
+
+        return self.__get_root_move(self.__arena.get_child_move(self.__root, best_offset))
+
+    def get_next_move(self, stop_event=None, progress_callback=None):
+
+        """Public method that runs the MCTS algorithm for a set amount of time and returns the best move to make.
+        The search ends early if stop_event is set (see run_search)."""
+
+        self.run_search(stop_event, progress_callback)
+
+        return self.get_best_move()
+
+class RootParallelSearch:
+
+    """Root parallel MCTS. Each worker process builds its own GameTree from the root board and searches it independently.
+    The visited counts and values of the root node's children are then added together across the workers and the move
+    with the highest total value is chosen, in the same way as GameTree.get_next_move chooses a move from one tree.
+
+    When a seed is given, worker i seeds its random module with seed + i. Together with a maximum number of iterations
+    per worker this makes the chosen move the same every time the search is run on the same position. Without a seed,
+    the first worker to prove the root node stops the others early; with a seed every worker runs its own search to the
+    end, so the merged statistics do not depend on how fast each worker ran.
+
+    ####################################################################
+    CLASS A SKILL: Parallel computing (multiprocessing)
+    CLASS A SKILL: Monte Carlo Tree Search (MCTS)
+    ####################################################################
+
+    """
+
+    # set in each worker process by init_worker. The stop event ends every worker's search early and each worker writes its
+    # number of iterations to its own element of the iteration counts array.
+    worker_stop_event = None
+    worker_iteration_counts = None
+
+    def __init__(self, root_board, time_for_move, num_workers, max_iterations=None, seed=None, max_nodes=GameTree.DEFAULT_MAX_NODES, progressive_widening=False,
+                 rollout_capture_probability=RolloutPolicy.DEFAULT_CAPTURE_PROBABILITY, rollout_horizon=GameTree.MOVES_PER_ROLLOUT, evaluation_weights=None, tablebase_path=None, draw_rule=None):
+        self.__root_board = root_board
+        self.__time_for_move = time_for_move
+        self.__num_workers = num_workers
+        self.__max_iterations = max_iterations
+        self.__seed = seed
+
+        # maximum number of nodes in each worker's tree and whether the workers use progressive widening
+        self.__max_nodes = max_nodes
+        self.__progressive_widening = progressive_widening
+
+        # capture probability of each worker's RolloutPolicy
+        self.__rollout_capture_probability = rollout_capture_probability
+
+        # rollout horizon and Evaluation weights of each worker's GameTree (no Evaluation if evaluation_weights is None)
+        self.__rollout_horizon = rollout_horizon
+        self.__evaluation_weights = evaluation_weights
+
+        # path of the Tablebase each worker loads (a memory-mapped file cannot be passed to another process)
+        self.__tablebase_path = tablebase_path
+
+        # DrawRule of each worker's GameTree
+        self.__draw_rule = draw_rule
+
+        # merged statistics of the root node's children from the last search (see merge_root_child_stats)
+        self.__merged_stats = {}
+
+    @staticmethod
+    def init_worker(stop_event, iteration_counts):
+
+        """Called once in each worker process when the pool is created. Synchronisation objects can only be shared with
+        worker processes when they are created, so they are stored as class attributes for run_worker to use."""
+
+        RootParallelSearch.worker_stop_event = stop_event
+        RootParallelSearch.worker_iteration_counts = iteration_counts
+
+    @staticmethod
+    def run_worker(worker_args):
+
+        """Runs one independent search and returns the statistics of the root node's children. Called in a worker
+        process."""
+
+        (worker_index, game_state_string, player_1_colour, player_2_colour, time_for_move, max_iterations, seed, max_nodes, progressive_widening,
+         rollout_capture_probability, rollout_horizon, evaluation_weights, tablebase_path, draw_rule) = worker_args
+
+        MultiClassBoardAttributes.set_player_colours(player_1_colour, player_2_colour)
+
+        random.seed(seed)
+
+        def record_iterations(num_iterations, elapsed_time, best_move):
+            RootParallelSearch.worker_iteration_counts[worker_index] = num_iterations
+
+        evaluation = None
+        if evaluation_weights != None:
+            evaluation = Evaluation(*evaluation_weights)
+
+        tablebase = None
+        if tablebase_path != None:
+            tablebase = Tablebase.load(tablebase_path)
+
+        # each worker stops early when the best move in its own tree can no longer change
+        game_tree = GameTree(BitBoard(game_state_string), time_for_move, max_iterations=max_iterations, max_nodes=max_nodes, progressive_widening=progressive_widening,
+                             rollout_policy=RolloutPolicy(rollout_capture_probability), rollout_horizon=rollout_horizon, evaluation=evaluation,
+                             time_manager=TimeManager(time_for_move), tablebase=tablebase, draw_rule=draw_rule)
+        game_tree.run_search(RootParallelSearch.worker_stop_event, record_iterations)
+
+        # a proven root node gives the same result in every worker, so the other workers are stopped (unless the search is
+        # seeded, where stopping them part way through would make the merged statistics depend on timing)
+        if seed == None and game_tree.get_root_proven_result() != NodeArena.UNPROVEN:
+            RootParallelSearch.worker_stop_event.set()
+
+        return game_tree.get_root_child_stats()
+
+    def __get_worker_args(self):
+
+        """returns a list of the arguments passed to run_worker for each worker"""
+
+        game_state_string = self.__root_board.get_game_state_string()
+        worker_args = []
+
+        for worker_index in range(self.__num_workers):
+
+            if self.__seed == None:
+                worker_seed = None
+            else:
+                worker_seed = self.__seed + worker_index
+
+            worker_args.append((worker_index, game_state_string, MultiClassBoardAttributes.player_1_colour, MultiClassBoardAttributes.player_2_colour,
+                                self.__time_for_move, self.__max_iterations, worker_seed, self.__max_nodes, self.__progressive_widening,
+                                self.__rollout_capture_probability, self.__rollout_horizon, self.__evaluation_weights, self.__tablebase_path, self.__draw_rule))
+
+        return worker_args
+
+    @staticmethod
+    def merge_root_child_stats(worker_stats):
+
+        """returns a dictionary mapping each move key to a tuple (total visited count, total value, proven result) over every
+        worker's statistics. A move is proven if any worker proved it (a proof is the same in every worker)."""
+
+        merged_stats = {}
+
+        for root_child_stats in worker_stats:
+            for move_key, (visited_count, value, proven_result) in root_child_stats.items():
+                total_visited_count, total_value, merged_proven_result = merged_stats.get(move_key, (0, 0, NodeArena.UNPROVEN))
+
+                if merged_proven_result == NodeArena.UNPROVEN:
+                    merged_proven_result = proven_result
+
+                merged_stats[move_key] = (total_visited_count + visited_count, total_value + value, merged_proven_result)
+
+        return merged_stats
+
+    def get_root_child_stats(self):
+
+        """returns the statistics of the root node's children merged over every worker (see merge_root_child_stats) from the last search"""
+
+        return self.__merged_stats
+
+    def get_next_move(self, stop_event=None, progress_callback=None):
+
+        """Public method that runs the workers and returns the best move to make. If stop_event (a threading.Event) is set
+        the workers end their searches early. If progress_callback is given it is called every GameTree.PROGRESS_INTERVAL
+        seconds with the total number of iterations run by the workers, the time elapsed and None (the best move is only
+        known once the workers' statistics are merged)."""
+
+        start_time = time.time()
+
+        worker_args = self.__get_worker_args()
+
+        worker_stop_event = multiprocessing.Event()
+        iteration_counts = multiprocessing.Array("i", self.__num_workers)
+
+        with multiprocessing.Pool(self.__num_workers, initializer=RootParallelSearch.init_worker, initargs=(worker_stop_event, iteration_counts)) as pool:
+            async_result = pool.map_async(RootParallelSearch.run_worker, worker_args)
+
+            while not async_result.ready():
+                async_result.wait(GameTree.PROGRESS_INTERVAL)
+
+                if stop_event != None and stop_event.is_set():
+                    worker_stop_event.set()
+
+                if progress_callback != None:
+                    progress_callback(sum(iteration_counts), time.time() - start_time, None)
+
+            worker_stats = async_result.get()
+
+        merged_stats = RootParallelSearch.merge_root_child_stats(worker_stats)
+        self.__merged_stats = merged_stats
+
+        # moves are compared in sorted key order so ties are always broken the same way. As in GameTree.get_best_move, a
+        # move proven to win is chosen if there is one and moves proven to lose are only chosen if every move loses.
+        move_keys = sorted(merged_stats)
+
+        winning_keys = [move_key for move_key in move_keys if merged_stats[move_key][2] == GameTree.WIN]
+        candidate_keys = [move_key for move_key in move_keys if merged_stats[move_key][2] != GameTree.LOSS]
+
+        if len(winning_keys) > 0:
+            # the winning move proven by the most workers is chosen, the move found most reliably by the searches
+            num_proofs = {move_key: sum(1 for root_child_stats in worker_stats if move_key in root_child_stats and root_child_stats[move_key][2] == GameTree.WIN)
+                          for move_key in winning_keys}
+            best_key = max(winning_keys, key=lambda move_key: num_proofs[move_key])
+
+        elif len(candidate_keys) > 0:
+            best_key = max(candidate_keys, key=lambda move_key: merged_stats[move_key][1])
+
+        else:
+            best_key = max(move_keys, key=lambda move_key: merged_stats[move_key][1])
 
+        # the Move object is taken from the legal moves of the root board so that it is tied to the root board's locations
+        for move_obj in self.__root_board.get_player_legal_moves(MultiClassBoardAttributes.player_2_colour):
+            if GameTree.get_move_key(move_obj) == best_key:
+                return move_obj
@@ -7,6 +7,7 @@ import textwrap
 from PIL import ImageTk, Image
 from Database import Database
 import os
+import threading
 
 working_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(working_dir)
@@ -78,11 +79,19 @@ class GraphicalUI(UI):
     LOGIN_WINDOW_DIMENSIONS = (300, 270)
     LOAD_GAME_WINDOW_DIMENSIONS = (500, 550)
 
+    # events sent to the event loop by the thread that runs the AI's search
+    AI_PROGRESS_EVENT = "ai_search_progress"
+    AI_MOVE_EVENT = "ai_move_found"
+    AI_ERROR_EVENT = "ai_search_error"
+
     PLAYER_NAME_TEXTWRAP_LENGTH = 10
     HELP_PAGE_TEXTWRAP_LENGTH = 140
 
     AVAILABLE_PIECE_COLOURS = ["yellow", "green", "red", "lightblue", "orange", "black"]
-    AI_RESERVED_NAMES = [MultiClassBoardAttributes.EASY_AI_NAME, MultiClassBoardAttributes.MEDIUM_AI_NAME, MultiClassBoardAttributes.HARD_AI_NAME]
+    AI_RESERVED_NAMES = [MultiClassBoardAttributes.EASY_AI_NAME, MultiClassBoardAttributes.MEDIUM_AI_NAME, MultiClassBoardAttributes.HARD_AI_NAME, MultiClassBoardAttributes.EXPERT_AI_NAME]
+
+    # stored as the winner of a drawn game in the game history (so it cannot be used as a username either)
+    DRAW_WINNER_NAME = "Draw"
 
     PIECE_IMAGES_PATH = "Images/PieceImages/"
     BOARD_IMAGES_PATH = "Images/BoardImages/"
@@ -104,14 +113,16 @@ class GraphicalUI(UI):
     AI_NAME_TO_LEVEL_NUM_MAP = {
         1: MultiClassBoardAttributes.EASY_AI_NAME,
         2: MultiClassBoardAttributes.MEDIUM_AI_NAME,
-        3: MultiClassBoardAttributes.HARD_AI_NAME
+        3: MultiClassBoardAttributes.HARD_AI_NAME,
+        4: MultiClassBoardAttributes.EXPERT_AI_NAME
     }
 
     # maps AI level names to difficulty level numbers
     AI_LEVEL_NUM_TO_NAME_MAP = {
         MultiClassBoardAttributes.EASY_AI_NAME: 1,
         MultiClassBoardAttributes.MEDIUM_AI_NAME: 2,
-        MultiClassBoardAttributes.HARD_AI_NAME: 3
+        MultiClassBoardAttributes.HARD_AI_NAME: 3,
+        MultiClassBoardAttributes.EXPERT_AI_NAME: 4
     }
 
     def __init__(self):
@@ -138,6 +149,10 @@ class GraphicalUI(UI):
         # game variables
         self.__game = None
         self.__game_is_loaded = False
+
+        # AI search variables (the thread is None when the AI is not searching)
+        self.__ai_search_thread = None
+        self.__ai_search_stop_event = threading.Event()
         self.__ai_mode = False
         self.__ai_name = None
 
@@ -290,7 +305,7 @@ class GraphicalUI(UI):
 
         AI_input_layout = [
             [sg.Text("Difficulty", pad=(0, self.COLUMN_PAD), font=self.SUBHEADING_FONT_PARAMS)],
-            [sg.Slider(range=(1, 3), default_value=1, orientation="h", size=self.SLIDER_SIZE, pad=(0, self.COLUMN_PAD), key="difficulty_slider")],
+            [sg.Slider(range=(1, len(self.AI_NAME_TO_LEVEL_NUM_MAP)), default_value=1, orientation="h", size=self.SLIDER_SIZE, pad=(0, self.COLUMN_PAD), key="difficulty_slider")],
             [player_1_AI_input_col],
         ]
 
@@ -546,6 +561,10 @@ class GraphicalUI(UI):
         # button to show the display board window
         show_display_board_button = sg.Button("show board", key="show_board_button", font=self.SMALL_BUTTON_FONT_PARAMS)
 
+        # button to make the AI play the best move it has found so far and text showing the progress of the AI's search (AI games only)
+        move_now_button = sg.Button("Move Now", key="move_now_button", font=self.SMALL_BUTTON_FONT_PARAMS, visible=bool(ai_level))
+        ai_progress_text = sg.Text("", key="ai_progress_text", font=self.PARAGRAPH_FONT_PARAMS, visible=bool(ai_level))
+
         # text to show the number of pieces captured by each player
         pieces_captured_player1_text = self.__get_pieces_captured_display_text(1)
         pieces_captured_player2_text = self.__get_pieces_captured_display_text(2)
@@ -559,6 +578,7 @@ class GraphicalUI(UI):
             [self.__create_menu()],
             [player_turn_frame],
             [show_display_board_button],
+            [move_now_button, ai_progress_text],
             [undo_move_button, move_option, capture_option, submit_move_button],
             [sg.Column(player1_captured_layout), sg.Column(board_layout), sg.Column(player2_captured_layout)],
         ]
@@ -675,7 +695,7 @@ class GraphicalUI(UI):
             if move_type == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
                 self.__update_number_captured_pieces_display() # update the number of pieces captured by each player
 
-                end_game = self.__end_if_game_over(disp_board_open) # only need to check if the game is over after a capture move
+            end_game = self.__end_if_game_over(disp_board_open) # any move can end the game (a capture or a draw)
             
         else:
             sg.popup("ILLEGAL MOVE", keep_on_top=True)
@@ -686,19 +706,95 @@ class GraphicalUI(UI):
             self.__toggle_highlight_board_position(self.__highlighted_board_positions[0])
 
         if ai_mode and prev_move_legal and not end_game:
-            move = self.__game.get_ai_move() # get the AI's move
+            self.__start_ai_search() # the AI's move is made when its search has finished
+
+    def __start_ai_search(self):
+
+        """Starts the AI's search for its move in a worker thread so the GUI keeps responding while the AI is thinking.
+        The thread sends AI_PROGRESS_EVENT events while it searches and an AI_MOVE_EVENT event with the move when it finishes,
+        or an AI_ERROR_EVENT event with the exception if the search fails. The events carry the Game object so that events from a game that has been left can be ignored."""
+
+        game = self.__game
+        window = self.__main_window
+
+        def send_progress(num_iterations, elapsed_time, best_move):
+            window.write_event_value(self.AI_PROGRESS_EVENT, (game, num_iterations, elapsed_time, best_move))
+
+        def run_search():
+            # an exception would otherwise end the thread without an event, leaving the GUI waiting for the AI forever
+            try:
+                move = game.get_ai_move(self.__ai_search_stop_event, send_progress)
+            except Exception as error:
+                window.write_event_value(self.AI_ERROR_EVENT, (game, error))
+                return
+
+            window.write_event_value(self.AI_MOVE_EVENT, (game, move))
+
+        self.__ai_search_stop_event.clear()
+        self.__main_window["ai_progress_text"].update("AI is thinking...")
+
+        self.__ai_search_thread = threading.Thread(target=run_search, daemon=True)
+        self.__ai_search_thread.start()
+
+    def __cancel_ai_search(self):
+
+        """Stops the AI's search if it is running and waits for the worker thread to finish. The move it finds is ignored."""
+
+        if self.__ai_search_thread == None:
+            return
+
+        self.__ai_search_stop_event.set()
+        self.__ai_search_thread.join()
+        self.__ai_search_thread = None
+
+    def __handle_ai_search_error(self, error):
+
+        """Tells the user that the AI's search failed. The search thread has finished, so the board can be changed again
+        (the user can undo their move or save the game)."""
+
+        self.__ai_search_thread = None
+        self.__main_window["ai_progress_text"].update("")
+
+        sg.popup(f"The AI could not find a move: {error}", keep_on_top=True)
+
+    def __update_ai_progress_display(self, num_iterations, elapsed_time, best_move):
+
+        """Updates the text showing the progress of the AI's search on the match page"""
+
+        if best_move == None:
+            best_move_text = "-"
+        else:
+            best_move_text = f"{best_move.get_start_cords()} to {best_move.get_end_cords()}"
 
-            # make the AI's move on the board and GUI
-            self.__update_game_and_UI_after_move(move.get_start_loc(), move.get_end_loc(), move.get_move_type())
+        self.__main_window["ai_progress_text"].update(f"AI is thinking: {num_iterations} simulations, {elapsed_time:.1f}s, best move {best_move_text}")
 
-            if move.get_move_type() == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
-                self.__update_number_captured_pieces_display()
-                self.__end_if_game_over(disp_board_open) # check if AI has won
+    def __make_ai_move_on_display(self, move, disp_board_open):
+
+        """Makes the move found by the AI's search on the GUI board and the game object's board"""
+
+        self.__ai_search_thread = None
+        self.__main_window["ai_progress_text"].update("")
+
+        # make the AI's move on the board and GUI
+        self.__update_game_and_UI_after_move(move.get_start_loc(), move.get_end_loc(), move.get_move_type())
+
+        if move.get_move_type() == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
+            self.__update_number_captured_pieces_display()
+
+        self.__end_if_game_over(disp_board_open) # check if AI has won or the game has been drawn
+
+        # the AI searches while the user is choosing their next move
+        self.__game.start_ai_pondering()
 
     def __reset_game_variables(self):
 
         """Resets the match variables to their initial values"""
 
+        self.__cancel_ai_search()
+
+        if self.__game != None:
+            self.__game.stop_ai_pondering()
+
         self.__game = None
         self.__game_is_loaded = False
         self.__ai_mode = False
@@ -721,10 +817,16 @@ class GraphicalUI(UI):
 
             winning_player = self.__game.get_winning_player()
 
-            sg.popup(f"{winning_player.get_name()} has won the game!", title="Game Over", keep_on_top=True)
+            if winning_player == None:
+                sg.popup(f"The game is a draw because {self.__game.get_draw_reason()}!", title="Game Over", keep_on_top=True)
+                winner_name = self.DRAW_WINNER_NAME
+            else:
+                sg.popup(f"{winning_player.get_name()} has won the game!", title="Game Over", keep_on_top=True)
+                winner_name = winning_player.get_name()
 
-            # if the user is logged need to add the game to their history and update their stats (if the match was against an AI)
-            if self.__logged_in and self.__ai_mode:
+            # if the user is logged need to add the game to their history and update their stats (if the match was against an AI).
+            # The stats only count wins and losses, so a draw is not counted.
+            if self.__logged_in and self.__ai_mode and winning_player != None:
 
                 human_won = False
 
@@ -740,7 +842,7 @@ class GraphicalUI(UI):
 
             # add game to game history if the user is logged in
             if self.__logged_in:
-                self.__db.add_game_to_history(self.__logged_in_username, self.__game.get_player_name(2), winning_player.get_name())
+                self.__db.add_game_to_history(self.__logged_in_username, self.__game.get_player_name(2), winner_name)
 
             return True
         
@@ -911,8 +1013,8 @@ class GraphicalUI(UI):
         if self.__db.check_if_username_exists(username):
             sg.popup("Username already exists", title="Error Signing Up", keep_on_top=True)
 
-        # username can't be one of the AI names (Easy AI, Medium AI, Hard AI)
-        elif username in self.AI_RESERVED_NAMES:
+        # username can't be one of the AI names (Easy AI, Medium AI, Hard AI) or the name stored for a draw
+        elif username in self.AI_RESERVED_NAMES or username == self.DRAW_WINNER_NAME:
             sg.popup("Username is reserved and cannot be used", title="Error Signing Up", keep_on_top=True)
             
         else:
@@ -1121,8 +1223,18 @@ class GraphicalUI(UI):
 
         """Creates a Game object with the given parameters and stores it in an instance variable"""
 
+        # the AI of a game that is being replaced should stop searching
+        self.__cancel_ai_search()
+
+        if self.__game != None:
+            self.__game.stop_ai_pondering()
+
         self.__game = Game(name1, name2, ai_level=ai_level, game_state_string=game_state_string, player2_starts=player2_starts, player1_num_pieces=player1pieces, player2_num_pieces=player2pieces)
 
+        # the AI searches while the user is choosing their first move
+        if ai_level and not player2_starts:
+            self.__game.start_ai_pondering()
+
     def play_game(self):
 
         """The main event loop of the GUI. Handles all events and updates the GUI accordingly. This is the only public method of the UI class and is called by the main.py file to launch the application."""
@@ -1144,12 +1256,22 @@ class GraphicalUI(UI):
 
                 # terminate the application if the main window is closed
                 elif window == self.__main_window:
+                    self.__cancel_ai_search()
                     window.close()
                     break
 
                 else:
                     window.close()  
 
+            # ignore events from an AI search for a game that has since been left or restarted
+            if event in (self.AI_PROGRESS_EVENT, self.AI_MOVE_EVENT, self.AI_ERROR_EVENT) and values[event][0] != self.__game:
+                continue
+
+            # the board cannot be changed by the user while the AI is searching for its move
+            if self.__ai_search_thread != None and event in ("submit_move_button", "undo_move_button", "Save Game"):
+                sg.popup("Please wait for the AI to move (or press Move Now)", keep_on_top=True)
+                continue
+
             # go to the new game page
             if event == "new_game_button": 
                 self.__setup_new_game_page()                
@@ -1253,8 +1375,15 @@ class GraphicalUI(UI):
 
             # undo the last move in a match
             elif event == "undo_move_button":
+
+                # the AI's search is for a position that is being undone
+                self.__game.stop_ai_pondering()
+
                 self.__undo_move(self.__ai_mode)
 
+                if self.__ai_mode:
+                    self.__game.start_ai_pondering()
+
                 # redraw the pieces on the display board if it is open
                 if disp_win_open:
                     self.__draw_pieces_on_disp_board()
@@ -1263,8 +1392,21 @@ class GraphicalUI(UI):
             elif self.__is_board_position(event):
                 self.__toggle_highlight_board_position(event)
 
+            # show the progress of the AI's search
+            elif event == self.AI_PROGRESS_EVENT:
+                self.__update_ai_progress_display(*values[event][1:])
+
+            # the AI's search failed
+            elif event == self.AI_ERROR_EVENT:
+                self.__handle_ai_search_error(values[event][1])
+
+            # make the AI play the best move it has found so far
+            elif event == "move_now_button":
+                self.__ai_search_stop_event.set()
+
             # go back to the home page
             elif event == "Home":
+                self.__cancel_ai_search()
                 self.__main_window.close()
                 self.__setup_home_page()
 
@@ -1272,9 +1414,13 @@ class GraphicalUI(UI):
             elif event == "Restart Match":
                 self.__handle_restart_match()
 
-            # make a move in a match
-            elif event == "submit_move_button":
-                self.__make_move_on_display(values, disp_win_open, self.__ai_mode)
+            # make a move in a match (the user's move, or the AI's move once its search has finished)
+            elif event == "submit_move_button" or event == self.AI_MOVE_EVENT:
+
+                if event == "submit_move_button":
+                    self.__make_move_on_display(values, disp_win_open, self.__ai_mode)
+                else:
+                    self.__make_ai_move_on_display(values[event][1], disp_win_open)
 
                 if disp_win_open:
                     self.__draw_pieces_on_disp_board()
@@ -1391,7 +1537,11 @@ class TerminalUI(UI):
         """Displays the winner of the game in the terminal"""
 
         winner = self.__game.get_winning_player()
-        print(f"{winner.get_name()} won!")
+
+        if winner == None:
+            print(f"The game is a draw because {self.__game.get_draw_reason()}.")
+        else:
+            print(f"{winner.get_name()} won!")
 
     def __get_move_type(self):
 
@@ -1442,9 +1592,8 @@ class TerminalUI(UI):
             
             self.__game.switch_current_player()
             
-            # game can only be over after a capture move
-            if move_type == MultiClassBoardAttributes.CAPTURE_MOVE_TYPE:
-                self.__game.set_game_status()
+            # the game is over after a capture that takes a player's last piece or a move that draws the game
+            self.__game.set_game_status()
 
         # display the final board and the winner
         self.__display_board()
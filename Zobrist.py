@@ -0,0 +1,53 @@
+from BoardGeometry import BoardGeometry
+import random
+
+class Zobrist:
+
+    """Random 64 bit keys used for Zobrist hashing of board positions. The hash of a position is the XOR of the key for
+    every (player, square) pair that has a piece on it, so a move can update the hash with a few XOR operations instead
+    of the position being serialised with get_game_state_string.
+
+    The keys are generated from a fixed seed so that a position has the same hash in every process and every run of the
+    program (hashes are stored in the database by the opening book).
+
+    ####################################################################
+    CLASS A SKILL: Hashing (Zobrist hashing)
+    GOOD CODING STYLE: Use of constants
+    ####################################################################
+
+    """
+
+    KEY_BITS = 64
+    SEED = 20240609
+
+    @staticmethod
+    def __build_piece_keys(num_squares, key_bits, seed):
+
+        """Returns a tuple of two tuples (player 1 and player 2) containing a random key for every square index"""
+
+        rng = random.Random(seed)
+
+        return tuple(tuple(rng.getrandbits(key_bits) for _ in range(num_squares)) for _ in range(2))
+
+    # PIECE_KEYS[player_index][square] where player_index is 0 for player 1 and 1 for player 2
+    PIECE_KEYS = __build_piece_keys(BoardGeometry.NUM_SQUARES, KEY_BITS, SEED)
+
+    @staticmethod
+    def hash_masks(player1_mask, player2_mask):
+
+        """Returns the hash of the position described by the occupancy masks of player 1 and player 2"""
+
+        position_hash = 0
+
+        for player_index, mask in enumerate((player1_mask, player2_mask)):
+            keys = Zobrist.PIECE_KEYS[player_index]
+            square = 0
+
+            while mask:
+                if mask & 1:
+                    position_hash ^= keys[square]
+
+                mask >>= 1
+                square += 1
+
+        return position_hash